@@ -0,0 +1,2 @@
+# Плагины проекта; путь yatube/ к этому моменту уже добавлен python_paths.
+pytest_plugins = ['core.pytest_budgets']
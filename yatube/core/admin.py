@@ -0,0 +1,197 @@
+"""Админка для больших таблиц: без полного COUNT(*), без запроса на
+каждую строку списка и с массовыми действиями в фоне."""
+from django.conf import settings
+from django.contrib import admin, messages
+from django.contrib.admin.widgets import ForeignKeyRawIdWidget
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections
+from django.urls import NoReverseMatch, reverse
+from django.utils.functional import cached_property
+from django.utils.html import format_html
+from django.utils.text import Truncator
+
+from . import jobs
+from .models import Job, OutboxMessage
+
+
+def estimate_rows(queryset):
+    """Примерное число строк таблицы по статистике базы или None."""
+    model = queryset.model
+    connection = connections[queryset.db]
+    table = connection.ops.quote_name(model._meta.db_table)
+    if connection.vendor == 'postgresql':
+        sql = 'SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass'
+        params = [model._meta.db_table]
+    elif connection.vendor == 'mysql':
+        sql = (
+            'SELECT table_rows FROM information_schema.tables '
+            'WHERE table_schema = DATABASE() AND table_name = %s'
+        )
+        params = [model._meta.db_table]
+    elif connection.vendor == 'sqlite':
+        # Максимальный rowid берётся из конца B-дерева, без обхода
+        # таблицы; дыры от удалённых строк завышают оценку.
+        sql = f'SELECT MAX(_rowid_) FROM {table}'
+        params = []
+    else:
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    if not row or row[0] is None or row[0] < 0:
+        return None
+    return int(row[0])
+
+
+class EstimatedCountPaginator(Paginator):
+    """Число строк без полного COUNT(*).
+
+    Для списка без фильтров берётся оценка из статистики базы, а
+    отфильтрованные строки считаются не дальше ADMIN_COUNT_LIMIT.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimate_rows(queryset)
+            if estimate is not None:
+                return estimate
+        return queryset[:settings.ADMIN_COUNT_LIMIT].count()
+
+
+class PreloadedRawIdWidget(ForeignKeyRawIdWidget):
+    """Поле id связанного объекта, которое берёт подпись из уже
+    загруженного объекта, а не отдельным запросом."""
+    related_object = None
+
+    def label_and_url_for_value(self, value):
+        obj = self.related_object
+        if obj is None or str(obj.pk) != str(value):
+            return super().label_and_url_for_value(value)
+        opts = obj._meta
+        try:
+            url = reverse(
+                f'{self.admin_site.name}:'
+                f'{opts.app_label}_{opts.model_name}_change',
+                args=(obj.pk,),
+            )
+        except NoReverseMatch:
+            url = ''
+        return Truncator(obj).words(14, truncate='...'), url
+
+
+class JobActionsMixin:
+    """Действия админки, которые ставят фоновую задачу, см. core.jobs."""
+
+    def enqueue_job(self, request, kind, pks, description, **payload):
+        job = jobs.enqueue(
+            kind, pks, description, user=request.user, **payload
+        )
+        url = reverse(
+            f'{self.admin_site.name}:core_job_change', args=(job.pk,)
+        )
+        self.message_user(
+            request,
+            format_html(
+                'Задача «{}» ({} строк) поставлена в очередь, прогресс - '
+                'на <a href="{}">её странице</a>.',
+                description, job.total, url,
+            ),
+            messages.SUCCESS,
+        )
+        return job
+
+
+class LargeTableAdmin(JobActionsMixin, admin.ModelAdmin):
+    """Основа для админки таблиц с миллионами строк.
+
+    Внешние ключи из raw_id_fields, попавшие в list_editable, подписываются
+    объектами из list_select_related. Тяжёлые действия ставятся в очередь
+    через enqueue_job и выполняются командой run_jobs.
+    """
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name in self.raw_id_fields and 'widget' not in kwargs:
+            kwargs['widget'] = PreloadedRawIdWidget(
+                db_field.remote_field, self.admin_site,
+                using=kwargs.get('using'),
+            )
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+    def get_changelist_formset(self, request, **kwargs):
+        formset = super().get_changelist_formset(request, **kwargs)
+        preloaded = [
+            name for name in self.list_editable if name in self.raw_id_fields
+        ]
+
+        class PreloadedFormSet(formset):
+            def _construct_form(self, i, **kwargs):
+                form = super()._construct_form(i, **kwargs)
+                for name in preloaded:
+                    form.fields[name].widget.related_object = getattr(
+                        form.instance, name
+                    )
+                return form
+
+        return PreloadedFormSet
+
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'description',
+        'status',
+        'progress',
+        'created_by',
+        'created',
+        'updated',
+    )
+    list_filter = ('status',)
+    list_select_related = ('created_by',)
+    fields = (
+        'description', 'kind', 'payload', 'status', 'progress', 'error',
+        'created_by', 'created', 'updated',
+    )
+    readonly_fields = fields
+
+    def progress(self, job):
+        percent = job.position * 100 // job.total if job.total else 100
+        return f'{job.position} из {job.total} ({percent}%)'
+    progress.short_description = 'Прогресс'
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+admin.site.register(Job, JobAdmin)
+
+
+class OutboxMessageAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk', 'subject', 'recipients', 'status', 'attempts', 'created',
+        'sent',
+    )
+    list_filter = ('status',)
+    fields = (
+        'subject', 'recipients', 'status', 'attempts', 'next_attempt',
+        'error', 'created', 'sent',
+    )
+    readonly_fields = fields
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+
+admin.site.register(OutboxMessage, OutboxMessageAdmin)
@@ -0,0 +1,132 @@
+"""ASGI-вход для проекта на Django 2.2.
+
+Своего ASGI-обработчика у Django до 3.0 нет, поэтому WsgiToAsgi
+оборачивает обычное WSGI-приложение. Соединения, чтение тела и отправку
+ответа держит цикл событий ASGI-сервера, а сам Django выполняется в
+ограниченном пуле из ASGI_THREADS потоков. Медленный запрос (промах
+миниатюры, длинная ветка комментариев) занимает один поток, а не целый
+воркер. Ответ отдаётся кусками по мере того, как его отдаёт Django.
+"""
+import asyncio
+import io
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+
+def build_environ(scope, body):
+    """WSGI environ для HTTP-запроса из ASGI scope."""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        # WSGI ждёт путь байтами в latin-1, ASGI отдаёт его строкой.
+        'SCRIPT_NAME': scope.get('root_path', '').encode().decode('latin-1'),
+        'PATH_INFO': scope['path'].encode().decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'SERVER_PROTOCOL': f'HTTP/{scope.get("http_version", "1.1")}',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope.get('headers', ()):
+        name = name.decode('latin-1').upper().replace('-', '_')
+        if name not in ('CONTENT_LENGTH', 'CONTENT_TYPE'):
+            name = f'HTTP_{name}'
+        value = value.decode('latin-1')
+        if name in environ:
+            value = f'{environ[name]},{value}'
+        environ[name] = value
+    return environ
+
+
+async def read_body(receive):
+    """Тело запроса целиком или None, если клиент ушёл раньше."""
+    body = bytearray()
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return None
+        body += message.get('body', b'')
+        if not message.get('more_body'):
+            return bytes(body)
+
+
+class WsgiToAsgi:
+    def __init__(self, wsgi_application, threads):
+        self.wsgi_application = wsgi_application
+        self.executor = ThreadPoolExecutor(
+            max_workers=threads, thread_name_prefix='asgi'
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            raise ValueError(f'Неподдерживаемое соединение: {scope["type"]}')
+        body = await read_body(receive)
+        if body is None:
+            return
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(
+            self.executor, self.handle, scope, body, send, loop
+        )
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.executor.shutdown(wait=True)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    def handle(self, scope, body, send, loop):
+        """Выполняет WSGI-приложение в потоке пула."""
+        def send_sync(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        start = {}
+
+        def start_response(status, headers, exc_info=None):
+            start.update(
+                type='http.response.start',
+                status=int(status.split(' ', 1)[0]),
+                headers=[
+                    (name.lower().encode('latin-1'), value.encode('latin-1'))
+                    for name, value in headers
+                ],
+            )
+            return write
+
+        def write(chunk):
+            if 'type' in start:
+                send_sync(start.copy())
+                start.clear()
+            send_sync({
+                'type': 'http.response.body', 'body': chunk,
+                'more_body': True,
+            })
+
+        response = self.wsgi_application(
+            build_environ(scope, body), start_response
+        )
+        try:
+            for chunk in response:
+                if chunk:
+                    write(chunk)
+        finally:
+            if hasattr(response, 'close'):
+                response.close()
+        if 'type' in start:
+            send_sync(start)
+        send_sync({'type': 'http.response.body', 'body': b''})
@@ -0,0 +1,133 @@
+"""Бюджеты производительности страниц: число SQL-запросов и медианное
+время ответа по имени URL.
+
+Бюджеты и набор данных, на котором они сняты, лежат в JSON-файле
+PERF_BUDGETS_FILE. Проверяет их pytest-плагин core.pytest_budgets.
+Страница замеряется в установившемся режиме: первый запрос прогревает
+кэши, затем делается runs запросов. Берётся наибольшее число запросов
+к базе и медиана времени.
+"""
+import json
+import math
+import statistics
+import time
+
+from django.conf import settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+# Во сколько раз бюджет времени при обновлении больше замера и меньше
+# какого значения он не бывает: время заметно гуляет от прогона к
+# прогону, особенно у быстрых страниц, а число запросов - нет.
+TIME_HEADROOM = 2
+TIME_FLOOR_MS = 20
+
+
+class Measurement:
+    __slots__ = ('queries', 'median_ms')
+
+    def __init__(self, queries, median_ms):
+        self.queries = queries
+        self.median_ms = median_ms
+
+
+def load(path=None):
+    with open(path or settings.PERF_BUDGETS_FILE, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def save(data, path=None):
+    with open(
+        path or settings.PERF_BUDGETS_FILE, 'w', encoding='utf-8'
+    ) as file:
+        json.dump(data, file, ensure_ascii=False, indent=4, sort_keys=True)
+        file.write('\n')
+
+
+def measure(client, url, runs):
+    client.get(url)
+    queries = 0
+    timings = []
+    for _ in range(runs):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            response = client.get(url)
+            timings.append((time.perf_counter() - started) * 1000)
+        if response.status_code != 200:
+            raise AssertionError(f'{url} ответил {response.status_code}')
+        queries = max(queries, len(captured))
+    return Measurement(queries, statistics.median(timings))
+
+
+def exceeded(budget, measurement, time_factor=1.0):
+    """Что из бюджета превышено: список строк, пустой - если всё в норме.
+
+    time_factor растягивает бюджет времени под медленную машину; при 0
+    время не проверяется.
+    """
+    problems = []
+    if measurement.queries > budget['queries']:
+        problems.append(
+            f'запросов {measurement.queries} > {budget["queries"]}'
+        )
+    limit = budget['median_ms'] * time_factor
+    if time_factor and measurement.median_ms > limit:
+        problems.append(
+            f'медиана {measurement.median_ms:.1f} > {limit:.1f} мс'
+        )
+    return problems
+
+
+def updated(pages, results, names, allow_raise=False):
+    """Бюджеты страниц names по свежим замерам и список повышений.
+
+    Остальные страницы не меняются. Бюджет, который уже есть, без
+    allow_raise только ужесточается: там, где замер хуже, остаётся
+    прежнее значение, а повышение попадает в список.
+    """
+    pages = dict(pages)
+    raised = []
+    for name in names:
+        measurement = results.get(name)
+        if measurement is None:
+            continue
+        fresh = {
+            'queries': measurement.queries,
+            'median_ms': max(
+                math.ceil(measurement.median_ms * TIME_HEADROOM),
+                TIME_FLOOR_MS,
+            ),
+        }
+        budget = pages.get(name, fresh)
+        for key, value in fresh.items():
+            if value > budget[key]:
+                raised.append(f'{name} {key}: {budget[key]} -> {value}')
+                if not allow_raise:
+                    fresh[key] = budget[key]
+        pages[name] = fresh
+    return pages, raised
+
+
+def report(pages, results, time_factor=1.0):
+    """Текстовая таблица: бюджет, замер и разница по каждой странице."""
+    lines = [
+        f'{"страница":<24} {"запросов":>8} {"бюджет":>7} {"+/-":>5} '
+        f'{"мс":>8} {"бюджет":>8} {"+/-":>8}'
+    ]
+    for name, measurement in sorted(results.items()):
+        budget = pages.get(name)
+        if budget is None:
+            lines.append(
+                f'{name:<24} {measurement.queries:>8} {"-":>7} {"":>5} '
+                f'{measurement.median_ms:>8.1f} {"-":>8}'
+            )
+            continue
+        limit = budget['median_ms'] * time_factor
+        mark = ' <-' if exceeded(budget, measurement, time_factor) else ''
+        lines.append(
+            f'{name:<24} {measurement.queries:>8} {budget["queries"]:>7} '
+            f'{measurement.queries - budget["queries"]:>+5} '
+            f'{measurement.median_ms:>8.1f} {limit:>8.1f} '
+            f'{measurement.median_ms - limit:>+8.1f}{mark}'
+        )
+    return '\n'.join(lines)
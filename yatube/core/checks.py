@@ -0,0 +1,105 @@
+"""Проверки настроек, которые бьют по производительности в бою.
+
+Запускаются вместе с остальными проверками Django при старте runserver,
+migrate и т.п., а отдельно - командой ``manage.py check --tag performance``.
+"""
+from django.conf import settings
+from django.core.checks import Warning, register
+
+PER_PROCESS_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+# Бэкенды, где incr атомарен между процессами.
+ATOMIC_INCR_CACHES = (
+    'django.core.cache.backends.memcached.MemcachedCache',
+    'django.core.cache.backends.memcached.PyLibMCCache',
+    'django_redis.cache.RedisCache',
+)
+CACHED_LOADER = 'django.template.loaders.cached.Loader'
+DB_SESSIONS = 'django.contrib.sessions.backends.db'
+
+
+def _uses_cached_loader(template):
+    loaders = template.get('OPTIONS', {}).get('loaders')
+    if loaders is None:
+        # Без явного списка Django сам включает кэш вне DEBUG.
+        return not settings.DEBUG
+    return any(
+        isinstance(loader, (list, tuple)) and loader[0] == CACHED_LOADER
+        for loader in loaders
+    )
+
+
+def _check_templates():
+    for template in settings.TEMPLATES:
+        if not _uses_cached_loader(template):
+            yield Warning(
+                'Шаблоны перечитываются и компилируются на каждый запрос.',
+                hint=f'Оберните загрузчики в {CACHED_LOADER}.',
+                id='performance.W002',
+            )
+
+
+def _check_databases():
+    for alias, database in settings.DATABASES.items():
+        if not database.get('CONN_MAX_AGE'):
+            yield Warning(
+                f'База {alias!r} открывает новое соединение на каждый '
+                f'запрос.',
+                hint='Задайте DB_CONN_MAX_AGE больше нуля.',
+                id='performance.W003',
+            )
+
+
+def _check_caches():
+    for alias, cache in settings.CACHES.items():
+        if cache['BACKEND'] in PER_PROCESS_CACHES:
+            yield Warning(
+                f'Кэш {alias!r} не общий для процессов веб-сервера: '
+                f'{cache["BACKEND"]}.',
+                hint='Задайте CACHE_BACKEND и CACHE_LOCATION.',
+                id='performance.W004',
+            )
+    backend = settings.CACHES[settings.RATELIMIT_CACHE]['BACKEND']
+    if settings.RATELIMIT_ENABLED and backend not in ATOMIC_INCR_CACHES:
+        yield Warning(
+            f'В кэше {settings.RATELIMIT_CACHE!r} ({backend}) incr не '
+            f'атомарен: параллельные запросы недосчитываются, и лимиты '
+            f'core.ratelimit пропускают больше заданного.',
+            hint='Укажите в RATELIMIT_CACHE кэш на memcached или redis.',
+            id='performance.W007',
+        )
+
+
+def _check_flags():
+    if settings.DEBUG:
+        yield Warning(
+            'DEBUG включён: каждый SQL-запрос хранится в памяти до конца '
+            'запроса, кэш шаблонов не работает.',
+            id='performance.W001',
+        )
+    if settings.TEMPLATE_PROFILING:
+        yield Warning(
+            'Включено профилирование шаблонов.',
+            hint='Уберите TEMPLATE_PROFILING=True из окружения.',
+            id='performance.W005',
+        )
+    if settings.SESSION_ENGINE == DB_SESSIONS:
+        yield Warning(
+            'Сессии читаются из базы на каждый запрос.',
+            hint='Используйте core.sessions или signed_cookies.',
+            id='performance.W006',
+        )
+
+
+@register('performance')
+def check_performance_settings(app_configs, **kwargs):
+    if getattr(settings, 'DJANGO_ENV', 'dev') != 'prod':
+        return []
+    return [
+        *_check_flags(),
+        *_check_templates(),
+        *_check_databases(),
+        *_check_caches(),
+    ]
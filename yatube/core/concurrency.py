@@ -0,0 +1,52 @@
+"""Параллельные независимые выборки внутри одного запроса.
+
+Django 2.2 не умеет асинхронные вью и асинхронный ORM, поэтому
+независимые запросы страницы (пост, комментарии, счётчики, подписка)
+выполняются в общем ограниченном пуле из VIEW_FETCH_THREADS потоков.
+У каждого потока своё соединение с базой: оно закрывается по
+CONN_MAX_AGE, как в обычном запросе. При 0 всё выполняется по очереди в
+потоке запроса. Это значение по умолчанию: в тестах данные живут в
+транзакции, которую соединения других потоков не видят.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections
+
+_lock = threading.Lock()
+_pool = None
+
+
+def _executor():
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(
+                max_workers=settings.VIEW_FETCH_THREADS,
+                thread_name_prefix='fetch',
+            )
+        return _pool
+
+
+def _call(func):
+    close_old_connections()
+    try:
+        return func()
+    finally:
+        close_old_connections()
+
+
+def gather(*funcs):
+    """Вызывает функции без аргументов и возвращает их результаты по
+    порядку. Первое исключение пробрасывается как есть.
+
+    Функции должны сами вычислить queryset (list, count): ленивый
+    queryset иначе выполнится позже, уже в шаблоне.
+    """
+    if not settings.VIEW_FETCH_THREADS or len(funcs) < 2:
+        return [func() for func in funcs]
+    # Одну функцию выполняем сами, чтобы поток запроса не простаивал.
+    futures = [_executor().submit(_call, func) for func in funcs[1:]]
+    first = funcs[0]()
+    return [first] + [future.result() for future in futures]
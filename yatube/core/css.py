@@ -0,0 +1,126 @@
+"""Вырезание из CSS правил, чьи классы не встречаются в шаблонах."""
+import os
+import re
+
+CLASS_RE = re.compile(r'\.(-?[_a-zA-Z][\w-]*)')
+NOT_RE = re.compile(r':not\([^)]*\)')
+TOKEN_RE = re.compile(r'[\w-]+')
+# Блоки с вложенными правилами, которые чистим рекурсивно. Остальные
+# at-правила (@font-face, @keyframes и т.п.) оставляем как есть.
+NESTED_AT_RULES = ('@media', '@supports')
+
+
+def collect_used_classes(dirs, extensions=('.html',)):
+    """Все слова из файлов проекта, которые могут оказаться именами
+    классов."""
+    used = set()
+    for directory in dirs:
+        for root, _, files in os.walk(directory):
+            for filename in files:
+                if not filename.endswith(extensions):
+                    continue
+                path = os.path.join(root, filename)
+                with open(path, encoding='utf-8') as template:
+                    used.update(TOKEN_RE.findall(template.read()))
+    return used
+
+
+def _skip_string(css, pos):
+    quote = css[pos]
+    pos += 1
+    while pos < len(css) and css[pos] != quote:
+        pos += 2 if css[pos] == '\\' else 1
+    return pos + 1
+
+
+def _skip_comment(css, pos):
+    end = css.find('*/', pos + 2)
+    return len(css) if end == -1 else end + 2
+
+
+def _find(css, pos, stops):
+    """Позиция первого символа из stops вне строк и комментариев."""
+    while pos < len(css):
+        char = css[pos]
+        if char in '"\'':
+            pos = _skip_string(css, pos)
+        elif css.startswith('/*', pos):
+            pos = _skip_comment(css, pos)
+        elif char in stops:
+            return pos
+        else:
+            pos += 1
+    return len(css)
+
+
+def _block_end(css, pos):
+    """Позиция закрывающей скобки блока, открытого на pos."""
+    depth = 0
+    while pos < len(css):
+        pos = _find(css, pos, '{}')
+        if pos >= len(css):
+            break
+        depth += 1 if css[pos] == '{' else -1
+        if depth == 0:
+            return pos
+        pos += 1
+    return len(css)
+
+
+def _split_selectors(prelude):
+    selectors, depth, start = [], 0, 0
+    for pos, char in enumerate(prelude):
+        if char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == ',' and depth == 0:
+            selectors.append(prelude[start:pos])
+            start = pos + 1
+    selectors.append(prelude[start:])
+    return selectors
+
+
+def _selector_is_used(selector, used):
+    classes = CLASS_RE.findall(NOT_RE.sub('', selector))
+    return all(name in used for name in classes)
+
+
+def prune_css(css, used):
+    """Оставляет только правила, все классы которых есть в used."""
+    result = []
+    pos = 0
+    while pos < len(css):
+        if css[pos].isspace():
+            pos += 1
+            continue
+        if css.startswith('/*', pos):
+            end = _skip_comment(css, pos)
+            if css.startswith('/*!', pos):
+                result.append(css[pos:end])
+            pos = end
+            continue
+        stop = _find(css, pos, '{;')
+        prelude = css[pos:stop].strip()
+        if stop >= len(css) or css[stop] == ';':
+            if prelude:
+                result.append(prelude + ';')
+            pos = stop + 1
+            continue
+        end = _block_end(css, stop)
+        result.append(_prune_block(prelude, css[stop + 1:end], used))
+        pos = end + 1
+    return ''.join(result)
+
+
+def _prune_block(prelude, body, used):
+    if prelude.startswith(NESTED_AT_RULES):
+        body = prune_css(body, used)
+        return f'{prelude}{{{body}}}' if body else ''
+    if prelude.startswith('@'):
+        return f'{prelude}{{{body}}}'
+    selectors = [
+        selector.strip() for selector in _split_selectors(prelude)
+        if _selector_is_used(selector, used)
+    ]
+    return f'{",".join(selectors)}{{{body}}}' if selectors else ''
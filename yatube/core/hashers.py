@@ -0,0 +1,82 @@
+"""Хешеры паролей со стоимостью из настроек.
+
+Алгоритмы те же, что у Django, и старые хеши проверяются как прежде, но
+число итераций PBKDF2, раунды bcrypt и time_cost Argon2 берутся из
+окружения: на слабых веб-узлах цену входа можно снизить, на сильных -
+поднять. Django сам перехеширует пароль при успешном входе, если хеш
+посчитан другим алгоритмом или с другой стоимостью, так что смена
+настроек доходит до пользователей по мере их входа.
+
+Подобрать стоимость под время хеширования на этой машине помогает
+команда tune_password_hasher.
+"""
+from itertools import count
+
+from django.conf import settings
+from django.contrib.auth import hashers
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+
+class CostMixin:
+    # Настройка со стоимостью и атрибут хешера, который она задаёт.
+    # Хешер ещё задаёт classmethod cost_candidates(): стоимости по
+    # возрастанию для tune_password_hasher.
+    cost_setting = None
+    cost_attr = None
+
+    def __init__(self, cost=None):
+        if cost is None:
+            cost = getattr(settings, self.cost_setting)
+        setattr(self, self.cost_attr, cost)
+
+    @property
+    def cost(self):
+        return getattr(self, self.cost_attr)
+
+
+class PBKDF2PasswordHasher(CostMixin, hashers.PBKDF2PasswordHasher):
+    cost_setting = 'PASSWORD_PBKDF2_ITERATIONS'
+    cost_attr = 'iterations'
+
+    @classmethod
+    def cost_candidates(cls):
+        # Время растёт линейно с числом итераций: шаг в четверть.
+        return (int(10000 * 1.25 ** step) // 1000 * 1000 for step in count())
+
+
+class BCryptSHA256PasswordHasher(
+    CostMixin, hashers.BCryptSHA256PasswordHasher
+):
+    cost_setting = 'PASSWORD_BCRYPT_ROUNDS'
+    cost_attr = 'rounds'
+
+    @classmethod
+    def cost_candidates(cls):
+        # Каждый раунд удваивает время; больше 31 bcrypt не умеет.
+        return iter(range(4, 32))
+
+
+class Argon2PasswordHasher(CostMixin, hashers.Argon2PasswordHasher):
+    cost_setting = 'PASSWORD_ARGON2_TIME_COST'
+    cost_attr = 'time_cost'
+
+    @classmethod
+    def cost_candidates(cls):
+        return count(1)
+
+
+COST_SETTINGS = {
+    PBKDF2PasswordHasher.cost_setting,
+    BCryptSHA256PasswordHasher.cost_setting,
+    Argon2PasswordHasher.cost_setting,
+}
+
+
+@receiver(setting_changed)
+def reset_hashers(setting, **kwargs):
+    # Стоимость читается при создании хешера, а Django пересоздаёт их
+    # только при смене PASSWORD_HASHERS.
+    if setting in COST_SETTINGS:
+        hashers.get_hashers.cache_clear()
+        hashers.get_hashers_by_algorithm.cache_clear()
@@ -0,0 +1,107 @@
+import hashlib
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from PIL import features
+from sorl.thumbnail import delete, get_thumbnail
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = 'responsive_image'
+# Сбойные картинки кэшируем ненадолго, чтобы не дёргать sorl на каждом
+# рендере, но и не закрывать их навсегда.
+FAILED_TIMEOUT = 60
+
+
+def image_name(image):
+    """Имя файла картинки: поле модели или уже готовая строка."""
+    return getattr(image, 'name', image) or ''
+
+
+def variant_formats():
+    formats = ['JPEG']
+    if features.check('webp'):
+        formats.append('WEBP')
+    return formats
+
+
+def variants_key(name):
+    options = '{}:{}:{}'.format(
+        settings.POST_IMAGE_WIDTHS,
+        settings.POST_IMAGE_RATIO,
+        variant_formats(),
+    )
+    digest = hashlib.md5(f'{name}:{options}'.encode()).hexdigest()
+    return f'{CACHE_PREFIX}:{digest}'
+
+
+def build_variants(image):
+    """Нарезает картинку поста по всем ширинам и форматам.
+
+    Возвращает словарь с готовыми строками srcset для каждого формата,
+    запасным src и размерами самого крупного варианта.
+    """
+    width_ratio, height_ratio = settings.POST_IMAGE_RATIO
+    srcsets = {}
+    fallback = None
+    for image_format in variant_formats():
+        candidates = []
+        for width in settings.POST_IMAGE_WIDTHS:
+            height = round(width * height_ratio / width_ratio)
+            thumb = get_thumbnail(
+                image,
+                f'{width}x{height}',
+                crop='center',
+                upscale=True,
+                format=image_format,
+            )
+            candidates.append(f'{thumb.url} {width}w')
+            if image_format == 'JPEG':
+                fallback = thumb
+        srcsets[image_format.lower()] = ', '.join(candidates)
+    return {
+        'src': fallback.url,
+        'width': fallback.width,
+        'height': fallback.height,
+        'srcsets': srcsets,
+    }
+
+
+def warm_variants(image):
+    """Считает варианты картинки заранее и кладёт их описание в кэш."""
+    name = image_name(image)
+    if not name:
+        return None
+    try:
+        variants = build_variants(image)
+    except Exception:
+        logger.exception('Не удалось нарезать картинку %s', name)
+        cache.set(variants_key(name), {}, FAILED_TIMEOUT)
+        return None
+    cache.set(variants_key(name), variants, None)
+    return variants
+
+
+def get_variants(image):
+    """Описание вариантов картинки; KV-хранилище sorl трогаем только при
+    промахе кэша."""
+    name = image_name(image)
+    if not name:
+        return None
+    variants = cache.get(variants_key(name))
+    if variants is None:
+        return warm_variants(image)
+    return variants or None
+
+
+def delete_image(image):
+    """Удаляет файл картинки, все её варианты и их описание из кэша."""
+    name = image_name(image)
+    if not name:
+        return
+    cache.delete(variants_key(name))
+    try:
+        delete(name)
+    except Exception:
+        logger.exception('Не удалось удалить картинку %s', name)
@@ -0,0 +1,100 @@
+"""Фоновые задачи для массовых действий админки.
+
+Действие только ставит задачу в очередь: запоминает id выбранных строк и
+параметры. Команда run_jobs берёт задачи по одной и обрабатывает строки
+пачками по JOBS_BATCH_SIZE, каждую пачку в своей транзакции, сохраняя
+прогресс после каждой. Упавший посреди работы процесс продолжит с
+последней сохранённой пачки.
+"""
+import json
+import logging
+from array import array
+from contextlib import nullcontext
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+HANDLERS = {}
+
+
+def handler(kind, atomic=True, batch_size=None):
+    """Регистрирует обработчик задач вида kind.
+
+    Обработчик получает список id очередной пачки и параметры задачи.
+    С atomic=False он сам открывает транзакции, а batch_size задаёт свой
+    размер пачки вместо JOBS_BATCH_SIZE.
+    """
+    def register(func):
+        func.atomic = atomic
+        func.batch_size = batch_size
+        HANDLERS[kind] = func
+        return func
+    return register
+
+
+def enqueue(kind, pks, description, user=None, **payload):
+    if kind not in HANDLERS:
+        raise ValueError(f'Неизвестный тип задачи: {kind}')
+    ids = array('I', sorted(pks))
+    return Job.objects.create(
+        kind=kind,
+        description=description,
+        payload=json.dumps(payload),
+        pks=ids.tobytes(),
+        total=len(ids),
+        created_by=user,
+    )
+
+
+def claim():
+    """Забирает следующую задачу: новую или брошенную упавшим
+    процессом."""
+    stale = timezone.now() - timedelta(seconds=settings.JOBS_STALE_SECONDS)
+    candidates = Job.objects.filter(
+        Q(status=Job.PENDING) | Q(status=Job.RUNNING, updated__lt=stale)
+    ).order_by('pk')
+    for job in candidates[:10]:
+        # Задачу забирает тот, чей UPDATE сработал первым.
+        claimed = Job.objects.filter(
+            pk=job.pk, status=job.status, updated=job.updated
+        ).update(status=Job.RUNNING, updated=timezone.now())
+        if claimed:
+            job.refresh_from_db()
+            return job
+    return None
+
+
+def run(job, batch_size=None):
+    func = HANDLERS[job.kind]
+    batch_size = (
+        batch_size
+        or getattr(func, 'batch_size', None)
+        or settings.JOBS_BATCH_SIZE
+    )
+    atomic = getattr(func, 'atomic', True)
+    payload = json.loads(job.payload)
+    ids = array('I')
+    ids.frombytes(bytes(job.pks))
+    try:
+        while job.position < job.total:
+            chunk = list(ids[job.position:job.position + batch_size])
+            with transaction.atomic() if atomic else nullcontext():
+                func(chunk, **payload)
+                job.position += len(chunk)
+                job.save(update_fields=['position', 'updated'])
+    except Exception as error:
+        logger.exception('Задача %s упала', job.pk)
+        job.status = Job.FAILED
+        job.error = repr(error)
+        job.save(update_fields=['status', 'error', 'updated'])
+        return job
+    job.status = Job.DONE
+    job.save(update_fields=['status', 'updated'])
+    return job
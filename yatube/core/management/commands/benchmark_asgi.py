@@ -0,0 +1,145 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.test import Client
+
+from core.asgi import WsgiToAsgi, build_environ
+
+
+def make_scope(url, cookie=None):
+    path, _, query = url.partition('?')
+    headers = [(b'host', b'localhost')]
+    if cookie:
+        headers.append((b'cookie', cookie.encode('latin-1')))
+    return {
+        'type': 'http',
+        'method': 'GET',
+        'path': path,
+        'query_string': query.encode(),
+        'headers': headers,
+        'http_version': '1.1',
+        'scheme': 'http',
+        'server': ('localhost', 80),
+        'client': ('127.0.0.1', 0),
+    }
+
+
+def run_wsgi(application, scopes, workers):
+    """Все запросы приходят разом, их разбирают workers синхронных
+    воркеров. Время запроса считается с прихода, с ожиданием в очереди."""
+    def call(scope, arrived):
+        statuses = []
+        response = application(
+            build_environ(scope, b''),
+            lambda status, headers, exc_info=None: statuses.append(status),
+        )
+        try:
+            for _ in response:
+                pass
+        finally:
+            response.close()
+        return int(statuses[0].split()[0]), time.perf_counter() - arrived
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(call, scope, time.perf_counter())
+            for scope in scopes
+        ]
+        return [future.result() for future in futures]
+
+
+async def run_asgi(application, scopes):
+    async def receive():
+        return {'type': 'http.request', 'body': b''}
+
+    async def call(scope):
+        arrived = time.perf_counter()
+        messages = []
+
+        async def send(message):
+            messages.append(message)
+
+        await application(scope, receive, send)
+        return messages[0]['status'], time.perf_counter() - arrived
+
+    return await asyncio.gather(*(call(scope) for scope in scopes))
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает WSGI и ASGI-вход на одних и тех же страницах: все '
+        'запросы приходят разом, WSGI разбирают синхронные воркеры, ASGI - '
+        'пул потоков core.asgi, и тех и других поровну, --concurrency. '
+        'Запускать на базе с данными, например после generate_dataset.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('urls', nargs='*', default=['/'])
+        parser.add_argument('--requests', type=int, default=200)
+        parser.add_argument(
+            '--concurrency', type=int, default=None,
+            help='Сколько запросов обрабатывается одновременно: воркеров '
+                 'WSGI и потоков ASGI-входа. По умолчанию ASGI_THREADS.',
+        )
+        parser.add_argument(
+            '--user', default=None,
+            help='Ходить на страницы от имени этого пользователя.',
+        )
+
+    def handle(self, *args, **options):
+        cookie = None
+        if options['user']:
+            user = get_user_model().objects.filter(
+                username=options['user']
+            ).first()
+            if user is None:
+                raise CommandError(f'Нет пользователя {options["user"]}')
+            client = Client()
+            client.force_login(user)
+            session = client.cookies[settings.SESSION_COOKIE_NAME]
+            cookie = f'{session.key}={session.value}'
+        # При разной параллельности сравнивались бы размеры пулов, а не
+        # входы.
+        concurrency = options['concurrency'] or settings.ASGI_THREADS
+        wsgi = get_wsgi_application()
+        asgi = WsgiToAsgi(wsgi, concurrency)
+        self.stdout.write(
+            f'Запросов на страницу: {options["requests"]}, '
+            f'параллельно: {concurrency}'
+        )
+        for url in options['urls']:
+            scopes = [make_scope(url, cookie)] * options['requests']
+            # Прогрев: кэши и ленивые импорты не должны попасть в замер.
+            run_wsgi(wsgi, scopes[:1], 1)
+            results = {}
+            started = time.perf_counter()
+            results['WSGI'] = (
+                run_wsgi(wsgi, scopes, concurrency),
+                time.perf_counter() - started,
+            )
+            started = time.perf_counter()
+            results['ASGI'] = (
+                asyncio.run(run_asgi(asgi, scopes)),
+                time.perf_counter() - started,
+            )
+            self.stdout.write(url)
+            self.stdout.write(
+                f'{"":<6} {"запр/с":>8} {"p50, мс":>9} {"p95, мс":>9} '
+                f'{"макс, мс":>9} {"не 200":>7}'
+            )
+            for name, (rows, elapsed) in results.items():
+                timings = sorted(latency * 1000 for _, latency in rows)
+                errors = sum(1 for status, _ in rows if status != 200)
+                p95 = timings[len(timings) * 95 // 100 - 1]
+                self.stdout.write(
+                    f'{name:<6} {len(rows) / elapsed:>8.1f} '
+                    f'{statistics.median(timings):>9.1f} {p95:>9.1f} '
+                    f'{timings[-1]:>9.1f} {errors:>7}'
+                )
+        asgi.executor.shutdown()
@@ -0,0 +1,38 @@
+import time
+
+from django.contrib.sessions.models import Session
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет просроченные сессии из базы небольшими пачками, не '
+        'блокируя её надолго.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--pause', type=float, default=0.0,
+            help='Пауза между пачками в секундах.',
+        )
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        expired = Session.objects.filter(expire_date__lt=now)
+        purged = 0
+        while True:
+            keys = list(
+                expired.values_list('session_key', flat=True)
+                [:options['batch_size']]
+            )
+            if not keys:
+                break
+            with transaction.atomic():
+                Session.objects.filter(session_key__in=keys).delete()
+            purged += len(keys)
+            if options['pause']:
+                time.sleep(options['pause'])
+        self.stdout.write(f'Удалено просроченных сессий: {purged}.')
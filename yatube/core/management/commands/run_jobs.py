@@ -0,0 +1,31 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core import jobs
+
+
+class Command(BaseCommand):
+    help = 'Выполняет фоновые задачи массовых действий админки.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Выполнить задачи из очереди и выйти.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            job = jobs.claim()
+            if job is None:
+                if options['once']:
+                    return
+                time.sleep(settings.JOBS_POLL_INTERVAL)
+                continue
+            jobs.run(job, options['batch_size'])
+            self.stdout.write(
+                f'{job}: {job.get_status_display()}, '
+                f'{job.position} из {job.total}.'
+            )
@@ -0,0 +1,29 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from core import outbox
+
+
+class Command(BaseCommand):
+    help = 'Отправляет письма из outbox пачками, см. core.outbox.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Отправить письма, которым пора уйти, и выйти.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            sent, failed = outbox.send_batch(options['batch_size'])
+            if sent or failed:
+                self.stdout.write(
+                    f'Отправлено писем: {sent}, не отправлено: {failed}.'
+                )
+                continue
+            if options['once']:
+                return
+            time.sleep(settings.OUTBOX_POLL_INTERVAL)
@@ -0,0 +1,63 @@
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.module_loading import import_string
+
+
+class Command(BaseCommand):
+    help = (
+        'Подбирает стоимость хеша пароля под целевое время на этой машине: '
+        'самую большую, при которой хеширование укладывается в '
+        '--target-ms. Запускать на веб-узле, а найденное значение задать '
+        'в его окружении.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--hasher', choices=sorted(settings.PASSWORD_HASHER_CLASSES),
+            default=settings.PASSWORD_HASHER,
+            help='По умолчанию PASSWORD_HASHER.',
+        )
+        parser.add_argument(
+            '--target-ms', type=float, default=100,
+            help='Сколько миллисекунд готовы тратить на один вход.',
+        )
+        parser.add_argument(
+            '--runs', type=int, default=3,
+            help='Замеров на каждую стоимость, берётся медиана.',
+        )
+
+    def measure(self, hasher, runs):
+        salt = hasher.salt()
+        timings = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            hasher.encode('correct horse battery staple', salt)
+            timings.append((time.perf_counter() - started) * 1000)
+        return statistics.median(timings)
+
+    def handle(self, *args, **options):
+        hasher_class = import_string(
+            settings.PASSWORD_HASHER_CLASSES[options['hasher']]
+        )
+        if hasher_class.library:
+            try:
+                hasher_class(1)._load_library()
+            except ValueError as error:
+                raise CommandError(error)
+        chosen = None
+        self.stdout.write(f'{hasher_class.cost_setting:>28} {"мс":>8}')
+        for cost in hasher_class.cost_candidates():
+            elapsed = self.measure(hasher_class(cost), options['runs'])
+            self.stdout.write(f'{cost:>28} {elapsed:>8.1f}')
+            if elapsed > options['target_ms']:
+                break
+            chosen = cost
+        if chosen is None:
+            raise CommandError(
+                f'Даже самая низкая стоимость дольше '
+                f'{options["target_ms"]} мс.'
+            )
+        self.stdout.write(f'{hasher_class.cost_setting}={chosen}')
@@ -0,0 +1,61 @@
+import logging
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from core import ratelimit, template_profiling
+
+logger = logging.getLogger('core.template_profiling')
+
+
+class TemplateProfilingMiddleware:
+    """Включается настройкой TEMPLATE_PROFILING: пишет в лог время
+    рендеринга каждого шаблона и include, а в ответ добавляет заголовок
+    Server-Timing."""
+
+    def __init__(self, get_response):
+        if not settings.TEMPLATE_PROFILING:
+            raise MiddlewareNotUsed
+        template_profiling.install()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        template_profiling.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            stats = template_profiling.stop()
+        if stats:
+            logger.info(
+                '%s %s\n%s',
+                request.method,
+                request.path,
+                template_profiling.report(stats),
+            )
+            response['Server-Timing'] = ', '.join(
+                f'tpl{number};desc="{name}";dur={record.total * 1000:.2f}'
+                for number, (name, record) in enumerate(stats.items())
+            )
+        return response
+
+
+class RateLimitMiddleware:
+    """Применяет RATELIMITS ко всем вью, кроме обёрнутых декоратором
+    ratelimit: те считают запросы сами."""
+
+    def __init__(self, get_response):
+        if not settings.RATELIMIT_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if getattr(view_func, 'ratelimited', False):
+            return None
+        match = request.resolver_match
+        view_rule = ratelimit.rule(match.view_name) if match else None
+        if view_rule is None:
+            return None
+        return ratelimit.limited(request, match.view_name, *view_rule)
@@ -0,0 +1,97 @@
+from django.conf import settings
+from django.db import models
+
+
+class Job(models.Model):
+    """Фоновая задача над множеством строк, см. core.jobs.
+
+    id строк хранятся упакованными в array('I'), position - сколько из
+    них уже обработано. Выполняет задачи команда run_jobs.
+    """
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Готово'),
+        (FAILED, 'Ошибка'),
+    )
+
+    kind = models.CharField('Тип', max_length=100)
+    description = models.CharField('Описание', max_length=200)
+    payload = models.TextField('Параметры', default='{}')
+    pks = models.BinaryField('id строк')
+    total = models.PositiveIntegerField('Всего строк', default=0)
+    position = models.PositiveIntegerField('Обработано строк', default=0)
+    status = models.CharField(
+        'Статус',
+        max_length=10,
+        choices=STATUSES,
+        default=PENDING,
+        db_index=True,
+    )
+    error = models.TextField('Ошибка', blank=True)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='+',
+        verbose_name='Автор',
+    )
+    created = models.DateTimeField('Дата создания', auto_now_add=True)
+    updated = models.DateTimeField('Дата изменения', auto_now=True)
+
+    class Meta:
+        ordering = ['-pk']
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+
+    def __str__(self):
+        return self.description
+
+
+class OutboxMessage(models.Model):
+    """Письмо, ждущее отправки, см. core.outbox.
+
+    Всё письмо лежит в payload в JSON; subject и recipients - копии для
+    админки. Отправляет письма команда send_outbox.
+    """
+    PENDING = 'pending'
+    SENDING = 'sending'
+    SENT = 'sent'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (SENDING, 'Отправляется'),
+        (SENT, 'Отправлено'),
+        (FAILED, 'Ошибка'),
+    )
+
+    subject = models.CharField('Тема', max_length=255)
+    recipients = models.TextField('Получатели')
+    payload = models.TextField('Письмо')
+    status = models.CharField(
+        'Статус',
+        max_length=10,
+        choices=STATUSES,
+        default=PENDING,
+        db_index=True,
+    )
+    attempts = models.PositiveIntegerField('Попыток', default=0)
+    next_attempt = models.DateTimeField('Следующая попытка', db_index=True)
+    claim = models.CharField('Отправитель', max_length=32, blank=True)
+    claimed = models.DateTimeField('Взято в отправку', blank=True, null=True)
+    error = models.TextField('Ошибка', blank=True)
+    created = models.DateTimeField('Дата создания', auto_now_add=True)
+    sent = models.DateTimeField('Дата отправки', blank=True, null=True)
+
+    class Meta:
+        ordering = ['-pk']
+        verbose_name = 'Исходящее письмо'
+        verbose_name_plural = 'Исходящие письма'
+
+    def __str__(self):
+        return self.subject
@@ -0,0 +1,153 @@
+"""Исходящая почта через таблицу outbox.
+
+EMAIL_BACKEND проекта - EmailBackend отсюда: письмо, которое вью
+отправляет через send_mail или EmailMessage.send(), только сохраняется
+в таблицу, в той же транзакции, что и запрос. Сброс пароля и остальные
+вью не ждут почтовый сервер, а откаченный запрос не оставляет письма.
+
+Команда send_outbox забирает письма пачками по OUTBOX_BATCH_SIZE и
+отправляет каждую пачку через одно соединение OUTBOX_EMAIL_BACKEND.
+Письмо, которое не ушло, ждёт следующей попытки с удвоением паузы от
+OUTBOX_RETRY_DELAY, после OUTBOX_MAX_ATTEMPTS попыток остаётся с
+ошибкой. Пачку, брошенную упавшим отправителем, через
+OUTBOX_STALE_SECONDS забирает другой.
+"""
+import json
+import logging
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMultiAlternatives, get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import OutboxMessage
+
+logger = logging.getLogger(__name__)
+
+
+def dump(message):
+    if message.attachments:
+        raise ValueError('Письма с вложениями через outbox не отправляются')
+    return json.dumps({
+        'subject': message.subject,
+        'body': message.body,
+        'from_email': message.from_email,
+        'to': message.to,
+        'cc': message.cc,
+        'bcc': message.bcc,
+        'reply_to': message.reply_to,
+        'headers': message.extra_headers,
+        'alternatives': getattr(message, 'alternatives', []),
+        'content_subtype': message.content_subtype,
+    }, ensure_ascii=False)
+
+
+def load(payload):
+    data = json.loads(payload)
+    content_subtype = data.pop('content_subtype')
+    data['alternatives'] = [tuple(item) for item in data['alternatives']]
+    message = EmailMultiAlternatives(**data)
+    message.content_subtype = content_subtype
+    return message
+
+
+def enqueue(messages):
+    now = timezone.now()
+    return OutboxMessage.objects.bulk_create([
+        OutboxMessage(
+            subject=message.subject[:255],
+            recipients=', '.join(message.recipients()),
+            payload=dump(message),
+            next_attempt=now,
+        )
+        for message in messages
+    ])
+
+
+class EmailBackend(BaseEmailBackend):
+    """Кладёт письма в outbox; отправляет их команда send_outbox."""
+
+    def send_messages(self, email_messages):
+        messages = [
+            message for message in email_messages if message.recipients()
+        ]
+        return len(enqueue(messages))
+
+
+def claim(batch_size):
+    """Забирает пачку писем, которым пора уйти."""
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.OUTBOX_STALE_SECONDS)
+    due = Q(status=OutboxMessage.PENDING, next_attempt__lte=now) | Q(
+        status=OutboxMessage.SENDING, claimed__lt=stale
+    )
+    pks = list(
+        OutboxMessage.objects.filter(due).order_by('pk')
+        .values_list('pk', flat=True)[:batch_size]
+    )
+    if not pks:
+        return []
+    # Письма достаются тому, чей UPDATE сработал первым, по метке.
+    token = uuid.uuid4().hex
+    OutboxMessage.objects.filter(due, pk__in=pks).update(
+        status=OutboxMessage.SENDING, claim=token, claimed=now
+    )
+    return list(OutboxMessage.objects.filter(claim=token).order_by('pk'))
+
+
+def _deliver(rows):
+    """Отправляет пачку через одно соединение; возвращает отправленные
+    письма и ошибки остальных."""
+    connection = get_connection(settings.OUTBOX_EMAIL_BACKEND)
+    try:
+        connection.open()
+    except Exception as error:
+        logger.exception('Не удалось подключиться к почтовому серверу')
+        return [], {row.pk: error for row in rows}
+    sent, failed = [], {}
+    try:
+        for row in rows:
+            try:
+                connection.send_messages([load(row.payload)])
+            except Exception as error:
+                failed[row.pk] = error
+            else:
+                sent.append(row)
+    finally:
+        connection.close()
+    return sent, failed
+
+
+def _retry(rows, failed, now):
+    for row in rows:
+        row.attempts += 1
+        row.error = repr(failed[row.pk])
+        row.claim = ''
+        if row.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+            row.status = OutboxMessage.FAILED
+        else:
+            row.status = OutboxMessage.PENDING
+            delay = settings.OUTBOX_RETRY_DELAY * 2 ** (row.attempts - 1)
+            row.next_attempt = now + timedelta(seconds=delay)
+    OutboxMessage.objects.bulk_update(
+        rows, ['attempts', 'error', 'claim', 'status', 'next_attempt'],
+        batch_size=500,
+    )
+
+
+def send_batch(batch_size=None):
+    """Отправляет одну пачку; возвращает числа отправленных и
+    неотправленных писем."""
+    rows = claim(batch_size or settings.OUTBOX_BATCH_SIZE)
+    if not rows:
+        return 0, 0
+    sent, failed = _deliver(rows)
+    now = timezone.now()
+    OutboxMessage.objects.filter(pk__in=[row.pk for row in sent]).update(
+        status=OutboxMessage.SENT, sent=now, claim='', error=''
+    )
+    _retry([row for row in rows if row.pk in failed], failed, now)
+    return len(sent), len(failed)
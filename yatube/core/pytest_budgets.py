@@ -0,0 +1,136 @@
+"""Pytest-плагин, который проверяет бюджеты страниц из core.budgets.
+
+Фикстура perf_dataset создаёт на время модуля набор данных из файла
+бюджетов (posts.dataset с фиксированным seed) и откатывает его после.
+Фикстура perf_budget замеряет страницу и роняет тест, если она вышла из
+бюджета. Если что-то стало дороже, в конце прогона выводится таблица с
+разницей по всем замеренным страницам.
+
+--budgets-update ИМЯ записывает замер страницы в файл бюджетов; опцию
+можно повторить для нескольких страниц, остальные страницы проверяются
+как обычно. Существующий бюджет при этом только ужесточается: страница,
+которая вышла из него, по-прежнему роняет тест, а поднять бюджет можно
+лишь явно, с --budgets-allow-raise. Каждое повышение печатается в
+конце прогона.
+"""
+import pytest
+from django.core.cache import caches
+from django.db import transaction
+
+from core import budgets
+
+PLUGIN_NAME = 'budgets'
+
+
+def pytest_addoption(parser):
+    group = parser.getgroup('budgets', 'бюджеты производительности')
+    group.addoption(
+        '--budgets-update', action='append', default=[], metavar='ИМЯ',
+        help='Записать замер страницы с этим именем URL в файл бюджетов; '
+             'можно повторять.',
+    )
+    group.addoption(
+        '--budgets-allow-raise', action='store_true',
+        help='Разрешить --budgets-update поднять существующий бюджет.',
+    )
+    group.addoption(
+        '--budgets-time-factor', type=float, default=1.0,
+        help='Множитель бюджета времени для медленных машин; 0 отключает '
+             'проверку времени.',
+    )
+
+
+def pytest_configure(config):
+    config.pluginmanager.register(BudgetsPlugin(config), PLUGIN_NAME)
+
+
+class BudgetsPlugin:
+    def __init__(self, config):
+        self.update = set(config.getoption('budgets_update'))
+        self.allow_raise = config.getoption('budgets_allow_raise')
+        self.time_factor = config.getoption('budgets_time_factor')
+        self.data = None
+        self.results = {}
+        self.failed = False
+
+    def budgets(self):
+        if self.data is None:
+            self.data = budgets.load()
+        return self.data
+
+    def pytest_terminal_summary(self, terminalreporter):
+        if not self.results:
+            return
+        data = self.budgets()
+        if self.update:
+            self.save(data, terminalreporter)
+        if self.failed:
+            terminalreporter.section('бюджеты страниц')
+            terminalreporter.write_line(budgets.report(
+                data['pages'], self.results, self.time_factor
+            ))
+
+    def save(self, data, terminalreporter):
+        data['pages'], raised = budgets.updated(
+            data['pages'], self.results, self.update, self.allow_raise
+        )
+        budgets.save(data)
+        names = sorted(self.update & self.results.keys())
+        terminalreporter.write_line(
+            f'Бюджеты обновлены: {", ".join(names) or "ничего"}.'
+        )
+        missing = sorted(self.update - self.results.keys())
+        if missing:
+            terminalreporter.write_line(
+                f'Не замерены: {", ".join(missing)}.', yellow=True
+            )
+        for line in raised:
+            if self.allow_raise:
+                terminalreporter.write_line(f'Поднят {line}', red=True)
+            else:
+                terminalreporter.write_line(
+                    f'Оставлен прежним {line}, поднять - '
+                    f'--budgets-allow-raise', yellow=True
+                )
+
+
+def _plugin(request):
+    return request.config.pluginmanager.get_plugin(PLUGIN_NAME)
+
+
+@pytest.fixture(scope='module')
+def perf_dataset(request, django_db_setup, django_db_blocker):
+    """Набор данных из файла бюджетов; после модуля откатывается."""
+    from posts import dataset
+    with django_db_blocker.unblock():
+        with transaction.atomic():
+            yield dataset.generate(**_plugin(request).budgets()['dataset'])
+            transaction.set_rollback(True)
+        for cache in caches.all():
+            cache.clear()
+
+
+@pytest.fixture
+def perf_budget(request):
+    """Функция check(name, client, url): замеряет страницу и сверяет с
+    бюджетом для имени URL name."""
+    plugin = _plugin(request)
+
+    def check(name, client, url):
+        data = plugin.budgets()
+        measurement = budgets.measure(client, url, data['runs'])
+        plugin.results[name] = measurement
+        if plugin.update:
+            return measurement
+        budget = data['pages'].get(name)
+        if budget is None:
+            plugin.failed = True
+            pytest.fail(
+                f'Для {name} нет бюджета, нужен --budgets-update {name}'
+            )
+        problems = budgets.exceeded(budget, measurement, plugin.time_factor)
+        if problems:
+            plugin.failed = True
+            pytest.fail(f'{name} вышла из бюджета: {", ".join(problems)}')
+        return measurement
+    return check
@@ -0,0 +1,126 @@
+"""Ограничение частоты запросов на запись.
+
+Лимиты задаются в RATELIMITS по имени URL в виде «запросов/период»,
+например '10/m', и считают запросы с методами из RATELIMIT_METHODS;
+другие методы можно указать парой ('10/m', ('GET', 'POST')). Запросы
+считаются по IP, а у вошедшего пользователя ещё и по его id, и запрос
+проходит, только если свободны оба счётчика: смена аккаунтов не обходит
+лимит адреса. У кэша Django нет сравнения с обменом, только incr,
+поэтому ведро токенов приближается двумя счётчиками: за текущее окно и
+за предыдущее, вклад которого убывает по мере того, как окно сдвигается.
+incr атомарен лишь в memcached и redis; в файловом кэше и кэше в базе
+параллельные запросы теряют часть счёта (см. проверку performance.W007).
+"""
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.shortcuts import render
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 60 * 60 * 24}
+
+
+def parse_rate(rate):
+    """'10/m' -> (10, 60)."""
+    count, period = rate.split('/')
+    return int(count), PERIODS[period[0]]
+
+
+def client_ip(request):
+    return request.META.get(settings.RATELIMIT_IP_HEADER, '')
+
+
+def client_keys(request):
+    keys = [f'ip:{client_ip(request)}']
+    if request.user.is_authenticated:
+        keys.append(f'user:{request.user.pk}')
+    return keys
+
+
+def rule(name):
+    """Лимит и методы для имени URL или None, если лимита нет."""
+    value = settings.RATELIMITS.get(name)
+    if value is None or isinstance(value, tuple):
+        return value
+    return value, settings.RATELIMIT_METHODS
+
+
+def _hit(key, period, now):
+    """Учитывает запрос в текущем окне. Возвращает счётчики текущего и
+    прошлого окна, вес прошлого и сколько секунд осталось до конца
+    текущего."""
+    cache = caches[settings.RATELIMIT_CACHE]
+    window, elapsed = divmod(now, period)
+    current_key = f'ratelimit:{key}:{int(window)}'
+    # add не перезапишет счётчик, который успел создать другой процесс.
+    cache.add(current_key, 0, period * 2)
+    try:
+        current = cache.incr(current_key)
+    except ValueError:
+        current = 1
+    previous = cache.get(f'ratelimit:{key}:{int(window) - 1}', 0)
+    weight = 1 - elapsed / period
+    return current, previous, weight, period - elapsed
+
+
+def check(request, name, rate):
+    """None, если запрос можно пропустить, иначе через сколько секунд
+    повторить."""
+    # Запрос учитывается во всех счётчиках, даже если первый уже полон.
+    waits = [
+        check_key(f'{name}:{key}', rate) for key in client_keys(request)
+    ]
+    return max((wait for wait in waits if wait is not None), default=None)
+
+
+def check_key(key, rate):
+    """Как check, но с готовым ключом вместо клиента запроса."""
+    limit, period = parse_rate(rate)
+    current, previous, weight, left = _hit(key, period, time.time())
+    if previous * weight + current <= limit:
+        return None
+    if current > limit or not previous:
+        return max(1, math.ceil(left))
+    # Ждём, пока вклад прошлого окна не опустится до свободного места.
+    wait = (weight - (limit - current) / previous) * period
+    return max(1, math.ceil(min(wait, left)))
+
+
+def too_many_requests(request, retry_after):
+    response = render(
+        request, 'core/429.html', {'retry_after': retry_after}, status=429
+    )
+    response['Retry-After'] = str(retry_after)
+    return response
+
+
+def limited(request, name, rate, methods):
+    if not settings.RATELIMIT_ENABLED or request.method not in methods:
+        return None
+    retry_after = check(request, name, rate)
+    if retry_after is None:
+        return None
+    return too_many_requests(request, retry_after)
+
+
+def ratelimit(rate=None, methods=None):
+    """Декоратор вью; без rate лимит берётся из RATELIMITS по имени URL."""
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapped(request, *args, **kwargs):
+            name = request.resolver_match.view_name
+            view_rule = (
+                (rate, methods or settings.RATELIMIT_METHODS) if rate
+                else rule(name)
+            )
+            if view_rule:
+                response = limited(request, name, *view_rule)
+                if response is not None:
+                    return response
+            return view_func(request, *args, **kwargs)
+        # Чтобы middleware не посчитало тот же запрос второй раз.
+        wrapped.ratelimited = True
+        return wrapped
+    return decorator
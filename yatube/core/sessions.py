@@ -0,0 +1,33 @@
+"""Сессии в кэше с записью в базу, которые не перезаписываются без
+изменений.
+
+Подключается как SESSION_ENGINE = 'core.sessions'.
+"""
+from django.contrib.sessions.backends import cached_db
+
+KEY_PREFIX = 'core.sessions'
+
+
+class SessionStore(cached_db.SessionStore):
+    cache_key_prefix = KEY_PREFIX
+
+    def _fingerprint(self, data):
+        return self.serializer().dumps(data)
+
+    def load(self):
+        data = super().load()
+        self._loaded = self._fingerprint(data)
+        return data
+
+    def save(self, must_create=False):
+        # Middleware сохраняет сессию при любом присваивании, даже если
+        # значение не поменялось. Такие сохранения в базу не пишем.
+        if (
+            not must_create
+            and self.session_key is not None
+            and getattr(self, '_loaded', None) is not None
+            and self._fingerprint(self._get_session()) == self._loaded
+        ):
+            return
+        super().save(must_create)
+        self._loaded = self._fingerprint(self._session)
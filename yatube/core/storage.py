@@ -0,0 +1,106 @@
+import gzip
+from urllib.parse import urljoin
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage
+from django.core.files.base import ContentFile
+from django.core.files.storage import Storage
+from django.utils import timezone
+from django.utils.deconstruct import deconstructible
+from django.utils.encoding import filepath_to_uri
+
+from core.css import collect_used_classes, prune_css
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = (
+    '.css', '.js', '.svg', '.txt', '.html', '.xml', '.json', '.ico',
+)
+# Сжимать совсем маленькие файлы нет смысла: заголовки дороже выигрыша.
+MIN_COMPRESS_SIZE = 256
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    """Статика с хешами в именах, заранее сжатыми копиями .gz/.br и
+    вычищенным от неиспользуемых правил CSS."""
+
+    def _save(self, name, content):
+        if name in settings.STATIC_PRUNE_CSS:
+            # Классы встречаются и в шаблонах, и в коде тегов и форм.
+            used = collect_used_classes(
+                [settings.BASE_DIR], extensions=('.html', '.py')
+            )
+            used.update(settings.STATIC_PRUNE_SAFELIST)
+            css = content.read().decode('utf-8')
+            content = ContentFile(prune_css(css, used).encode('utf-8'))
+        return super()._save(name, content)
+
+    def post_process(self, paths, dry_run=False, **options):
+        # Хешировать нужно уже вычищенный CSS, а не исходник из finders.
+        for name in settings.STATIC_PRUNE_CSS:
+            if name in paths:
+                paths[name] = (self, name)
+        yield from super().post_process(paths, dry_run, **options)
+        if dry_run:
+            return
+        for hashed_name in set(self.hashed_files.values()):
+            if hashed_name.endswith(COMPRESSIBLE_EXTENSIONS):
+                self.compress(hashed_name)
+
+    def compress(self, name):
+        path = self.path(name)
+        with open(path, 'rb') as source:
+            data = source.read()
+        if len(data) < MIN_COMPRESS_SIZE:
+            return
+        compressed = {'.gz': gzip.compress(data, compresslevel=9)}
+        if brotli is not None:
+            compressed['.br'] = brotli.compress(data)
+        for suffix, payload in compressed.items():
+            if len(payload) >= len(data):
+                continue
+            with open(path + suffix, 'wb') as target:
+                target.write(payload)
+
+
+@deconstructible
+class InMemoryStorage(Storage):
+    """Медиа в памяти процесса - для тестов, чтобы картинки постов и их
+    миниатюры не писались на диск. Файлы общие для всех экземпляров."""
+    files = {}
+
+    def __init__(self, base_url=None):
+        self.base_url = base_url
+
+    def _open(self, name, mode='rb'):
+        if name not in self.files:
+            raise FileNotFoundError(name)
+        return ContentFile(self.files[name][0], name=name)
+
+    def _save(self, name, content):
+        if hasattr(content, 'seek'):
+            content.seek(0)
+        self.files[name] = (b''.join(content.chunks()), timezone.now())
+        return name
+
+    def delete(self, name):
+        self.files.pop(name, None)
+
+    def exists(self, name):
+        return name in self.files
+
+    def size(self, name):
+        return len(self.files[name][0])
+
+    def url(self, name):
+        return urljoin(
+            self.base_url or settings.MEDIA_URL, filepath_to_uri(name)
+        )
+
+    def get_modified_time(self, name):
+        return self.files[name][1]
+
+    get_created_time = get_accessed_time = get_modified_time
@@ -0,0 +1,69 @@
+"""Замер времени рендеринга шаблонов и вложенных include в рамках запроса."""
+import threading
+import time
+from collections import OrderedDict
+
+from django.template.base import Template
+
+_local = threading.local()
+_original_render = Template.render
+
+
+class TemplateStats:
+    __slots__ = ('calls', 'total', 'own')
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.own = 0.0
+
+
+def start():
+    _local.stats = OrderedDict()
+    _local.stack = []
+
+
+def stop():
+    stats = getattr(_local, 'stats', None)
+    _local.stats = None
+    _local.stack = []
+    return stats or {}
+
+
+def _profiled_render(self, context):
+    stats = getattr(_local, 'stats', None)
+    if stats is None:
+        return _original_render(self, context)
+    name = self.origin.template_name or self.origin.name
+    _local.stack.append(0.0)
+    started = time.perf_counter()
+    try:
+        return _original_render(self, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        children = _local.stack.pop()
+        if _local.stack:
+            _local.stack[-1] += elapsed
+        record = stats.setdefault(name, TemplateStats())
+        record.calls += 1
+        record.total += elapsed
+        record.own += elapsed - children
+
+
+def install():
+    Template.render = _profiled_render
+
+
+def report(stats):
+    """Текстовая таблица: вызовы, полное и собственное время, среднее."""
+    lines = [
+        f'{"шаблон":<45} {"вызовов":>7} {"всего, мс":>10} '
+        f'{"своё, мс":>9} {"на вызов":>9}'
+    ]
+    for name, record in stats.items():
+        lines.append(
+            f'{name:<45} {record.calls:>7} {record.total * 1000:>10.2f} '
+            f'{record.own * 1000:>9.2f} '
+            f'{record.total * 1000 / record.calls:>9.3f}'
+        )
+    return '\n'.join(lines)
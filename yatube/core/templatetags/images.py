@@ -0,0 +1,15 @@
+from django import template
+from django.conf import settings
+
+from core.images import get_variants
+
+register = template.Library()
+
+
+@register.inclusion_tag('includes/responsive_image.html')
+def responsive_image(image, sizes=None, css_class='card-img my-2'):
+    return {
+        'variants': get_variants(image),
+        'sizes': sizes or settings.POST_IMAGE_SIZES,
+        'css_class': css_class,
+    }
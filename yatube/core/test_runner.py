@@ -0,0 +1,91 @@
+"""Тестовый раннер: параллельный запуск и отчёт о самых медленных тестах.
+
+По умолчанию тесты идут в стольких процессах, сколько ядер, у каждого
+процесса своя копия тестовой базы. Число процессов задаёт переменная
+DJANGO_TEST_PROCESSES или флаг --parallel. Время теста меряется там, где
+он выполнялся, и передаётся в основной процесс вместе с результатом.
+"""
+import time
+import unittest
+
+from django.conf import settings
+from django.test.runner import (
+    DiscoverRunner, ParallelTestSuite, RemoteTestResult, RemoteTestRunner,
+    default_test_processes,
+)
+
+
+class TimedRemoteTestResult(RemoteTestResult):
+    def startTest(self, test):
+        super().startTest(test)
+        self.started = time.perf_counter()
+
+    def stopTest(self, test):
+        self.events.append(
+            ('addDuration', self.test_index,
+             time.perf_counter() - self.started)
+        )
+        super().stopTest(test)
+
+
+class TimedRemoteTestRunner(RemoteTestRunner):
+    resultclass = TimedRemoteTestResult
+
+
+class TimedParallelTestSuite(ParallelTestSuite):
+    runner_class = TimedRemoteTestRunner
+
+
+class TimedTextTestResult(unittest.TextTestResult):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.durations = {}
+
+    def startTest(self, test):
+        super().startTest(test)
+        self.started = time.perf_counter()
+
+    def addDuration(self, test, elapsed):
+        self.durations[test.id()] = elapsed
+
+    def stopTest(self, test):
+        # В параллельном режиме время уже пришло из дочернего процесса.
+        self.durations.setdefault(
+            test.id(), time.perf_counter() - self.started
+        )
+        super().stopTest(test)
+
+
+class TimedTextTestRunner(unittest.TextTestRunner):
+    resultclass = TimedTextTestResult
+
+    def run(self, test):
+        result = super().run(test)
+        slowest = sorted(
+            result.durations.items(), key=lambda item: item[1], reverse=True
+        )[:settings.TEST_SLOWEST_COUNT]
+        if slowest:
+            self.stream.writeln('Самые медленные тесты:')
+            for name, elapsed in slowest:
+                self.stream.writeln(f'{elapsed:8.3f} с  {name}')
+        return result
+
+
+class TestRunner(DiscoverRunner):
+    # Модуль подходит под python_files pytest, но тестов здесь нет.
+    __test__ = False
+    parallel_test_suite = TimedParallelTestSuite
+    test_runner = TimedTextTestRunner
+
+    def __init__(self, parallel=None, **kwargs):
+        # --parallel без значения и так даёт default_test_processes();
+        # здесь то же самое становится поведением по умолчанию, а явный
+        # --parallel 1 запускает тесты в одном процессе.
+        if parallel is None:
+            parallel = default_test_processes()
+        super().__init__(parallel=parallel, **kwargs)
+
+    @classmethod
+    def add_arguments(cls, parser):
+        super().add_arguments(parser)
+        parser.set_defaults(parallel=None)
@@ -1,5 +1,50 @@
+import argparse
+import asyncio
+import gzip
+import os
+import threading
+import shutil
+import tempfile
+from datetime import timedelta
 from http import HTTPStatus
-from django.test import TestCase
+from io import StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.sessions.models import Session
+from django.core import mail
+from django.core.cache import cache
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from core import jobs, outbox, ratelimit, template_profiling
+from core.admin import EstimatedCountPaginator
+from core.asgi import WsgiToAsgi
+from core.checks import check_performance_settings
+from core.concurrency import gather
+from core.css import prune_css
+from core.images import get_variants
+from core.models import Job, OutboxMessage
+from core.sessions import SessionStore
+from core.test_runner import TestRunner
+from core.views import serve_static
+from posts.models import Group, Post
+
+User = get_user_model()
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x01\x00'
+    b'\x01\x00\x00\x00\x00\x21\xf9\x04'
+    b'\x01\x0a\x00\x01\x00\x2c\x00\x00'
+    b'\x00\x00\x01\x00\x01\x00\x00\x02'
+    b'\x02\x4c\x01\x00\x3b'
+)
 
 
 class ViewTestClass(TestCase):
@@ -7,3 +52,504 @@ class ViewTestClass(TestCase):
         response = self.client.get('/nonexist-page/')
         self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
         self.assertTemplateUsed(response, 'core/404.html')
+
+
+class ResponsiveImageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='test_usr')
+        cls.post = Post.objects.create(
+            author=cls.user,
+            text='Тестовый текст поста',
+            image=SimpleUploadedFile(
+                name='small.gif',
+                content=SMALL_GIF,
+                content_type='image/gif',
+            ),
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_variants_cover_all_widths(self):
+        """Для картинки нарезаются все ширины из настроек."""
+        variants = get_variants(self.post.image)
+        for width in settings.POST_IMAGE_WIDTHS:
+            with self.subTest(width=width):
+                self.assertIn(f'{width}w', variants['srcsets']['jpeg'])
+        self.assertEqual(variants['width'], max(settings.POST_IMAGE_WIDTHS))
+
+    def test_variants_metadata_is_cached(self):
+        """Повторный запрос вариантов не обращается к sorl."""
+        get_variants(self.post.image)
+        with mock.patch('core.images.get_thumbnail') as get_thumbnail:
+            get_variants(self.post.image)
+        get_thumbnail.assert_not_called()
+
+    def test_feed_renders_srcset(self):
+        """Лента отдаёт картинки с srcset, sizes и ленивой загрузкой."""
+        response = self.client.get(reverse('posts:index'))
+        content = response.content.decode()
+        self.assertIn('srcset=', content)
+        self.assertIn('sizes=', content)
+        self.assertIn('loading="lazy"', content)
+
+
+class PruneCssTests(SimpleTestCase):
+    def test_unused_rules_are_removed(self):
+        """Из CSS уходят правила с неиспользуемыми классами."""
+        css = (
+            '/*! license */.btn{a:1}.unused{b:2}.btn,.unused .x{c:3}'
+            '@media (min-width:1px){.unused{d:4}.btn:not(.other){e:5}}'
+            '@font-face{font-family:x}body{f:6}'
+        )
+        self.assertEqual(
+            prune_css(css, {'btn'}),
+            '/*! license */.btn{a:1}.btn{c:3}'
+            '@media (min-width:1px){.btn:not(.other){e:5}}'
+            '@font-face{font-family:x}body{f:6}',
+        )
+
+
+class ServeStaticTests(SimpleTestCase):
+    hashed_name = 'css/site.0123456789ab.css'
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.static_root = tempfile.mkdtemp()
+        path = os.path.join(cls.static_root, cls.hashed_name)
+        os.makedirs(os.path.dirname(path))
+        with open(path, 'w') as css:
+            css.write('body{}' * 100)
+        with open(path + '.gz', 'wb') as css:
+            css.write(gzip.compress(b'body{}' * 100))
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(cls.static_root, ignore_errors=True)
+
+    def get(self, path, **headers):
+        with override_settings(STATIC_ROOT=self.static_root):
+            request = RequestFactory().get(f'/static/{path}', **headers)
+            return serve_static(request, path)
+
+    def test_hashed_file_is_immutable(self):
+        """Файлы с хешем в имени кэшируются навсегда."""
+        response = self.get(self.hashed_name)
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertNotIn('Content-Encoding', response)
+
+    def test_precompressed_copy_is_served(self):
+        """Клиенту с поддержкой gzip отдаётся готовая сжатая копия."""
+        response = self.get(self.hashed_name, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css')
+        self.assertIn('Accept-Encoding', response['Vary'])
+
+
+class TemplateProfilingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username='test_usr')
+        Post.objects.bulk_create(
+            Post(author=user, text=f'Пост {i}') for i in range(3)
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    @override_settings(TEMPLATE_PROFILING=True)
+    def test_feed_rows_are_reported(self):
+        """В режиме профилирования каждая строка ленты попадает в отчёт."""
+        with self.assertLogs('core.template_profiling') as logs:
+            response = self.client.get(reverse('posts:index'))
+        self.assertIn(
+            'posts/includes/post_list.html', response['Server-Timing']
+        )
+        self.assertRegex(logs.output[0], r'posts/includes/post_list\.html +3 ')
+
+    def test_profiling_is_off_by_default(self):
+        """Без настройки заголовок Server-Timing не добавляется."""
+        response = self.client.get(reverse('posts:index'))
+        self.assertNotIn('Server-Timing', response)
+
+    def test_report_counts_nested_renders(self):
+        """Собственное время шаблона не включает вложенные."""
+        stats = {'page.html': template_profiling.TemplateStats()}
+        stats['page.html'].calls = 2
+        stats['page.html'].total = 0.004
+        stats['page.html'].own = 0.001
+        self.assertRegex(
+            template_profiling.report(stats),
+            r'page\.html +2 +4\.00 +1\.00 +2\.000',
+        )
+
+
+class PerformanceChecksTests(SimpleTestCase):
+    def check_ids(self):
+        return {error.id for error in check_performance_settings(None)}
+
+    def test_dev_profile_is_not_checked(self):
+        """Окружение разработки проверками не трогаем."""
+        with override_settings(DJANGO_ENV='dev', DEBUG=True):
+            self.assertEqual(self.check_ids(), set())
+
+    def test_prod_profile_flags_hostile_settings(self):
+        """Настройки разработки в бою дают предупреждения."""
+        with override_settings(DJANGO_ENV='prod', DEBUG=True):
+            self.assertEqual(self.check_ids(), {
+                'performance.W001',
+                'performance.W002',
+                'performance.W003',
+                'performance.W004',
+            })
+
+    def test_ratelimit_needs_atomic_cache(self):
+        """Лимиты на кэше без атомарного incr дают предупреждение."""
+        with override_settings(DJANGO_ENV='prod', RATELIMIT_ENABLED=True):
+            self.assertIn('performance.W007', self.check_ids())
+
+
+class TestRunnerTests(SimpleTestCase):
+    def parallel(self, *args):
+        parser = argparse.ArgumentParser()
+        TestRunner.add_arguments(parser)
+        options = parser.parse_args(args)
+        return TestRunner(parallel=options.parallel).parallel
+
+    @mock.patch('core.test_runner.default_test_processes', return_value=4)
+    def test_parallel_defaults_to_cpu_count(self, default_test_processes):
+        self.assertEqual(self.parallel(), 4)
+
+    def test_explicit_parallel_one_runs_serially(self):
+        self.assertEqual(self.parallel('--parallel', '1'), 1)
+
+
+class SessionStoreTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        session = SessionStore()
+        session['key'] = 'value'
+        session.save()
+        self.session_key = session.session_key
+
+    def test_unchanged_session_is_not_rewritten(self):
+        """Сессия без изменений не пишется в базу повторно."""
+        session = SessionStore(self.session_key)
+        session['key'] = 'value'
+        with self.assertNumQueries(0):
+            session.save()
+
+    def test_changed_session_is_written_through(self):
+        """Изменённая сессия попадает и в базу, и в кэш."""
+        session = SessionStore(self.session_key)
+        session['key'] = 'other'
+        session.save()
+        cache.clear()
+        self.assertEqual(SessionStore(self.session_key)['key'], 'other')
+
+
+class PurgeSessionsTests(TestCase):
+    def test_expired_sessions_are_purged_in_batches(self):
+        """Команда удаляет только просроченные сессии."""
+        now = timezone.now()
+        Session.objects.bulk_create(
+            Session(
+                session_key=f'key{i}',
+                session_data='',
+                expire_date=now + timedelta(days=1 if i % 2 else -1),
+            )
+            for i in range(10)
+        )
+        call_command('purge_sessions', batch_size=2, stdout=StringIO())
+        self.assertEqual(Session.objects.count(), 5)
+        self.assertFalse(
+            Session.objects.filter(expire_date__lt=now).exists()
+        )
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(username='author')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        for i in range(5):
+            Post.objects.create(author=author, text=f'Пост {i}')
+        Post.objects.create(author=author, text='В группе', group=cls.group)
+
+    def test_unfiltered_count_comes_from_table_statistics(self):
+        Post.objects.filter(text='Пост 0').delete()
+        paginator = EstimatedCountPaginator(Post.objects.all(), 10)
+        self.assertGreaterEqual(paginator.count, 5)
+
+    @override_settings(ADMIN_COUNT_LIMIT=3)
+    def test_filtered_count_is_capped(self):
+        paginator = EstimatedCountPaginator(
+            Post.objects.filter(group__isnull=True), 10
+        )
+        self.assertEqual(paginator.count, 3)
+        paginator = EstimatedCountPaginator(
+            Post.objects.filter(group=self.group), 10
+        )
+        self.assertEqual(paginator.count, 1)
+
+
+class JobsTests(TestCase):
+    def setUp(self):
+        self.seen = []
+
+        def collect(pks, fail_on=None):
+            if fail_on in pks:
+                raise ValueError(fail_on)
+            self.seen.extend(pks)
+
+        jobs.HANDLERS['test.collect'] = collect
+        self.addCleanup(jobs.HANDLERS.pop, 'test.collect')
+
+    def test_job_is_processed_in_batches(self):
+        job = jobs.enqueue('test.collect', [3, 1, 2], 'Тест')
+        job = jobs.run(jobs.claim(), batch_size=2)
+        self.assertEqual(self.seen, [1, 2, 3])
+        self.assertEqual((job.status, job.position), (Job.DONE, 3))
+        self.assertIsNone(jobs.claim())
+
+    def test_failed_batch_keeps_progress(self):
+        jobs.enqueue('test.collect', [1, 2, 3, 4], 'Тест', fail_on=3)
+        with self.assertLogs('core.jobs', 'ERROR'):
+            job = jobs.run(jobs.claim(), batch_size=2)
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertEqual(job.position, 2)
+        self.assertEqual(self.seen, [1, 2])
+
+    def test_stale_running_job_is_reclaimed(self):
+        job = jobs.enqueue('test.collect', [1], 'Тест')
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.RUNNING,
+            updated=timezone.now() - timedelta(hours=1),
+        )
+        self.assertEqual(jobs.claim(), job)
+
+
+class FlakyEmailBackend(EmailBackend):
+    """Почта, которая не принимает письма с темой из fail_subjects."""
+    opened = 0
+    fail_subjects = set()
+
+    def open(self):
+        FlakyEmailBackend.opened += 1
+        return True
+
+    def send_messages(self, messages):
+        for message in messages:
+            if message.subject in self.fail_subjects:
+                raise ConnectionError(message.subject)
+        return super().send_messages(messages)
+
+
+@override_settings(
+    EMAIL_BACKEND='core.outbox.EmailBackend',
+    OUTBOX_EMAIL_BACKEND='core.tests.FlakyEmailBackend',
+    OUTBOX_MAX_ATTEMPTS=2,
+)
+class OutboxTests(TestCase):
+    def setUp(self):
+        FlakyEmailBackend.opened = 0
+        FlakyEmailBackend.fail_subjects = set()
+
+    def test_password_reset_only_enqueues(self):
+        User.objects.create_user(
+            username='user', email='user@yatube.ru', password='secret'
+        )
+        self.client.post(
+            reverse('users:password_reset'), {'email': 'user@yatube.ru'}
+        )
+        self.assertEqual(mail.outbox, [])
+        message = OutboxMessage.objects.get()
+        self.assertEqual(message.recipients, 'user@yatube.ru')
+        call_command('send_outbox', '--once', stdout=StringIO())
+        self.assertEqual(mail.outbox[0].to, ['user@yatube.ru'])
+        self.assertIn('/reset/', mail.outbox[0].body)
+        message.refresh_from_db()
+        self.assertEqual(message.status, OutboxMessage.SENT)
+
+    def test_batch_uses_one_connection(self):
+        for i in range(5):
+            mail.send_mail(f'Письмо {i}', 'Текст', None, ['to@yatube.ru'])
+        self.assertEqual(outbox.send_batch(batch_size=3), (3, 0))
+        self.assertEqual(outbox.send_batch(batch_size=3), (2, 0))
+        self.assertEqual(FlakyEmailBackend.opened, 2)
+        self.assertEqual(
+            [message.subject for message in mail.outbox],
+            [f'Письмо {i}' for i in range(5)],
+        )
+
+    def test_failed_message_is_retried_then_given_up(self):
+        FlakyEmailBackend.fail_subjects = {'Плохое'}
+        mail.send_mail('Плохое', 'Текст', None, ['to@yatube.ru'])
+        mail.send_mail('Хорошее', 'Текст', None, ['to@yatube.ru'])
+        self.assertEqual(outbox.send_batch(), (1, 1))
+        failed = OutboxMessage.objects.get(subject='Плохое')
+        self.assertEqual(failed.status, OutboxMessage.PENDING)
+        self.assertGreater(failed.next_attempt, timezone.now())
+        # Пока не пришло время, письмо не берётся.
+        self.assertEqual(outbox.send_batch(), (0, 0))
+        OutboxMessage.objects.update(next_attempt=timezone.now())
+        self.assertEqual(outbox.send_batch(), (0, 1))
+        failed.refresh_from_db()
+        self.assertEqual(failed.status, OutboxMessage.FAILED)
+        self.assertIn('Плохое', failed.error)
+
+    def test_stale_claim_is_reclaimed(self):
+        mail.send_mail('Письмо', 'Текст', None, ['to@yatube.ru'])
+        OutboxMessage.objects.update(
+            status=OutboxMessage.SENDING,
+            claimed=timezone.now() - timedelta(hours=1),
+        )
+        self.assertEqual(outbox.send_batch(), (1, 0))
+
+
+@override_settings(
+    RATELIMIT_ENABLED=True,
+    RATELIMITS={
+        'posts:post_create': '2/m',
+        'posts:profile_follow': ('1/m', ('GET',)),
+        'posts:follow_batch': '2/m',
+        'users:signup': '1/h',
+    },
+)
+class RateLimitTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='writer')
+        cls.author = User.objects.create_user(username='author')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def create_post(self, client=None):
+        return (client or self.client).post(
+            reverse('posts:post_create'), {'text': 'Пост'}
+        )
+
+    def test_limit_is_per_user(self):
+        self.assertEqual(self.create_post().status_code, 302)
+        self.assertEqual(self.create_post().status_code, 302)
+        response = self.create_post()
+        self.assertEqual(response.status_code, 429)
+        self.assertGreater(int(response['Retry-After']), 0)
+        self.assertEqual(Post.objects.count(), 2)
+        other = self.client_class(REMOTE_ADDR='10.0.0.2')
+        other.force_login(self.author)
+        self.assertEqual(self.create_post(other).status_code, 302)
+
+    def test_limit_is_per_ip_for_users_too(self):
+        """Второй аккаунт с того же адреса не получает новый лимит."""
+        self.create_post()
+        self.create_post()
+        other = self.client_class()
+        other.force_login(self.author)
+        self.assertEqual(self.create_post(other).status_code, 429)
+
+    def test_only_configured_methods_are_counted(self):
+        url = reverse('posts:post_create')
+        for _ in range(3):
+            self.assertEqual(self.client.get(url).status_code, 200)
+        url = reverse('posts:profile_follow', args=['author'])
+        self.assertEqual(self.client.get(url).status_code, 302)
+        self.assertEqual(self.client.get(url).status_code, 429)
+
+    def test_anonymous_clients_are_limited_by_ip(self):
+        self.client.logout()
+        url = reverse('users:signup')
+        self.assertEqual(self.client.post(url, {}).status_code, 200)
+        self.assertEqual(self.client.post(url, {}).status_code, 429)
+        response = self.client.post(url, {}, REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(response.status_code, 200)
+
+    def test_decorated_view_is_counted_once(self):
+        url = reverse('posts:follow_batch')
+        data = {'usernames': 'author', 'action': 'follow'}
+        self.assertEqual(self.client.post(url, data).status_code, 200)
+        self.assertEqual(self.client.post(url, data).status_code, 200)
+        self.assertEqual(self.client.post(url, data).status_code, 429)
+
+    def test_previous_window_decays(self):
+        request = RequestFactory().post('/')
+        request.user = self.user
+        with mock.patch('core.ratelimit.time.time', return_value=6000.0):
+            for _ in range(2):
+                self.assertIsNone(ratelimit.check(request, 'x', '2/m'))
+        # Через три четверти окна от прошлых двух запросов остаётся
+        # половина: один запрос проходит, следующий ждёт.
+        with mock.patch('core.ratelimit.time.time', return_value=6105.0):
+            self.assertIsNone(ratelimit.check(request, 'x', '2/m'))
+            self.assertEqual(ratelimit.check(request, 'x', '2/m'), 15)
+
+
+def echo_application(environ, start_response):
+    start_response('201 Created', [('Content-Type', 'text/plain')])
+    # По WSGI путь - байты в latin-1.
+    path = environ['PATH_INFO'].encode('latin-1').decode()
+    yield f'{environ["REQUEST_METHOD"]} {path}'.encode()
+    yield f' {environ["QUERY_STRING"]} {environ["HTTP_X_TEST"]} '.encode()
+    yield environ['wsgi.input'].read()
+
+
+class AsgiTests(SimpleTestCase):
+    def request(self, scope, chunks):
+        application = WsgiToAsgi(echo_application, threads=2)
+        messages = [
+            {'type': 'http.request', 'body': chunk, 'more_body': True}
+            for chunk in chunks[:-1]
+        ] + [{'type': 'http.request', 'body': chunks[-1]}]
+        sent = []
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        asyncio.run(application(scope, receive, send))
+        application.executor.shutdown()
+        return sent
+
+    def test_wsgi_response_is_streamed(self):
+        """Запрос доходит до WSGI целиком, ответ уходит кусками."""
+        sent = self.request({
+            'type': 'http',
+            'method': 'POST',
+            'path': '/группа/',
+            'query_string': b'page=2',
+            'headers': [(b'x-test', b'yes')],
+        }, [b'a=', b'1'])
+        self.assertEqual(sent[0]['type'], 'http.response.start')
+        self.assertEqual(sent[0]['status'], 201)
+        self.assertIn((b'content-type', b'text/plain'), sent[0]['headers'])
+        self.assertEqual(len(sent), 5)
+        self.assertEqual(
+            b''.join(message['body'] for message in sent[1:]),
+            'POST /группа/ page=2 yes a=1'.encode(),
+        )
+        self.assertFalse(sent[-1].get('more_body'))
+
+
+class GatherTests(SimpleTestCase):
+    def test_sequential_by_default(self):
+        """Без VIEW_FETCH_THREADS всё выполняется в потоке запроса."""
+        threads = gather(threading.get_ident, threading.get_ident)
+        self.assertEqual(set(threads), {threading.get_ident()})
+
+    @override_settings(VIEW_FETCH_THREADS=2)
+    def test_results_keep_order(self):
+        """Результаты идут в порядке функций, исключение пробрасывается."""
+        self.assertEqual(
+            gather(lambda: 1, lambda: 2, lambda: 3), [1, 2, 3]
+        )
+        threads = gather(threading.get_ident, threading.get_ident)
+        self.assertNotEqual(threads[0], threads[1])
+        with self.assertRaises(ZeroDivisionError):
+            gather(lambda: 1, lambda: 1 / 0)
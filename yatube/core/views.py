@@ -1,4 +1,17 @@
+import mimetypes
+import os
+import re
+
+from django.conf import settings
 from django.shortcuts import render
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.static import serve
+
+# Имена вида bootstrap.min.1a2b3c4d5e6f.css выдаёт ManifestStaticFilesStorage.
+HASHED_NAME_RE = re.compile(r'\.[0-9a-f]{12}\.\w+$')
+PRECOMPRESSED = (('br', '.br'), ('gzip', '.gz'))
+YEAR = 60 * 60 * 24 * 365
 
 
 def page_not_found(request, exception):
@@ -19,3 +32,35 @@ def permission_denied(request, exception):
 
 def csrf_failure(request, reason=''):
     return render(request, 'core/403csrf.html')
+
+
+def serve_static(request, path):
+    """Отдаёт собранную статику: сжатую копию, если клиент её принимает,
+    и с вечным кэшем для файлов с хешем в имени."""
+    accepted = request.META.get('HTTP_ACCEPT_ENCODING', '')
+    encoding = None
+    for name, suffix in PRECOMPRESSED:
+        if name in accepted and os.path.isfile(
+            safe_join(settings.STATIC_ROOT, path + suffix)
+        ):
+            encoding = name
+            break
+    if encoding:
+        response = serve(
+            request, path + suffix, document_root=settings.STATIC_ROOT
+        )
+        content_type, _ = mimetypes.guess_type(path)
+        response['Content-Type'] = (
+            content_type or 'application/octet-stream'
+        )
+        response['Content-Encoding'] = encoding
+    else:
+        response = serve(request, path, document_root=settings.STATIC_ROOT)
+    patch_vary_headers(response, ('Accept-Encoding',))
+    if HASHED_NAME_RE.search(path):
+        patch_cache_control(
+            response, public=True, max_age=YEAR, immutable=True
+        )
+    else:
+        patch_cache_control(response, public=True, max_age=60)
+    return response
@@ -1,8 +1,57 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin.helpers import ActionForm
+from django.core.exceptions import ValidationError
+
+from core.admin import LargeTableAdmin
+from . import jobs
 from .models import Post, Group, Follow
 
 
-class PostAdmin(admin.ModelAdmin):
+class GroupActionForm(ActionForm):
+    group = forms.ModelChoiceField(
+        Group.objects.all(),
+        required=False,
+        label='Группа',
+        help_text='Куда перенести посты',
+    )
+
+
+class PostActionsMixin:
+    """Массовые действия над постами, выполняемые в фоне."""
+    action_form = GroupActionForm
+
+    def target_group(self, request):
+        field = self.action_form.base_fields['group']
+        try:
+            group = field.clean(request.POST.get('group'))
+        except ValidationError:
+            group = None
+        if group is not None:
+            return group
+        self.message_user(
+            request, 'Выберите группу для переноса.', messages.ERROR
+        )
+        return None
+
+    def enqueue_move(self, request, posts):
+        group = self.target_group(request)
+        if group is not None:
+            self.enqueue_job(
+                request, jobs.MOVE_TO_GROUP,
+                posts.values_list('pk', flat=True),
+                f'Перенос постов в группу «{group}»',
+                group_id=group.pk,
+            )
+
+    def enqueue_delete(self, request, posts, description):
+        self.enqueue_job(
+            request, jobs.DELETE_POSTS,
+            posts.values_list('pk', flat=True), description,
+        )
+
+
+class PostAdmin(PostActionsMixin, LargeTableAdmin):
     list_display = (
         'pk',
         'text',
@@ -11,24 +60,76 @@ class PostAdmin(admin.ModelAdmin):
         'group',
     )
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
+    raw_id_fields = ('author', 'group')
     search_fields = ('text',)
     list_filter = ('pub_date',)
+    date_hierarchy = 'pub_date'
     empty_value_display = '-пусто-'
+    actions = ('move_to_group', 'delete_in_background')
 
+    def get_search_results(self, request, queryset, search_term):
+        # Поиск по номеру поста и по @логину автора идёт по индексам,
+        # остальное - обычный поиск по тексту.
+        term = search_term.strip()
+        if term.isdigit():
+            return queryset.filter(pk=term), False
+        if term.startswith('@') and len(term) > 1:
+            return queryset.filter(author__username=term[1:]), False
+        return super().get_search_results(request, queryset, search_term)
 
-class GroupAdmin(admin.ModelAdmin):
+    def move_to_group(self, request, queryset):
+        self.enqueue_move(request, queryset)
+    move_to_group.short_description = 'Перенести в группу (в фоне)'
+
+    def delete_in_background(self, request, queryset):
+        self.enqueue_delete(
+            request, queryset, 'Удаление постов и комментариев к ним'
+        )
+    delete_in_background.short_description = (
+        'Удалить с комментариями (в фоне)'
+    )
+
+
+class GroupAdmin(PostActionsMixin, LargeTableAdmin):
     list_display = (
         'pk',
         'title',
         'description',
+        'posts_count',
     )
+    list_select_related = ('stats',)
     search_fields = ('title',)
+    actions = ('move_posts', 'delete_posts')
 
+    def posts_count(self, group):
+        stats = getattr(group, 'stats', None)
+        return stats.posts_count if stats else 0
+    posts_count.short_description = 'Постов'
 
-class FollowAdmin(admin.ModelAdmin):
+    def move_posts(self, request, queryset):
+        self.enqueue_move(request, Post.objects.filter(group__in=queryset))
+    move_posts.short_description = 'Перенести посты в другую группу (в фоне)'
+
+    def delete_posts(self, request, queryset):
+        self.enqueue_delete(
+            request, Post.objects.filter(group__in=queryset),
+            'Удаление постов групп: '
+            + ', '.join(group.title for group in queryset[:5]),
+        )
+    delete_posts.short_description = 'Удалить все посты групп (в фоне)'
+
+
+class FollowAdmin(LargeTableAdmin):
     list_display = (
         'user',
+        'author',
+        'created',
     )
+    list_select_related = ('user', 'author')
+    raw_id_fields = ('user', 'author')
+    search_fields = ('=user__username', '=author__username')
+    date_hierarchy = 'created'
 
 
 admin.site.register(Post, PostAdmin)
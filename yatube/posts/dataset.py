@@ -0,0 +1,360 @@
+"""Синтетические данные в масштабе боевой базы для локальной работы.
+
+Распределения похожи на настоящие. Популярность авторов убывает по
+закону Ципфа, поэтому число подписчиков распределено степенным образом,
+а число подписок и комментариев имеет тяжёлый хвост Парето. Посты идут
+сериями: автор пишет несколько штук подряд с короткими паузами. Картинки
+берутся из небольшого набора.
+
+Строки генерируются кусками по CHUNK_SIZE в пуле процессов. У каждого
+куска свой генератор случайных чисел от (seed, этап, номер куска),
+поэтому результат не зависит от числа процессов. В базу пишет только
+основной процесс: сырым INSERT через executemany, по транзакции на
+кусок. Сигналы при этом не срабатывают, поэтому статистика групп и
+буфер свежих постов обновляются в конце.
+"""
+import io
+import random
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone as dt_timezone
+from itertools import accumulate
+from multiprocessing import get_context
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import Max
+from PIL import Image, ImageDraw
+
+from . import group_stats, hot_list
+from .models import Comment, Follow, Group, Post, User
+
+CHUNK_SIZE = 10000
+# Способ запуска процессов пула; None - принятый на платформе. На macOS и
+# Windows это spawn: процесс импортирует модуль заново, и Django в нём
+# настраивает инициализатор пула.
+START_METHOD = None
+# Момент, которым заканчиваются данные, если не задан другой: с
+# фиксированным концом один seed всегда даёт одни и те же строки.
+END = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+# Показатели степенных законов: популярность авторов и групп по Ципфу,
+# хвосты числа подписок и комментариев по Парето.
+AUTHOR_EXPONENT = 1.1
+GROUP_EXPONENT = 1.0
+PARETO_ALPHA = 1.5
+# Серии постов: средняя длина и средняя пауза между постами в секундах.
+BURST_SIZE = 4
+BURST_GAP = 20 * 60
+# Среднее время до комментария после публикации, в секундах.
+COMMENT_DELAY = 3 * 60 * 60
+GROUP_SHARE = 0.7
+IMAGE_SHARE = 0.2
+IMAGE_SIZE = (640, 400)
+WORDS = (
+    'сегодня вчера город утро вечер дорога море лес река книга музыка '
+    'фильм кофе друг работа отпуск поезд дом окно снег дождь солнце '
+    'новый старый хороший долгий тихий большой маленький интересный '
+    'думаю помню видел читал слушал пишу хочу люблю нашёл понял '
+    'очень снова почему наконец кажется просто опять совсем вместе'
+).split()
+
+Plan = namedtuple('Plan', (
+    'seed', 'prefix', 'password', 'users', 'first_user', 'groups',
+    'first_group', 'posts', 'first_post', 'follows_per_user',
+    'comments_per_post', 'images', 'start', 'span',
+))
+
+_weights = {}
+
+
+def _rng(plan, stage, chunk):
+    # Строковое зерно хешируется одинаково в любом процессе.
+    return random.Random(f'{plan.seed}:{stage}:{chunk}')
+
+
+def _zipf(count, exponent):
+    """Накопленные веса рангов 0..count-1 для random.choices."""
+    key = (count, exponent)
+    if key not in _weights:
+        _weights[key] = list(accumulate(
+            1 / (rank + 1) ** exponent for rank in range(count)
+        ))
+    return _weights[key]
+
+
+def _heavy_tail(rng, mean, limit):
+    """Целое с тяжёлым хвостом, средним около mean и не больше limit."""
+    value = mean * (PARETO_ALPHA - 1) * (rng.paretovariate(PARETO_ALPHA) - 1)
+    return min(int(value + rng.random()), limit)
+
+
+def _text(rng):
+    length = max(3, int(rng.lognormvariate(3, 0.8)))
+    return ' '.join(rng.choices(WORDS, k=length)).capitalize() + '.'
+
+
+def _moment(plan, offset):
+    return plan.start + timedelta(seconds=min(offset, plan.span))
+
+
+def _chunks(total):
+    return range((total + CHUNK_SIZE - 1) // CHUNK_SIZE)
+
+
+def _run(task):
+    func, plan, chunk = task
+    return func(plan, chunk)
+
+
+def group_chunk(plan, chunk):
+    rng = _rng(plan, 'groups', chunk)
+    rows = []
+    for index in range(
+        chunk * CHUNK_SIZE, min((chunk + 1) * CHUNK_SIZE, plan.groups)
+    ):
+        pk = plan.first_group + index
+        rows.append((pk, f'Группа {pk}', f'group-{pk}', _text(rng)))
+    return rows
+
+
+def user_chunk(plan, chunk):
+    rng = _rng(plan, 'users', chunk)
+    rows = []
+    for index in range(
+        chunk * CHUNK_SIZE, min((chunk + 1) * CHUNK_SIZE, plan.users)
+    ):
+        pk = plan.first_user + index
+        username = f'{plan.prefix}{pk}'
+        # Все успели зарегистрироваться за год до первых постов.
+        joined = _moment(plan, 0) - timedelta(
+            seconds=rng.random() * 365 * 24 * 60 * 60
+        )
+        rows.append((
+            pk, username, plan.password, '', '', f'{username}@example.com',
+            False, False, True, joined,
+        ))
+    return rows
+
+
+def follow_chunk(plan, chunk):
+    rng = _rng(plan, 'follows', chunk)
+    weights = _zipf(plan.users, AUTHOR_EXPONENT)
+    rows = []
+    for index in range(
+        chunk * CHUNK_SIZE, min((chunk + 1) * CHUNK_SIZE, plan.users)
+    ):
+        wanted = _heavy_tail(rng, plan.follows_per_user, plan.users - 1)
+        authors = set()
+        # Популярных авторов выбирают часто, так что повторы неизбежны.
+        for _ in range(wanted * 3):
+            if len(authors) >= wanted:
+                break
+            author = rng.choices(range(plan.users), cum_weights=weights)[0]
+            if author != index:
+                authors.add(author)
+        for author in sorted(authors):
+            rows.append((
+                plan.first_user + index,
+                plan.first_user + author,
+                _moment(plan, rng.random() * plan.span),
+            ))
+    return rows
+
+
+def post_chunk(plan, chunk):
+    """Посты куска и комментарии к ним."""
+    rng = _rng(plan, 'posts', chunk)
+    authors = _zipf(plan.users, AUTHOR_EXPONENT)
+    groups = _zipf(plan.groups, GROUP_EXPONENT) if plan.groups else None
+    first = chunk * CHUNK_SIZE
+    last = min((chunk + 1) * CHUNK_SIZE, plan.posts)
+    posts, comments = [], []
+    index = first
+    while index < last:
+        author = plan.first_user + rng.choices(
+            range(plan.users), cum_weights=authors
+        )[0]
+        offset = rng.random() * plan.span
+        burst = 1 + int(rng.expovariate(1 / (BURST_SIZE - 1)))
+        for _ in range(min(burst, last - index)):
+            offset += rng.expovariate(1 / BURST_GAP)
+            group = None
+            if groups and rng.random() < GROUP_SHARE:
+                group = plan.first_group + rng.choices(
+                    range(plan.groups), cum_weights=groups
+                )[0]
+            image = ''
+            if plan.images and rng.random() < IMAGE_SHARE:
+                image = rng.choice(plan.images)
+            pk = plan.first_post + index
+            posts.append((
+                pk, _text(rng), _moment(plan, offset), author, group, image,
+            ))
+            for _ in range(_heavy_tail(
+                rng, plan.comments_per_post, CHUNK_SIZE
+            )):
+                comments.append((
+                    pk,
+                    plan.first_user + rng.randrange(plan.users),
+                    _text(rng),
+                    _moment(plan, offset + rng.expovariate(
+                        1 / COMMENT_DELAY
+                    )),
+                ))
+            index += 1
+    return posts, comments
+
+
+def _insert(model, fields, rows):
+    """Сырой INSERT без сигналов и auto_now_add."""
+    fields = [model._meta.get_field(name) for name in fields]
+    quote = connection.ops.quote_name
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        quote(model._meta.db_table),
+        ', '.join(quote(field.column) for field in fields),
+        ', '.join(['%s'] * len(fields)),
+    )
+    values = [
+        [
+            field.get_db_prep_save(value, connection)
+            for field, value in zip(fields, row)
+        ]
+        for row in rows
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, values)
+
+
+def store_groups(rows):
+    _insert(Group, ('id', 'title', 'slug', 'description'), rows)
+    return len(rows)
+
+
+def store_users(rows):
+    _insert(User, (
+        'id', 'username', 'password', 'first_name', 'last_name', 'email',
+        'is_superuser', 'is_staff', 'is_active', 'date_joined',
+    ), rows)
+    return len(rows)
+
+
+def store_follows(rows):
+    _insert(Follow, ('user', 'author', 'created'), rows)
+    return len(rows)
+
+
+def store_posts(result):
+    posts, comments = result
+    _insert(
+        Post, ('id', 'text', 'pub_date', 'author', 'group', 'image'), posts
+    )
+    _insert(Comment, ('post', 'author', 'text', 'created'), comments)
+    return len(posts) + len(comments)
+
+
+def _stage(pool, plan, func, total, store):
+    """Генерирует куски этапа и пишет их в базу по мере готовности."""
+    rows = 0
+    tasks = ((func, plan, chunk) for chunk in _chunks(total))
+    # imap отдаёт куски по порядку и по мере готовности.
+    for result in pool.imap(_run, tasks) if pool else map(_run, tasks):
+        with transaction.atomic():
+            rows += store(result)
+    return rows
+
+
+def _next_pk(model):
+    return (model.objects.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+def make_images(count, seed):
+    """Небольшой набор картинок, на которые ссылаются посты."""
+    rng = random.Random(f'{seed}:images')
+    names = []
+    for number in range(count):
+        name = f'posts/dataset/{seed}-{number}.jpg'
+        if not default_storage.exists(name):
+            image = Image.new('RGB', IMAGE_SIZE, tuple(
+                rng.randrange(256) for _ in range(3)
+            ))
+            draw = ImageDraw.Draw(image)
+            for _ in range(8):
+                x, y = rng.randrange(IMAGE_SIZE[0]), rng.randrange(
+                    IMAGE_SIZE[1]
+                )
+                radius = rng.randrange(20, 120)
+                draw.ellipse(
+                    (x - radius, y - radius, x + radius, y + radius),
+                    fill=tuple(rng.randrange(256) for _ in range(3)),
+                )
+            content = io.BytesIO()
+            image.save(content, 'JPEG', quality=80)
+            name = default_storage.save(name, ContentFile(content.getvalue()))
+        names.append(name)
+    return names
+
+
+def generate(users, groups, posts, comments, follows, images=20, seed=0,
+             processes=1, span_days=365, prefix='user', password='password',
+             end=None, report=None):
+    """Заполняет базу синтетическими данными.
+
+    comments и follows задают примерное общее число строк. Посты
+    разбросаны за span_days дней до end, по умолчанию до END. report,
+    если передан, вызывается после каждого этапа с его названием, числом
+    строк и временем в секундах.
+    """
+    end = end or END
+    span = span_days * 24 * 60 * 60
+    plan = Plan(
+        seed=seed,
+        prefix=prefix,
+        password=make_password(password, f'dataset{seed}'),
+        users=users,
+        first_user=_next_pk(User),
+        groups=groups,
+        first_group=_next_pk(Group),
+        posts=posts,
+        first_post=_next_pk(Post),
+        follows_per_user=follows / users if users else 0,
+        comments_per_post=comments / posts if posts else 0,
+        images=make_images(images, seed) if posts else [],
+        start=end - timedelta(seconds=span),
+        span=span,
+    )
+    stages = [
+        ('группы', group_chunk, groups, store_groups),
+        ('пользователи', user_chunk, users, store_users),
+    ]
+    if users:
+        stages += [
+            ('подписки', follow_chunk, users, store_follows),
+            ('посты и комментарии', post_chunk, posts, store_posts),
+        ]
+    pool = None
+    if processes > 1:
+        pool = get_context(START_METHOD).Pool(
+            processes, initializer=django.setup
+        )
+    try:
+        for name, func, total, store in stages:
+            started = time.monotonic()
+            rows = _stage(pool, plan, func, total, store)
+            if report:
+                report(name, rows, time.monotonic() - started)
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(
+            no_style(), [User, Group, Post]
+        ):
+            cursor.execute(sql)
+    group_stats.rebuild()
+    hot_list.invalidate()
+    return plan
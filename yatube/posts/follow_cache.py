@@ -0,0 +1,69 @@
+"""Кэш подписок пользователя: множество id авторов, на которых он
+подписан.
+
+Множество хранится в кэше упакованным в array('I') под ключом с версией.
+Чтобы сбросить кэш, достаточно увеличить версию, старый ключ сам уйдёт
+по таймауту. Версия увеличивается сразу и ещё раз после коммита.
+"""
+import time
+from array import array
+
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import Follow
+
+TIMEOUT = 60 * 60 * 24
+
+
+def _version_key(user_id):
+    return f'follow_set:version:{user_id}'
+
+
+def _version(user_id):
+    key = _version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        # Версия от времени, а не с единицы: если ключ версии вытеснят из
+        # кэша, старое множество под той же версией не всплывёт.
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def following_ids(user):
+    """Множество id авторов, на которых подписан пользователь."""
+    if not user.is_authenticated:
+        return frozenset()
+    key = f'follow_set:{user.pk}:{_version(user.pk)}'
+    packed = cache.get(key)
+    ids = array('I')
+    if packed is None:
+        ids.extend(sorted(
+            Follow.objects.filter(user_id=user.pk, author__isnull=False)
+            .values_list('author_id', flat=True)
+        ))
+        cache.set(key, ids.tobytes(), TIMEOUT)
+    else:
+        ids.frombytes(packed)
+    return frozenset(ids)
+
+
+def is_following(user, author):
+    return author.pk in following_ids(user)
+
+
+def _bump(user_ids):
+    for user_id in user_ids:
+        try:
+            cache.incr(_version_key(user_id))
+        except ValueError:
+            pass
+
+
+def invalidate(*user_ids):
+    """Сбрасывает кэш подписок сразу и ещё раз после коммита: запрос,
+    прочитавший подписки до коммита, мог сохранить их под новой
+    версией."""
+    _bump(user_ids)
+    transaction.on_commit(lambda: _bump(user_ids))
@@ -0,0 +1,141 @@
+"""Граф подписок: списки подписчиков и подписок, рекомендации авторов.
+
+Подписки пользователя берутся из follow_cache. Подписчики автора хранятся
+в кэше отсортированным array('I'). Подписка или отписка не правит список
+на месте - чтение с записью без блокировки теряли бы параллельные
+изменения, - а сбрасывает его: сразу и ещё раз после коммита, чтобы
+список, перечитанный до коммита, не прожил в кэше сутки. Рекомендации
+считаются пачками командой build_follow_suggestions и на странице только
+читаются из кэша.
+"""
+from array import array
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from . import follow_cache
+from .models import Follow
+
+TIMEOUT = 60 * 60 * 24
+SUGGESTIONS_TIMEOUT = 60 * 60 * 24 * 7
+
+
+def _followers_key(author_id):
+    return f'follow_graph:followers:{author_id}'
+
+
+def _count_key(author_id):
+    return f'follow_graph:followers_count:{author_id}'
+
+
+def _suggestions_key(user_id):
+    return f'follow_graph:suggestions:{user_id}'
+
+
+def _unpack(packed):
+    ids = array('I')
+    ids.frombytes(packed)
+    return ids
+
+
+def followers(author_id):
+    """Отсортированный массив id подписчиков автора."""
+    packed = cache.get(_followers_key(author_id))
+    if packed is not None:
+        return _unpack(packed)
+    ids = array('I', sorted(
+        Follow.objects.filter(author_id=author_id)
+        .values_list('user_id', flat=True)
+    ))
+    cache.set(_followers_key(author_id), ids.tobytes(), TIMEOUT)
+    return ids
+
+
+def followers_count(author_id):
+    """Число подписчиков автора; хранится отдельно от списка, чтобы не
+    читать его ради одного числа."""
+    count = cache.get(_count_key(author_id))
+    if count is None:
+        count = Follow.objects.filter(author_id=author_id).count()
+        cache.set(_count_key(author_id), count, TIMEOUT)
+    return count
+
+
+def following(user):
+    """Отсортированный список id авторов, на которых подписан user."""
+    return sorted(follow_cache.following_ids(user))
+
+
+def reset_followers(*author_ids):
+    cache.delete_many([
+        key for author_id in author_ids
+        for key in (_followers_key(author_id), _count_key(author_id))
+    ])
+
+
+def followers_changed(*author_ids):
+    """Сбрасывает подписчиков авторов после подписки или отписки."""
+    reset_followers(*author_ids)
+    transaction.on_commit(lambda: reset_followers(*author_ids))
+
+
+def suggestions(user):
+    """Заранее посчитанные рекомендации без авторов, на которых user
+    подписался после расчёта; пустой список, если их нет."""
+    packed = cache.get(_suggestions_key(user.pk))
+    if not packed:
+        return []
+    followed = follow_cache.following_ids(user)
+    return [pk for pk in _unpack(packed) if pk not in followed]
+
+
+def compute_suggestions(user_ids):
+    """Считает «возможно, вы знакомы» для пачки пользователей.
+
+    Кандидат получает очко за каждого автора из подписок пользователя,
+    который на кандидата подписан, и ещё одно - если кандидат сам подписан
+    на пользователя. Уже отслеживаемые авторы и сам пользователь
+    отбрасываются. Вся пачка обходится за три запроса.
+    """
+    following_map = {user_id: set() for user_id in user_ids}
+    for user_id, author_id in Follow.objects.filter(
+        user_id__in=user_ids, author__isnull=False
+    ).values_list('user_id', 'author_id'):
+        following_map[user_id].add(author_id)
+    second_hop = {}
+    for user_id, author_id in Follow.objects.filter(
+        user_id__in=set().union(*following_map.values()),
+        author__isnull=False,
+    ).values_list('user_id', 'author_id'):
+        second_hop.setdefault(user_id, []).append(author_id)
+    followed_by = {}
+    for user_id, author_id in Follow.objects.filter(
+        author_id__in=user_ids
+    ).values_list('user_id', 'author_id'):
+        followed_by.setdefault(author_id, []).append(user_id)
+
+    result = {}
+    for user_id, followed in following_map.items():
+        scores = Counter()
+        for author_id in followed:
+            scores.update(second_hop.get(author_id, ()))
+        scores.update(followed_by.get(user_id, ()))
+        for excluded in followed | {user_id}:
+            scores.pop(excluded, None)
+        result[user_id] = [
+            candidate for candidate, _ in
+            scores.most_common(settings.FOLLOW_SUGGESTIONS_COUNT)
+        ]
+    return result
+
+
+def store_suggestions(suggestions_map):
+    cache.set_many(
+        {
+            _suggestions_key(user_id): array('I', ids).tobytes()
+            for user_id, ids in suggestions_map.items()
+        },
+        SUGGESTIONS_TIMEOUT,
+    )
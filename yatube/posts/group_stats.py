@@ -0,0 +1,58 @@
+"""Поддержка таблицы GroupStats в актуальном состоянии.
+
+Новый пост в группе - это один UPDATE со сдвигом счётчика. Удаление и
+перенос поста между группами пересчитывают затронутые группы одним
+агрегатным запросом.
+"""
+from django.db.models import Count, F, Max
+
+from .models import Group, GroupStats, Post
+
+
+def refresh(*group_ids):
+    """Пересчитывает статистику перечисленных групп по таблице постов."""
+    group_ids = {group_id for group_id in group_ids if group_id is not None}
+    if not group_ids:
+        return
+    totals = {
+        row['group']: row for row in
+        Post.objects.filter(group_id__in=group_ids).order_by()
+        .values('group')
+        .annotate(posts_count=Count('pk'), last_post_at=Max('pub_date'))
+    }
+    existing = Group.objects.filter(pk__in=group_ids)
+    for group_id in existing.values_list('pk', flat=True):
+        row = totals.get(group_id, {})
+        GroupStats.objects.update_or_create(
+            group_id=group_id,
+            defaults={
+                'posts_count': row.get('posts_count', 0),
+                'last_post_at': row.get('last_post_at'),
+            },
+        )
+
+
+def rebuild():
+    """Полный пересчёт для всех групп."""
+    refresh(*Group.objects.values_list('pk', flat=True))
+
+
+def post_saved(post, created):
+    if created:
+        if post.group_id is None:
+            return
+        updated = GroupStats.objects.filter(group_id=post.group_id).update(
+            posts_count=F('posts_count') + 1,
+            last_post_at=post.pub_date,
+        )
+        if not updated:
+            refresh(post.group_id)
+    else:
+        loaded_group_id = getattr(post, 'loaded_group_id', None)
+        if loaded_group_id != post.group_id:
+            refresh(loaded_group_id, post.group_id)
+    post.loaded_group_id = post.group_id
+
+
+def post_deleted(post):
+    refresh(post.group_id)
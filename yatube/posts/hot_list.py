@@ -0,0 +1,198 @@
+"""Последние посты в памяти процесса для первых страниц главной.
+
+Процесс держит кольцевой буфер из POSTS_HOT_LIST_SIZE свежих постов в
+виде компактных записей и общее число постов. Сигналы Post правят буфер
+на месте после коммита и увеличивают версию в общем кэше; остальные
+процессы, увидев новую версию, перечитывают буфер из базы одним запросом.
+"""
+import logging
+import threading
+import time
+from collections import deque
+from collections.abc import Sequence
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import DatabaseError, transaction
+
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+VERSION_KEY = 'hot_list:version'
+
+_lock = threading.Lock()
+_state = {'version': None, 'size': 0, 'records': deque(), 'total': 0}
+
+
+class AuthorRecord:
+    __slots__ = ('pk', 'username', 'full_name')
+
+    def __init__(self, user):
+        self.pk = user.pk
+        self.username = user.username
+        self.full_name = user.get_full_name()
+
+    def get_full_name(self):
+        return self.full_name
+
+
+class GroupRecord:
+    __slots__ = ('pk', 'slug', 'title')
+
+    def __init__(self, group):
+        self.pk = group.pk
+        self.slug = group.slug
+        self.title = group.title
+
+
+class PostRecord:
+    """Всё, что нужно карточке поста, без ссылок на модели."""
+    __slots__ = ('id', 'text', 'pub_date', 'image', 'author', 'group')
+
+    def __init__(self, post):
+        self.id = post.pk
+        self.text = post.text
+        self.pub_date = post.pub_date
+        # Имени файла достаточно: варианты картинки лежат в кэше по имени.
+        self.image = post.image.name or ''
+        self.author = AuthorRecord(post.author)
+        self.group = GroupRecord(post.group) if post.group_id else None
+
+    @property
+    def pk(self):
+        return self.id
+
+    def __eq__(self, other):
+        if isinstance(other, (PostRecord, Post)):
+            return self.pk == other.pk
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.pk)
+
+
+class _Window(Sequence):
+    """Начало ленты, которое пагинатор видит как ленту целиком."""
+
+    def __init__(self, records, total):
+        self.records = records
+        self.total = total
+
+    def __len__(self):
+        return self.total
+
+    def __getitem__(self, index):
+        return self.records[index]
+
+
+def _version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, time.time_ns(), None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def _reload(version, size):
+    posts = Post.objects.select_related('author', 'group')[:size]
+    _state.update(
+        version=version,
+        size=size,
+        records=deque((PostRecord(post) for post in posts), maxlen=size),
+        total=Post.objects.count(),
+    )
+
+
+def snapshot():
+    """Записи буфера и общее число постов; None, если буфер выключен."""
+    size = settings.POSTS_HOT_LIST_SIZE
+    if not size:
+        return None
+    version = _version()
+    with _lock:
+        if _state['version'] != version or _state['size'] != size:
+            _reload(version, size)
+        return list(_state['records']), _state['total']
+
+
+def warm():
+    """Заполняет буфер при старте процесса."""
+    try:
+        snapshot()
+    except DatabaseError:
+        logger.warning(
+            'Не удалось заполнить буфер свежих постов', exc_info=True
+        )
+
+
+def get_page(number, per_page):
+    """Страница главной из буфера или None, если её там нет целиком."""
+    current = snapshot()
+    if current is None:
+        return None
+    records, total = current
+    try:
+        number = int(number or 1)
+    except (TypeError, ValueError):
+        number = 1
+    if number < 1:
+        return None
+    if number * per_page > len(records) and len(records) < total:
+        return None
+    return Paginator(_Window(records, total), per_page).get_page(number)
+
+
+def invalidate():
+    """Заставляет все процессы перечитать буфер."""
+    try:
+        return cache.incr(VERSION_KEY)
+    except ValueError:
+        return None
+
+
+def _apply(change):
+    transaction.on_commit(lambda: _apply_committed(change))
+
+
+def _apply_committed(change):
+    version = invalidate()
+    with _lock:
+        # Правим буфер на месте, только если до этой записи он был
+        # актуален; иначе его перечитают при следующем обращении.
+        if version is None or _state['version'] != version - 1:
+            return
+        change(_state)
+        _state['version'] = version
+
+
+def post_saved(post, created):
+    if not settings.POSTS_HOT_LIST_SIZE:
+        return
+    record = PostRecord(post)
+
+    def change(state):
+        records = state['records']
+        if created:
+            records.appendleft(record)
+            state['total'] += 1
+        elif record in records:
+            records[records.index(record)] = record
+
+    _apply(change)
+
+
+def post_deleted(post):
+    if not settings.POSTS_HOT_LIST_SIZE:
+        return
+    pk = post.pk
+
+    def change(state):
+        state['records'] = deque(
+            (record for record in state['records'] if record.pk != pk),
+            maxlen=state['size'],
+        )
+        state['total'] -= 1
+
+    _apply(change)
@@ -0,0 +1,51 @@
+"""Фоновые задачи над постами, см. core.jobs.
+
+Пачки обрабатываются через update() и _raw_delete() без сигналов, поэтому
+счётчики групп, буфер главной и файлы картинок поправляются здесь же.
+"""
+from django.db import transaction
+
+from core.images import delete_image
+from core.jobs import handler
+from . import group_stats, hot_list
+from .models import Comment, Notification, Post, PostRanking
+
+MOVE_TO_GROUP = 'posts.move_to_group'
+DELETE_POSTS = 'posts.delete_posts'
+
+
+def _group_ids(pks):
+    return set(
+        Post.objects.filter(pk__in=pks, group__isnull=False)
+        .order_by().values_list('group_id', flat=True).distinct()
+    )
+
+
+@handler(MOVE_TO_GROUP)
+def move_to_group(pks, group_id):
+    groups = _group_ids(pks)
+    Post.objects.filter(pk__in=pks).update(group_id=group_id)
+    group_stats.refresh(*groups, group_id)
+    transaction.on_commit(hot_list.invalidate)
+
+
+@handler(DELETE_POSTS)
+def delete_posts(pks):
+    groups = _group_ids(pks)
+    images = list(
+        Post.objects.filter(pk__in=pks).exclude(image='')
+        .values_list('image', flat=True)
+    )
+    # Сначала то, что ссылается на посты, затем сами посты.
+    for queryset in (
+        Comment.objects.filter(post_id__in=pks),
+        Notification.objects.filter(post_id__in=pks),
+        PostRanking.objects.filter(post_id__in=pks),
+        Post.objects.filter(pk__in=pks),
+    ):
+        queryset._raw_delete(queryset.db)
+    group_stats.refresh(*groups)
+    transaction.on_commit(hot_list.invalidate)
+    # Файлы удаляются, только когда удаление строк точно не откатится.
+    for image in images:
+        transaction.on_commit(lambda image=image: delete_image(image))
@@ -0,0 +1,99 @@
+"""Загрузчики данных на время одного запроса, по образцу DataLoader.
+
+Вью сначала объявляет, что ей понадобится: load(ключ) возвращает
+отложенное значение, а ключи копятся в загрузчике. resolve() выбирает
+каждый загрузчик одним запросом, а разные загрузчики - параллельно
+через core.concurrency.gather. Ключи не повторяются, и выбранное за
+запрос второй раз не запрашивается: авторы постов ленты и
+рекомендованные авторы приходят из одной выборки пользователей.
+"""
+from core.concurrency import gather
+from .models import Group, User
+
+
+class Deferred:
+    __slots__ = ('loader', 'key')
+
+    def __init__(self, loader, key):
+        self.loader = loader
+        self.key = key
+
+    @property
+    def value(self):
+        return self.loader.get(self.key)
+
+
+class Loader:
+    def __init__(self, batch, default=None):
+        """batch получает список ключей и возвращает словарь ключ -
+        значение; для ключей, которых в нём нет, будет default."""
+        self.batch = batch
+        self.default = default
+        self.cache = {}
+        self.pending = set()
+
+    def load(self, key):
+        if key not in self.cache:
+            self.pending.add(key)
+        return Deferred(self, key)
+
+    def load_many(self, keys):
+        return [self.load(key) for key in keys]
+
+    def prime(self, key, value):
+        """Кладёт уже известное значение, чтобы его не выбирать."""
+        self.cache[key] = value
+        self.pending.discard(key)
+
+    def dispatch(self):
+        keys, self.pending = self.pending, set()
+        found = self.batch(sorted(keys)) if keys else {}
+        for key in keys:
+            self.cache[key] = found.get(key, self.default)
+
+    def get(self, key):
+        if key not in self.cache:
+            # Забыли resolve() - выбираем сразу, со всем, что накопилось.
+            self.pending.add(key)
+            self.dispatch()
+        return self.cache[key]
+
+
+class Loaders:
+    def __init__(self):
+        self.users = Loader(User.objects.in_bulk)
+        self.groups = Loader(Group.objects.in_bulk)
+        self.relations = {'author': self.users, 'group': self.groups}
+        self.finishers = []
+
+    def attach(self, objects, *fields):
+        """Объявляет связанных авторов и группы для постов или
+        комментариев; после resolve() они лежат в кэше связей объектов,
+        и шаблон не делает запроса на каждый объект."""
+        objects = list(objects)
+        if not objects:
+            return
+        for name in fields:
+            field = objects[0]._meta.get_field(name)
+            loader = self.relations[name]
+            values = [
+                loader.load(getattr(obj, field.attname))
+                if getattr(obj, field.attname) is not None else None
+                for obj in objects
+            ]
+            self.finishers.append((field, objects, values))
+
+    def resolve(self):
+        loaders = (self.users, self.groups)
+        gather(*(loader.dispatch for loader in loaders if loader.pending))
+        for field, objects, values in self.finishers:
+            for obj, value in zip(objects, values):
+                field.set_cached_value(obj, value and value.value)
+        self.finishers = []
+
+
+def for_request(request):
+    """Загрузчики текущего запроса; создаются при первом обращении."""
+    if not hasattr(request, '_loaders'):
+        request._loaders = Loaders()
+    return request._loaders
@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from posts import follow_graph
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Пересчитывает рекомендации авторов «возможно, вы знакомы» для всех '
+        'пользователей и кладёт их в кэш.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=200)
+
+    def handle(self, *args, **options):
+        last_id = 0
+        processed = 0
+        while True:
+            user_ids = list(
+                User.objects.filter(pk__gt=last_id).order_by('pk')
+                .values_list('pk', flat=True)[:options['batch_size']]
+            )
+            if not user_ids:
+                break
+            follow_graph.store_suggestions(
+                follow_graph.compute_suggestions(user_ids)
+            )
+            processed += len(user_ids)
+            last_id = user_ids[-1]
+        self.stdout.write(f'Рекомендации посчитаны для {processed} польз.')
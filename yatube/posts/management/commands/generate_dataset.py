@@ -0,0 +1,91 @@
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from posts import dataset
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими пользователями, группами, постами, '
+        'комментариями и подписками в масштабе боевой базы. При одном и '
+        'том же --seed на пустой базе данные получаются одинаковыми.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100_000)
+        parser.add_argument('--groups', type=int, default=1_000)
+        parser.add_argument('--posts', type=int, default=1_000_000)
+        parser.add_argument(
+            '--comments', type=int, default=3_000_000,
+            help='Примерное общее число комментариев.',
+        )
+        parser.add_argument(
+            '--follows', type=int, default=2_000_000,
+            help='Примерное общее число подписок.',
+        )
+        parser.add_argument(
+            '--images', type=int, default=20,
+            help='Сколько разных картинок будет у постов.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--processes', type=int, default=os.cpu_count() or 1,
+        )
+        parser.add_argument(
+            '--span-days', type=int, default=365,
+            help='За сколько последних дней разбросаны посты.',
+        )
+        parser.add_argument(
+            '--until-now', action='store_true',
+            help='Закончить данные текущим моментом, а не фиксированной '
+                 'датой dataset.END; набор перестаёт повторяться.',
+        )
+        parser.add_argument(
+            '--prefix', default='user',
+            help='Начало имён пользователей, дальше идёт их id.',
+        )
+        parser.add_argument(
+            '--password', default='password',
+            help='Пароль всех созданных пользователей.',
+        )
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Запустить и при DEBUG = False.',
+        )
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG and not options['force']:
+            raise CommandError(
+                'Похоже, это не локальная база. Если всё же нужно, '
+                'добавьте --force.'
+            )
+
+        def report(stage, rows, elapsed):
+            rate = rows / elapsed if elapsed else rows
+            self.stdout.write(
+                f'{stage}: {rows} строк за {elapsed:.1f} с '
+                f'({rate:.0f} строк/с).'
+            )
+
+        dataset.generate(
+            users=options['users'],
+            groups=options['groups'],
+            posts=options['posts'],
+            comments=options['comments'],
+            follows=options['follows'],
+            images=options['images'],
+            seed=options['seed'],
+            processes=options['processes'],
+            span_days=options['span_days'],
+            end=timezone.now() if options['until_now'] else None,
+            prefix=options['prefix'],
+            password=options['password'],
+            report=report,
+        )
+        self.stdout.write(
+            'Готово. Рейтинг и рекомендации пересчитают update_trending '
+            'и build_follow_suggestions.'
+        )
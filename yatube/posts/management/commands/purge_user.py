@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import purge
+from posts.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет пользователей со всеми постами, комментариями и '
+        'подписками небольшими пачками. Прерванный запуск можно повторить.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('usernames', nargs='+')
+        parser.add_argument('--batch-size', type=int, default=None)
+        parser.add_argument(
+            '--pause', type=float, default=None,
+            help='Пауза между пачками в секундах.',
+        )
+
+    def handle(self, *args, **options):
+        users = User.objects.filter(username__in=options['usernames'])
+        if users.filter(is_staff=True).exists():
+            raise CommandError('Сотрудников так удалять нельзя.')
+        found = dict(users.values_list('username', 'pk'))
+        for username in options['usernames']:
+            if username not in found:
+                self.stdout.write(f'{username}: не найден, пропускаю.')
+                continue
+
+            def report(phase, deleted, elapsed, username=username):
+                rate = deleted / elapsed if elapsed else deleted
+                self.stdout.write(
+                    f'{username}: {phase} - {deleted} строк за '
+                    f'{elapsed:.1f} с ({rate:.0f} строк/с).'
+                )
+
+            purge.purge_user(
+                found[username], options['batch_size'], options['pause'],
+                report=report,
+            )
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from posts import notifications
+
+
+class Command(BaseCommand):
+    help = (
+        'Рассылает письма со сводкой непрочитанных уведомлений: одно '
+        'письмо на получателя со всем, что появилось после прошлой '
+        'рассылки. Запускать периодически, например из cron раз в час.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=None,
+            help='Получателей в одной отправке, по умолчанию '
+                 'NOTIFICATIONS_EMAIL_BATCH.',
+        )
+
+    def handle(self, *args, **options):
+        sent = notifications.send_digests(options['batch_size'])
+        self.stdout.write(f'Отправлено писем: {sent}.')
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from posts import trending
+
+
+class Command(BaseCommand):
+    help = (
+        'Добавляет в рейтинг «Популярное» события с прошлого запуска. '
+        'Запускать периодически, например из cron раз в несколько минут.'
+    )
+
+    def handle(self, *args, **options):
+        posts, groups = trending.update()
+        self.stdout.write(
+            f'Рейтинг обновлён: постов {posts}, групп {groups}.'
+        )
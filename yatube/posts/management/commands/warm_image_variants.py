@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from core.images import warm_variants
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Заранее нарезает адаптивные варианты картинок постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        images = (
+            Post.objects.exclude(image='')
+            .values_list('image', flat=True)
+            .iterator(chunk_size=options['batch_size'])
+        )
+        warmed = failed = 0
+        for name in images:
+            if warm_variants(name):
+                warmed += 1
+            else:
+                failed += 1
+        self.stdout.write(
+            f'Готово: {warmed} картинок нарезано, {failed} с ошибками.'
+        )
@@ -12,6 +12,40 @@ class Group(models.Model):
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Нужно буферу главной: он хранит название и slug, см. сигналы.
+        instance.loaded_card = (
+            instance.__dict__.get('title'), instance.__dict__.get('slug')
+        )
+        return instance
+
+
+class GroupStats(models.Model):
+    """Число постов и время последней публикации группы.
+
+    Поддерживается сигналами при создании, удалении и переносе постов,
+    чтобы список групп не считал это на каждый запрос.
+    """
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Группа',
+    )
+    posts_count = models.PositiveIntegerField('Количество постов', default=0)
+    last_post_at = models.DateTimeField(
+        'Последняя публикация',
+        blank=True,
+        null=True,
+    )
+
+    class Meta:
+        verbose_name = 'Статистика группы'
+        verbose_name_plural = 'Статистика групп'
+
 
 class Post(models.Model):
     text = models.TextField(
@@ -20,7 +54,8 @@ class Post(models.Model):
     )
     pub_date = models.DateTimeField(
         'Дата публикации',
-        auto_now_add=True
+        auto_now_add=True,
+        db_index=True,
     )
     author = models.ForeignKey(
         User,
@@ -52,6 +87,13 @@ class Post(models.Model):
     def __str__(self):
         return self.text[:15]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Нужна статистике групп, чтобы заметить перенос поста.
+        instance.loaded_group_id = instance.__dict__.get('group_id')
+        return instance
+
 
 class Comment(models.Model):
     post = models.ForeignKey(
@@ -98,6 +140,11 @@ class Follow(models.Model):
         related_name='following',
         verbose_name='Объект подписки',
     )
+    created = models.DateTimeField(
+        'Дата подписки',
+        auto_now_add=True,
+        db_index=True,
+    )
 
     class Meta:
         constraints = [
@@ -106,3 +153,120 @@ class Follow(models.Model):
                 name='unique following'
             )
         ]
+
+
+class PostRanking(models.Model):
+    """Рейтинг поста для ленты «Популярное».
+
+    score хранится в логарифмической шкале с затуханием относительно
+    фиксированной эпохи (см. posts.trending), поэтому порядок постов не
+    меняется со временем и старые строки не нужно пересчитывать.
+    """
+    post = models.OneToOneField(
+        Post,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='ranking',
+        verbose_name='Пост',
+    )
+    score = models.FloatField('Рейтинг', db_index=True)
+    updated = models.DateTimeField('Дата пересчёта', db_index=True)
+
+    class Meta:
+        verbose_name = 'Рейтинг поста'
+        verbose_name_plural = 'Рейтинги постов'
+
+
+class GroupRanking(models.Model):
+    """Рейтинг группы: сумма событий по её постам, в той же шкале."""
+    group = models.OneToOneField(
+        Group,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='ranking',
+        verbose_name='Группа',
+    )
+    score = models.FloatField('Рейтинг', db_index=True)
+    updated = models.DateTimeField('Дата пересчёта')
+
+    class Meta:
+        verbose_name = 'Рейтинг группы'
+        verbose_name_plural = 'Рейтинги групп'
+
+
+class Notification(models.Model):
+    """Уведомление автора о комментариях к посту или новых подписчиках.
+
+    Пачка однотипных событий сливается в одну строку: count растёт, в
+    actor лежит последний, кто комментировал или подписался. Прочитанное
+    уведомление больше не растёт, следующие события начнут новое.
+    """
+    COMMENT = 'comment'
+    FOLLOW = 'follow'
+    KINDS = (
+        (COMMENT, 'Комментарии к посту'),
+        (FOLLOW, 'Новые подписчики'),
+    )
+
+    recipient = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='notifications',
+        verbose_name='Получатель',
+    )
+    kind = models.CharField('Тип', max_length=16, choices=KINDS)
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        related_name='+',
+        verbose_name='Пост',
+    )
+    actor = models.ForeignKey(
+        User,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        related_name='+',
+        verbose_name='Последний участник',
+    )
+    count = models.PositiveIntegerField('Событий', default=1)
+    emailed_count = models.PositiveIntegerField(
+        'Событий в письмах',
+        default=0,
+    )
+    is_read = models.BooleanField('Прочитано', default=False)
+    created = models.DateTimeField('Дата создания', auto_now_add=True)
+    updated = models.DateTimeField('Последнее событие')
+
+    class Meta:
+        ordering = ['-updated']
+        indexes = [
+            models.Index(
+                fields=['recipient', 'is_read'],
+                name='notification_unread',
+            ),
+        ]
+        # Непрочитанное уведомление одно на получателя, тип и пост; у
+        # подписчиков поста нет, а NULL в уникальном индексе не
+        # совпадает с NULL, поэтому для них отдельное условие.
+        constraints = [
+            models.UniqueConstraint(
+                fields=['recipient', 'kind', 'post'],
+                condition=models.Q(is_read=False, post__isnull=False),
+                name='unique unread notification',
+            ),
+            models.UniqueConstraint(
+                fields=['recipient', 'kind'],
+                condition=models.Q(is_read=False, post__isnull=True),
+                name='unique unread postless notification',
+            ),
+        ]
+        verbose_name = 'Уведомление'
+        verbose_name_plural = 'Уведомления'
+
+    def __str__(self):
+        if self.kind == self.COMMENT:
+            return f'Новых комментариев к посту «{self.post}»: {self.count}'
+        return f'Новых подписчиков: {self.count}'
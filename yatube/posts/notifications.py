@@ -0,0 +1,224 @@
+"""Уведомления авторам о комментариях и новых подписчиках.
+
+Событие не пишется в базу сразу: после коммита оно попадает в буфер
+процесса, где события с одним получателем, типом и постом складываются в
+счётчик. Раз в NOTIFICATIONS_FLUSH_SECONDS (или раньше, если в буфере
+набралось NOTIFICATIONS_BUFFER_SIZE уведомлений) буфер пишется в базу
+несколькими запросами на всю пачку и прибавляется к непрочитанным
+уведомлениям тех же получателей. Так всплеск из десятка комментариев к
+посту - одно уведомление «12 новых комментариев», а не десяток строк.
+Буфер живёт в памяти, поэтому при остановке процесса он дописывается в
+базу.
+
+Письма со сводкой рассылает команда send_notification_digests пачками
+по NOTIFICATIONS_EMAIL_BATCH через EMAIL_BACKEND, то есть в outbox (см.
+core.outbox): одно письмо на получателя со всем, что появилось после
+прошлой рассылки.
+"""
+import atexit
+import logging
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.mail import EmailMessage, get_connection
+from django.db import DatabaseError, connection, transaction
+from django.db.models import F
+from django.template.loader import render_to_string
+from django.utils import timezone
+
+from .models import Notification, Post, User
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+# (получатель, тип, пост) -> [событий, последний участник, время].
+_pending = {}
+_state = {'timer': None, 'atexit': False}
+
+
+def _unread_key(user_id):
+    return f'notifications:unread:{user_id}'
+
+
+def record(recipient_id, kind, actor_id, post_id=None):
+    """Ставит событие в буфер после коммита текущей транзакции."""
+    if recipient_id is None or recipient_id == actor_id:
+        return
+    key = (recipient_id, kind, post_id)
+    transaction.on_commit(lambda: _add(key, actor_id, timezone.now()))
+
+
+def comment_added(comment, post):
+    record(post.author_id, Notification.COMMENT, comment.author_id, post.pk)
+
+
+def follower_added(follow):
+    record(follow.author_id, Notification.FOLLOW, follow.user_id)
+
+
+def _add(key, actor_id, moment):
+    delay = settings.NOTIFICATIONS_FLUSH_SECONDS
+    with _lock:
+        entry = _pending.setdefault(key, [0, None, None])
+        entry[0] += 1
+        entry[1], entry[2] = actor_id, moment
+        full = len(_pending) >= settings.NOTIFICATIONS_BUFFER_SIZE
+        if delay and not full and _state['timer'] is None:
+            timer = threading.Timer(delay, _flush_in_background)
+            timer.daemon = True
+            _state['timer'] = timer
+            timer.start()
+        if not _state['atexit']:
+            atexit.register(flush)
+            _state['atexit'] = True
+    if not delay or full:
+        flush()
+
+
+def _flush_in_background():
+    try:
+        flush()
+    finally:
+        # У потока таймера своё соединение с базой.
+        connection.close()
+
+
+def flush():
+    """Пишет буфер в базу; возвращает число записанных событий."""
+    with _lock:
+        entries = dict(_pending)
+        _pending.clear()
+        timer, _state['timer'] = _state['timer'], None
+    if timer is not None:
+        timer.cancel()
+    if not entries:
+        return 0
+    try:
+        with transaction.atomic():
+            _write(entries)
+    except DatabaseError:
+        logger.exception(
+            'Не удалось записать уведомления: %s событий', len(entries)
+        )
+        return 0
+    reset_unread(*{recipient_id for recipient_id, _, _ in entries})
+    return sum(count for count, _, _ in entries.values())
+
+
+def _write(entries):
+    # Пост или получатель могли исчезнуть, пока событие ждало в буфере.
+    recipients = set(
+        User.objects.filter(pk__in={key[0] for key in entries})
+        .values_list('pk', flat=True)
+    )
+    posts = set(
+        Post.objects.filter(pk__in={key[2] for key in entries if key[2]})
+        .values_list('pk', flat=True)
+    )
+    entries = {
+        key: entry for key, entry in entries.items()
+        if key[0] in recipients and (not key[2] or key[2] in posts)
+    }
+    # Сначала пустые строки для новых ключей: уникальное условие на
+    # непрочитанные не даст двум процессам создать по своей, а лишняя
+    # вставка молча пропускается.
+    Notification.objects.bulk_create(
+        [
+            Notification(
+                recipient_id=recipient_id, kind=kind, post_id=post_id,
+                count=0, updated=moment,
+            )
+            for (recipient_id, kind, post_id), (_, _, moment)
+            in entries.items()
+        ],
+        batch_size=500,
+        ignore_conflicts=True,
+    )
+    updated = []
+    for row in Notification.objects.filter(
+        recipient_id__in=recipients, is_read=False
+    ):
+        entry = entries.get((row.recipient_id, row.kind, row.post_id))
+        if entry is None:
+            continue
+        count, actor_id, moment = entry
+        # Прибавляем в самой базе: другой процесс мог записать свой буфер
+        # в ту же строку.
+        row.count = F('count') + count
+        row.actor_id, row.updated = actor_id, moment
+        updated.append(row)
+    Notification.objects.bulk_update(
+        updated, ['count', 'actor', 'updated'], batch_size=500
+    )
+
+
+def unread_count(user):
+    """Число непрочитанных уведомлений; хранится в кэше."""
+    if not user.is_authenticated:
+        return 0
+    key = _unread_key(user.pk)
+    count = cache.get(key)
+    if count is None:
+        count = Notification.objects.filter(
+            recipient_id=user.pk, is_read=False
+        ).count()
+        cache.set(key, count, settings.NOTIFICATIONS_UNREAD_TIMEOUT)
+    return count
+
+
+def reset_unread(*user_ids):
+    cache.delete_many([_unread_key(user_id) for user_id in user_ids])
+
+
+def mark_read(user, notifications):
+    pks = [row.pk for row in notifications if not row.is_read]
+    if pks:
+        Notification.objects.filter(pk__in=pks).update(is_read=True)
+        reset_unread(user.pk)
+
+
+def _digest(recipient, rows):
+    body = render_to_string(
+        'posts/email/digest.txt', {'user': recipient, 'notifications': rows}
+    )
+    return EmailMessage('Новое в Yatube', body, to=[recipient.email])
+
+
+def send_digests(batch_size=None):
+    """Рассылает сводки; возвращает число отправленных писем."""
+    batch_size = batch_size or settings.NOTIFICATIONS_EMAIL_BATCH
+    waiting = (
+        Notification.objects.filter(
+            is_read=False, count__gt=F('emailed_count')
+        ).exclude(recipient__email='')
+    )
+    recipient_ids = sorted(set(
+        waiting.order_by().values_list('recipient_id', flat=True)
+    ))
+    sent = 0
+    with get_connection() as mail:
+        for start in range(0, len(recipient_ids), batch_size):
+            chunk = recipient_ids[start:start + batch_size]
+            rows = list(
+                waiting.filter(recipient_id__in=chunk)
+                .select_related('recipient', 'post', 'actor')
+                .order_by('recipient_id', '-updated')
+            )
+            grouped = {}
+            for row in rows:
+                row.new_count = row.count - row.emailed_count
+                grouped.setdefault(row.recipient, []).append(row)
+            messages = [
+                _digest(recipient, group)
+                for recipient, group in grouped.items()
+            ]
+            sent += mail.send_messages(messages) or 0
+            # В письмо попало то, что было на момент выборки; события,
+            # пришедшие после, уйдут следующей сводкой.
+            for row in rows:
+                row.emailed_count = row.count
+            Notification.objects.bulk_update(
+                rows, ['emailed_count'], batch_size=500
+            )
+    return sent
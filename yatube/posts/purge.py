@@ -0,0 +1,106 @@
+"""Удаление спам-аккаунта со всем содержимым небольшими пачками.
+
+Обычный user.delete() удаляет посты, комментарии и подписки одной
+транзакцией, и на больших аккаунтах SQLite оказывается заблокирован на
+минуты. Здесь строки удаляются пачками по первичному ключу, каждая пачка
+в своей транзакции, с паузой между ними, чтобы успевали писать другие
+запросы. Кэши и файлы картинок чистятся после каждой пачки. Повторный
+запуск продолжает с того места, где остановился прошлый: удалённое уже
+не найдётся.
+"""
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+
+from core.jobs import handler
+from . import follow_cache, follow_graph
+from .jobs import delete_posts
+from .models import Comment, Follow, Post, User
+
+PURGE_USERS = 'posts.purge_users'
+
+
+def _delete_comments(pks):
+    Comment.objects.filter(pk__in=pks)._raw_delete(Comment.objects.db)
+
+
+def _delete_follows(pks):
+    rows = list(
+        Follow.objects.filter(pk__in=pks)
+        .values_list('user_id', 'author_id')
+    )
+    Follow.objects.filter(pk__in=pks)._raw_delete(Follow.objects.db)
+    followers = {user_id for user_id, _ in rows}
+    authors = {author_id for _, author_id in rows if author_id is not None}
+    transaction.on_commit(lambda: follow_cache.invalidate(*followers))
+    transaction.on_commit(lambda: follow_graph.reset_followers(*authors))
+
+
+def phases(user_id):
+    """Что удалять и в каком порядке: (название, строки, удаление)."""
+    return (
+        (
+            'комментарии',
+            Comment.objects.filter(author_id=user_id),
+            _delete_comments,
+        ),
+        ('посты', Post.objects.filter(author_id=user_id), delete_posts),
+        (
+            'подписки',
+            Follow.objects.filter(Q(user_id=user_id) | Q(author_id=user_id)),
+            _delete_follows,
+        ),
+    )
+
+
+def drain(queryset, delete, batch_size, pause):
+    """Удаляет строки queryset пачками по возрастанию pk.
+
+    Возвращает число удалённых строк и затраченное время.
+    """
+    started = time.monotonic()
+    deleted = 0
+    last_pk = 0
+    while True:
+        pks = list(
+            queryset.filter(pk__gt=last_pk).order_by('pk')
+            .values_list('pk', flat=True)[:batch_size]
+        )
+        if not pks:
+            break
+        with transaction.atomic():
+            delete(pks)
+        deleted += len(pks)
+        last_pk = pks[-1]
+        if pause:
+            # Отдаём блокировку базы остальным запросам.
+            time.sleep(pause)
+    return deleted, time.monotonic() - started
+
+
+def purge_user(user_id, batch_size=None, pause=None, report=None):
+    """Удаляет пользователя и всё, что он создал.
+
+    report, если передан, вызывается после каждого этапа с его названием,
+    числом удалённых строк и временем в секундах.
+    """
+    batch_size = batch_size or settings.PURGE_BATCH_SIZE
+    pause = settings.PURGE_PAUSE if pause is None else pause
+    for name, queryset, delete in phases(user_id):
+        deleted, elapsed = drain(queryset, delete, batch_size, pause)
+        if report:
+            report(name, deleted, elapsed)
+    # Крупного у пользователя ничего не осталось, остальное удалит каскад.
+    started = time.monotonic()
+    deleted, _ = User.objects.filter(pk=user_id).delete()
+    follow_cache.invalidate(user_id)
+    if report:
+        report('аккаунт', deleted, time.monotonic() - started)
+
+
+@handler(PURGE_USERS, atomic=False, batch_size=1)
+def purge_users(pks):
+    for user_id in pks:
+        purge_user(user_id)
@@ -0,0 +1,124 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core.images import get_variants
+from . import follow_cache, follow_graph, group_stats, hot_list, usernames
+from .models import Follow, Group, GroupStats, Post, User
+
+
+@receiver(post_save, sender=Post)
+def warm_post_image(sender, instance, **kwargs):
+    if instance.image:
+        get_variants(instance.image)
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(sender, instance, created, **kwargs):
+    group_stats.post_saved(instance, created)
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    group_stats.post_deleted(instance)
+
+
+@receiver(post_save, sender=Post)
+def update_hot_list(sender, instance, created, **kwargs):
+    hot_list.post_saved(instance, created)
+
+
+@receiver(post_delete, sender=Post)
+def remove_from_hot_list(sender, instance, **kwargs):
+    hot_list.post_deleted(instance)
+
+
+@receiver(post_save, sender=Group)
+def create_group_stats(sender, instance, created, **kwargs):
+    if created:
+        GroupStats.objects.get_or_create(group=instance)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def reset_follow_cache(sender, instance, **kwargs):
+    follow_cache.invalidate(instance.user_id)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def reset_follow_graph(sender, instance, **kwargs):
+    if instance.author_id is not None:
+        follow_graph.followers_changed(instance.author_id)
+
+
+@receiver(post_save, sender=User)
+def reset_new_user_follow_cache(sender, instance, created, **kwargs):
+    # id удалённого пользователя может достаться новому, а вместе с ним и
+    # чужие подписки из кэша.
+    if created:
+        follow_cache.invalidate(instance.pk)
+        follow_graph.reset_followers(instance.pk)
+
+
+def _saves(update_fields, *fields):
+    # Вход сохраняет только last_login, а перехеширование - password.
+    return update_fields is None or not set(fields).isdisjoint(update_fields)
+
+
+def _saves_username(update_fields):
+    return _saves(update_fields, 'username')
+
+
+@receiver(post_save, sender=User)
+def reset_hot_list_author(sender, instance, created, update_fields=None,
+                          **kwargs):
+    # В буфере лежат копии логина и имени автора.
+    if (
+        not created and settings.POSTS_HOT_LIST_SIZE
+        and _saves(update_fields, 'username', 'first_name', 'last_name')
+    ):
+        transaction.on_commit(hot_list.invalidate)
+
+
+@receiver(post_save, sender=Group)
+def reset_hot_list_group(sender, instance, created, **kwargs):
+    # В буфере лежат копии названия и slug группы.
+    loaded = getattr(instance, 'loaded_card', None)
+    if (
+        not created and settings.POSTS_HOT_LIST_SIZE
+        and loaded != (instance.title, instance.slug)
+    ):
+        transaction.on_commit(hot_list.invalidate)
+    instance.loaded_card = (instance.title, instance.slug)
+
+
+def _invalidate_username(username):
+    # Запрос из другого соединения до коммита ещё видит старые данные и
+    # может снова положить их в кэш, поэтому сбрасываем после коммита.
+    transaction.on_commit(lambda: usernames.invalidate(username))
+
+
+@receiver(pre_save, sender=User)
+def forget_old_username(sender, instance, update_fields=None, **kwargs):
+    if instance.pk is None or not _saves_username(update_fields):
+        return
+    old = (
+        User.objects.filter(pk=instance.pk)
+        .values_list('username', flat=True).first()
+    )
+    if old is not None and old != instance.username:
+        _invalidate_username(old)
+
+
+@receiver(post_save, sender=User)
+def reset_username(sender, instance, update_fields=None, **kwargs):
+    # Новый логин мог быть запомнен как несуществующий.
+    if _saves_username(update_fields):
+        _invalidate_username(instance.username)
+
+
+@receiver(post_delete, sender=User)
+def forget_deleted_username(sender, instance, **kwargs):
+    _invalidate_username(instance.username)
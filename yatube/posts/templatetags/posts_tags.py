@@ -0,0 +1,22 @@
+from django import template
+
+from posts import notifications
+
+register = template.Library()
+
+
+@register.filter
+def author_name(author):
+    """Полное имя автора, а если его нет - логин."""
+    return author.get_full_name() or author.username
+
+
+@register.inclusion_tag('posts/includes/post_list.html')
+def post_card(post):
+    return {'post': post}
+
+
+@register.simple_tag
+def unread_notifications(user):
+    """Число непрочитанных уведомлений из кэша."""
+    return notifications.unread_count(user)
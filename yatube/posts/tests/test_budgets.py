@@ -0,0 +1,53 @@
+"""Бюджеты страниц: число запросов и медианное время на наборе данных
+из perf_budgets.json. Обновить бюджет страницы после осознанного
+изменения:
+pytest yatube/posts/tests/test_budgets.py --budgets-update posts:index
+"""
+import pytest
+from django.urls import reverse
+
+from posts.models import Follow, Post
+
+pytestmark = pytest.mark.django_db
+
+
+def urls(plan):
+    """Адреса страниц по именам URL и нужен ли для них вход."""
+    author = f'{plan.prefix}{plan.first_user}'
+    post = Post.objects.filter(author_id=plan.first_user).first()
+    return {
+        'posts:index': (reverse('posts:index'), False),
+        'posts:trending': (reverse('posts:trending'), False),
+        'posts:group_index': (reverse('posts:group_index'), False),
+        'posts:group_list': (
+            reverse('posts:group_list', args=[f'group-{plan.first_group}']),
+            False,
+        ),
+        'posts:profile': (reverse('posts:profile', args=[author]), False),
+        'posts:followers': (reverse('posts:followers', args=[author]), False),
+        'posts:following': (reverse('posts:following', args=[author]), False),
+        'posts:post_detail': (
+            reverse('posts:post_detail', args=[post.pk]), False
+        ),
+        'posts:follow_index': (reverse('posts:follow_index'), True),
+        'posts:post_create': (reverse('posts:post_create'), True),
+    }
+
+
+PAGES = (
+    'posts:index', 'posts:trending', 'posts:group_index', 'posts:group_list',
+    'posts:profile', 'posts:followers', 'posts:following',
+    'posts:post_detail', 'posts:follow_index', 'posts:post_create',
+)
+
+
+@pytest.mark.parametrize('name', PAGES)
+def test_page_budget(name, perf_dataset, perf_budget, client):
+    url, login = urls(perf_dataset)[name]
+    if login:
+        # Больше всех подписок у того, кто чаще выпадал в распределении.
+        follow = Follow.objects.filter(
+            user_id__gte=perf_dataset.first_user
+        ).first()
+        client.force_login(follow.user)
+    perf_budget(name, client, url)
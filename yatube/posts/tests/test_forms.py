@@ -1,25 +1,17 @@
-import shutil
-import tempfile
-
 from http import HTTPStatus
 from django.contrib.auth import get_user_model
 from posts.forms import PostForm, CommentForm
 from posts.models import Post, Group, Comment
-from django.conf import settings
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import Client, TestCase, override_settings
+from django.test import Client, TestCase
 from django.urls import reverse
 
 User = get_user_model()
 
-TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
-
 
-@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
 class PostFormTests(TestCase):
     @classmethod
-    def setUpClass(cls):
-        super().setUpClass()
+    def setUpTestData(cls):
         cls.user = User.objects.create_user(username='test_usr')
         cls.author = Client()
         cls.author.force_login(cls.user)
@@ -49,11 +41,6 @@ class PostFormTests(TestCase):
         )
         cls.form = PostForm()
 
-    @classmethod
-    def tearDownClass(cls):
-        super().tearDownClass()
-        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
-
     def setUp(self):
         self.guest_client = Client()
         self.posts_count = Post.objects.count()
@@ -126,8 +113,7 @@ class PostFormTests(TestCase):
 
 class CommentFormTests(TestCase):
     @classmethod
-    def setUpClass(cls):
-        super().setUpClass()
+    def setUpTestData(cls):
         cls.user = User.objects.create_user(username='test_usr')
         cls.author = Client()
         cls.author.force_login(cls.user)
@@ -1,7 +1,14 @@
+from collections import Counter
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.test import TestCase
 
-from ..models import Group, Post
+from .. import dataset
+from ..models import Comment, Follow, Group, GroupStats, Post
 
 User = get_user_model()
 
@@ -32,3 +39,107 @@ class PostModelTest(TestCase):
         for model, expected_object_name in models_str.items():
             with self.subTest(model):
                 self.assertEqual(expected_object_name, str(model))
+
+
+class GroupStatsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='auth')
+        cls.group = Group.objects.create(title='Группа 1', slug='group-1')
+        cls.other_group = Group.objects.create(
+            title='Группа 2', slug='group-2'
+        )
+
+    def stats(self, group):
+        return GroupStats.objects.get(group=group)
+
+    def test_new_group_has_empty_stats(self):
+        """У новой группы сразу есть пустая статистика."""
+        stats = self.stats(self.group)
+        self.assertEqual(stats.posts_count, 0)
+        self.assertIsNone(stats.last_post_at)
+
+    def test_stats_follow_post_changes(self):
+        """Статистика меняется при создании, переносе и удалении поста."""
+        post = Post.objects.create(
+            author=self.user, text='Пост', group=self.group
+        )
+        self.assertEqual(self.stats(self.group).posts_count, 1)
+        self.assertEqual(self.stats(self.group).last_post_at, post.pub_date)
+        post = Post.objects.get(pk=post.pk)
+        post.group = self.other_group
+        post.save()
+        self.assertEqual(self.stats(self.group).posts_count, 0)
+        self.assertIsNone(self.stats(self.group).last_post_at)
+        self.assertEqual(self.stats(self.other_group).posts_count, 1)
+        post.delete()
+        self.assertEqual(self.stats(self.other_group).posts_count, 0)
+
+
+class DatasetTests(TestCase):
+    def test_generate_dataset(self):
+        """Команда создаёт заданное число строк и пишет, сколько успела."""
+        out = StringIO()
+        call_command(
+            'generate_dataset', users=40, groups=3, posts=120, comments=300,
+            follows=150, images=2, processes=1, force=True, stdout=out,
+        )
+        self.assertEqual(User.objects.count(), 40)
+        self.assertEqual(Group.objects.count(), 3)
+        self.assertEqual(Post.objects.count(), 120)
+        self.assertTrue(Comment.objects.exists())
+        self.assertTrue(Follow.objects.exists())
+        self.assertIn('посты и комментарии: ', out.getvalue())
+        self.assertEqual(
+            sum(GroupStats.objects.values_list('posts_count', flat=True)),
+            Post.objects.exclude(group=None).count(),
+        )
+        self.assertTrue(
+            self.client.login(username=User.objects.first().username,
+                              password='password')
+        )
+
+    def test_rows_do_not_depend_on_processes(self):
+        """Строки в базе те же, что куски дают без пула процессов."""
+        with mock.patch.object(dataset, 'CHUNK_SIZE', 30):
+            plan = dataset.generate(
+                users=60, groups=2, posts=90, comments=90, follows=240,
+                images=0, seed=7, processes=2,
+            )
+        posts = [
+            (pk, text, pub_date, author, group, '')
+            for pk, text, pub_date, author, group in Post.objects.order_by(
+                'pk'
+            ).values_list('pk', 'text', 'pub_date', 'author', 'group')
+        ]
+        with mock.patch.object(dataset, 'CHUNK_SIZE', 30):
+            expected = [
+                row for chunk in range(3)
+                for row in dataset.post_chunk(plan, chunk)[0]
+            ]
+        self.assertEqual(posts, expected)
+        followers = Counter(
+            Follow.objects.values_list('author_id', flat=True)
+        )
+        # Самый популярный по Ципфу автор - первый.
+        self.assertEqual(followers.most_common(1)[0][0], plan.first_user)
+
+    def test_pool_works_with_spawn(self):
+        """Процессы, запущенные через spawn, настраивают Django сами."""
+        with mock.patch.multiple(dataset, CHUNK_SIZE=30, START_METHOD='spawn'):
+            dataset.generate(
+                users=60, groups=2, posts=60, comments=30, follows=60,
+                images=0, seed=5, processes=2,
+            )
+        self.assertEqual(User.objects.count(), 60)
+        self.assertEqual(Post.objects.count(), 60)
+
+    def test_dates_do_not_depend_on_current_time(self):
+        """Даты отсчитываются от dataset.END, а не от текущего времени."""
+        plan = dataset.generate(
+            users=10, groups=1, posts=20, comments=20, follows=20,
+            images=0, seed=3, span_days=30,
+        )
+        self.assertEqual(plan.start, dataset.END - timedelta(days=30))
+        for pub_date in Post.objects.values_list('pub_date', flat=True):
+            self.assertTrue(plan.start <= pub_date <= dataset.END)
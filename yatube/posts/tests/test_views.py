@@ -1,25 +1,38 @@
-import shutil
-import tempfile
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
 from django.contrib.auth import get_user_model
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.conf import settings
-from django.test import Client, TestCase, override_settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.core import mail
+from django.core.management import call_command
+from django.test import (
+    Client, TestCase, TransactionTestCase, override_settings
+)
+from django.db import IntegrityError, connection, transaction
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
+from django.utils import timezone
 from django import forms
 
-from posts.models import Post, Group, Comment, Follow
+from posts import (
+    follow_cache, follow_graph, hot_list, loaders, notifications, purge,
+    trending, usernames,
+)
+from posts.models import (
+    Post, Group, Comment, Follow, Notification, PostRanking
+)
+from users.forms import CreationForm
 
 User = get_user_model()
 
-TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
 
-
-@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
 class PostPagesTests(TestCase):
     @classmethod
-    def setUpClass(cls):
-        super().setUpClass()
+    def setUpTestData(cls):
         cls.user = User.objects.create_user(username='test_usr')
         cls.user_following = User.objects.create_user(username='test_usr_2')
         cls.author = Client()
@@ -61,11 +74,6 @@ class PostPagesTests(TestCase):
             user=cls.user,
         )
 
-    @classmethod
-    def tearDownClass(cls):
-        super().tearDownClass()
-        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
-
     def setUp(self):
         self.guest_client = Client()
         self.user_auth = User.objects.create_user(username='HasNoName')
@@ -273,8 +281,7 @@ class PostPagesTests(TestCase):
 
 class PaginatorViewsTest(TestCase):
     @classmethod
-    def setUpClass(cls):
-        super().setUpClass()
+    def setUpTestData(cls):
         cls.POSTS_ON_PAGE = 10
         cls.user = User.objects.create_user(username='test_usr')
         cls.user_auth = User.objects.create_user(username='test_auth')
@@ -326,3 +333,741 @@ class PaginatorViewsTest(TestCase):
             with self.subTest(value=url):
                 response = self.auth.get(url + '?page=2')
                 self.assertEqual(len(response.context['page_obj']), 3)
+
+
+class FollowCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='follower')
+        cls.author = User.objects.create_user(username='author')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_following_ids_are_cached(self):
+        """Повторная проверка подписки не ходит в базу."""
+        follow_cache.following_ids(self.user)
+        with self.assertNumQueries(0):
+            self.assertFalse(follow_cache.is_following(self.user, self.author))
+
+    def test_follow_and_unfollow_reset_cache(self):
+        """Подписка и отписка сбрасывают закэшированное множество."""
+        profile_url = reverse(
+            'posts:profile', kwargs={'username': self.author.username}
+        )
+        self.assertFalse(self.client.get(profile_url).context['following'])
+        self.client.get(reverse(
+            'posts:profile_follow',
+            kwargs={'username': self.author.username},
+        ))
+        self.assertTrue(self.client.get(profile_url).context['following'])
+        self.client.get(reverse(
+            'posts:profile_unfollow',
+            kwargs={'username': self.author.username},
+        ))
+        self.assertFalse(self.client.get(profile_url).context['following'])
+
+
+class FollowCacheCommitTests(TransactionTestCase):
+    def test_set_read_before_commit_is_dropped(self):
+        """Множество, закэшированное до коммита подписки, не живёт
+        дальше коммита."""
+        user = User.objects.create_user(username='follower')
+        author = User.objects.create_user(username='author')
+        with transaction.atomic():
+            Follow.objects.create(user=user, author=author)
+            # Так кэш заполнил бы запрос из другого соединения.
+            key = f'follow_set:{user.pk}:{follow_cache._version(user.pk)}'
+            cache.set(key, b'')
+        self.assertTrue(follow_cache.is_following(user, author))
+
+
+class FollowGraphTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='user')
+        cls.friend = User.objects.create_user(username='friend')
+        cls.stranger = User.objects.create_user(username='stranger')
+        Follow.objects.create(user=cls.user, author=cls.friend)
+        Follow.objects.create(user=cls.friend, author=cls.stranger)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+
+    def test_followers_and_following_pages(self):
+        """Страницы подписчиков и подписок показывают нужных людей."""
+        response = self.client.get(reverse(
+            'posts:followers', kwargs={'username': self.friend.username}
+        ))
+        self.assertEqual(list(response.context['page_obj']), [self.user])
+        response = self.client.get(reverse(
+            'posts:following', kwargs={'username': self.friend.username}
+        ))
+        self.assertEqual(list(response.context['page_obj']), [self.stranger])
+
+    def test_follow_resets_cached_followers(self):
+        """Подписка и отписка сбрасывают закэшированный список."""
+        self.assertEqual(
+            list(follow_graph.followers(self.stranger.pk)), [self.friend.pk]
+        )
+        follow = Follow.objects.create(user=self.user, author=self.stranger)
+        self.assertEqual(
+            list(follow_graph.followers(self.stranger.pk)),
+            sorted([self.friend.pk, self.user.pk]),
+        )
+        with self.assertNumQueries(0):
+            follow_graph.followers(self.stranger.pk)
+        follow.delete()
+        self.assertEqual(
+            list(follow_graph.followers(self.stranger.pk)), [self.friend.pk]
+        )
+
+    def test_profile_counts_followers_without_list(self):
+        """Профиль берёт число подписчиков, а не весь их список."""
+        url = reverse('posts:profile', args=[self.stranger.username])
+        with mock.patch.object(follow_graph, 'followers') as followers:
+            response = self.client.get(url)
+        followers.assert_not_called()
+        self.assertEqual(response.context['followers_count'], 1)
+        Follow.objects.create(user=self.user, author=self.stranger)
+        self.assertEqual(
+            self.client.get(url).context['followers_count'], 2
+        )
+
+    def test_suggestions_are_precomputed(self):
+        """Рекомендации считаются командой и показываются в ленте."""
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.context['suggested_authors'], [])
+        call_command('build_follow_suggestions', stdout=StringIO())
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(
+            response.context['suggested_authors'], [self.stranger]
+        )
+        # Рекомендация пропадает сразу после подписки, до пересчёта.
+        Follow.objects.create(user=self.user, author=self.stranger)
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.context['suggested_authors'], [])
+
+
+class FollowBatchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='user')
+        cls.authors = [
+            User.objects.create_user(username=f'author{i}') for i in range(3)
+        ]
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+        self.url = reverse('posts:follow_batch')
+
+    def test_batch_follow_is_idempotent(self):
+        """Пакетная подписка пропускает несуществующих и не дублирует."""
+        data = {'usernames': ['author0', 'author1', 'nobody', 'user']}
+        for _ in range(2):
+            response = self.client.post(self.url, data)
+            self.assertEqual(response.json()['missing'], ['nobody'])
+        self.assertEqual(
+            set(Follow.objects.filter(user=self.user)
+                .values_list('author_id', flat=True)),
+            {self.authors[0].pk, self.authors[1].pk},
+        )
+        self.assertTrue(
+            follow_cache.is_following(self.user, self.authors[1])
+        )
+
+    def test_batch_follow_notifies_new_authors(self):
+        """Уведомление и граф получают только новые подписки."""
+        Follow.objects.create(user=self.user, author=self.authors[0])
+        follow_cache.following_ids(self.user)
+        with mock.patch.object(
+            notifications, 'follower_added'
+        ) as added, mock.patch.object(
+            follow_cache, 'invalidate', wraps=follow_cache.invalidate
+        ) as invalidate:
+            self.client.post(self.url, {
+                'usernames': ['author0', 'author1'],
+            })
+        invalidate.assert_called_once_with(self.user.pk)
+        self.assertEqual(
+            [call.args[0].author_id for call in added.call_args_list],
+            [self.authors[1].pk],
+        )
+        self.assertEqual(
+            list(follow_graph.followers(self.authors[1].pk)), [self.user.pk]
+        )
+
+    def test_batch_unfollow(self):
+        """Пакетная отписка удаляет только перечисленных авторов."""
+        for author in self.authors:
+            Follow.objects.create(user=self.user, author=author)
+        with mock.patch.object(
+            follow_cache, 'invalidate', wraps=follow_cache.invalidate
+        ) as invalidate, mock.patch.object(
+            follow_graph, 'followers_changed',
+            wraps=follow_graph.followers_changed,
+        ) as followers_changed:
+            self.client.post(self.url, {
+                'usernames': ['author0', 'author2'], 'action': 'unfollow',
+            })
+        # Кэши сбрасываются по разу на пачку, а не на каждую строку.
+        invalidate.assert_called_once_with(self.user.pk)
+        followers_changed.assert_called_once()
+        self.assertEqual(
+            set(followers_changed.call_args.args),
+            {self.authors[0].pk, self.authors[2].pk},
+        )
+        self.assertEqual(
+            list(Follow.objects.filter(user=self.user)
+                 .values_list('author_id', flat=True)),
+            [self.authors[1].pk],
+        )
+        self.assertFalse(
+            follow_cache.is_following(self.user, self.authors[0])
+        )
+        self.assertEqual(list(follow_graph.followers(self.authors[2].pk)), [])
+
+    def test_batch_rejects_get(self):
+        """Эндпоинт принимает только POST."""
+        self.assertEqual(self.client.get(self.url).status_code, 405)
+
+
+class GroupIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username='user')
+        for i in range(3):
+            group = Group.objects.create(title=f'Группа {i}', slug=f'g-{i}')
+            Post.objects.create(author=user, text='Пост', group=group)
+
+    def test_group_index_does_not_count_per_group(self):
+        """Список групп берёт статистику из таблицы, без запроса на
+        каждую группу."""
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse('posts:group_index'))
+        groups = list(response.context['page_obj'])
+        self.assertEqual(len(groups), 3)
+        self.assertEqual(groups[0].stats.posts_count, 1)
+
+
+class LoadersTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='group')
+        cls.post = Post.objects.create(
+            author=cls.author, text='Пост', group=cls.group
+        )
+        Post.objects.create(author=cls.author, text='Пост без группы')
+        for user in (cls.author, cls.reader, cls.reader):
+            Comment.objects.create(post=cls.post, author=user, text='Да')
+
+    def test_keys_are_batched_and_deduplicated(self):
+        """Каждый загрузчик - один запрос на все ключи, повторы и уже
+        выбранное не запрашиваются."""
+        data = loaders.Loaders()
+        posts = list(Post.objects.order_by('pk'))
+        comments = list(Comment.objects.all())
+        data.attach(posts, 'author', 'group')
+        data.attach(comments, 'author')
+        with self.assertNumQueries(2):
+            data.resolve()
+        with self.assertNumQueries(0):
+            self.assertEqual(posts[0].author, self.author)
+            self.assertEqual(posts[0].group, self.group)
+            self.assertIsNone(posts[1].group)
+            self.assertEqual(
+                {comment.author.username for comment in comments},
+                {'author', 'reader'},
+            )
+            reader = data.users.load(self.reader.pk)
+            self.assertEqual(reader.value, self.reader)
+
+    def test_post_detail_queries_do_not_grow_with_comments(self):
+        """Пост с числом постов автора и комментарии с авторами - два
+        запроса при любом числе комментариев."""
+        url = reverse('posts:post_detail', args=[self.post.pk])
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(response.context['posts_count'], 2)
+        for number in range(5):
+            Comment.objects.create(
+                post=self.post,
+                author=User.objects.create_user(username=f'user-{number}'),
+                text='Ещё',
+            )
+        with self.assertNumQueries(2):
+            self.client.get(url)
+
+
+class FollowPollTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.old = Post.objects.create(author=cls.author, text='Старый')
+        cls.new = Post.objects.create(author=cls.author, text='Новый')
+        cls.other = Post.objects.create(author=cls.reader, text='Свой')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.reader)
+
+    def test_poll_counts_newer_followed_posts(self):
+        response = self.client.get(
+            reverse('posts:follow_poll'), {'after': self.old.pk}
+        )
+        self.assertEqual(
+            response.json(), {'count': 1, 'last_id': self.new.pk}
+        )
+        response = self.client.get(
+            reverse('posts:follow_poll'), {'after': self.new.pk}
+        )
+        self.assertEqual(
+            response.json(), {'count': 0, 'last_id': self.new.pk}
+        )
+
+    def test_follow_new_returns_only_newer_posts(self):
+        response = self.client.get(
+            reverse('posts:follow_new'), {'after': self.old.pk}
+        )
+        self.assertEqual(list(response.context['posts']), [self.new])
+        self.assertEqual(response['X-Last-Post-Id'], str(self.new.pk))
+        response = self.client.get(reverse('posts:follow_index'))
+        self.assertEqual(response.context['last_post_id'], self.new.pk)
+
+
+class TrendingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='author')
+        cls.reader = User.objects.create_user(username='reader')
+        cls.group = Group.objects.create(title='Группа', slug='trend')
+        cls.quiet = Post.objects.create(author=cls.author, text='Тихий')
+        cls.popular = Post.objects.create(
+            author=cls.author, text='Популярный', group=cls.group
+        )
+
+    def comment(self, post, hours_ago=0):
+        comment = Comment.objects.create(
+            post=post, author=self.reader, text='Комментарий'
+        )
+        Comment.objects.filter(pk=comment.pk).update(
+            created=timezone.now() - timedelta(hours=hours_ago)
+        )
+
+    def test_fresh_comments_outrank_old_ones(self):
+        """Свежий комментарий весит больше двух суточной давности."""
+        self.comment(self.quiet, hours_ago=48)
+        self.comment(self.quiet, hours_ago=48)
+        self.comment(self.popular)
+        trending.update()
+        self.assertEqual(
+            list(trending.trending_posts()), [self.popular, self.quiet]
+        )
+        self.assertEqual(
+            self.group.ranking.score, self.popular.ranking.score
+        )
+
+    def test_update_is_incremental(self):
+        """Повторный запуск не учитывает уже посчитанные события."""
+        self.comment(self.popular)
+        trending.update()
+        score = PostRanking.objects.get(post=self.popular).score
+        trending.update()
+        self.assertEqual(
+            PostRanking.objects.get(post=self.popular).score, score
+        )
+        self.comment(self.popular)
+        trending.update()
+        self.assertGreater(
+            PostRanking.objects.get(post=self.popular).score, score
+        )
+
+    def test_follow_raises_author_posts(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(trending.update(), (2, 1))
+
+    def test_stale_rankings_are_pruned(self):
+        self.comment(self.popular)
+        trending.update()
+        trending.update(
+            now=timezone.now()
+            + timedelta(hours=settings.TRENDING_WINDOW_HOURS * 2)
+        )
+        self.assertFalse(PostRanking.objects.exists())
+
+    def test_trending_page_uses_ranking_table(self):
+        self.comment(self.popular)
+        call_command('update_trending', stdout=StringIO())
+        with self.assertNumQueries(3):
+            response = self.client.get(reverse('posts:trending'))
+        self.assertEqual(list(response.context['page_obj']), [self.popular])
+        self.assertEqual(
+            [ranking.group for ranking in response.context['top_groups']],
+            [self.group],
+        )
+
+
+@override_settings(POSTS_HOT_LIST_SIZE=15)
+class HotListTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='author')
+        self.group = Group.objects.create(title='Группа', slug='hot')
+        for i in range(20):
+            Post.objects.create(author=self.user, text=f'Пост {i}',
+                                group=self.group)
+        hot_list.warm()
+
+    def test_first_page_is_served_from_memory(self):
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('posts:index'))
+        page_obj = response.context['page_obj']
+        self.assertEqual(list(page_obj), list(Post.objects.all()[:10]))
+        self.assertEqual(page_obj.paginator.num_pages, 2)
+        self.assertContains(response, reverse('posts:group_list',
+                                              args=['hot']))
+
+    def test_pages_beyond_buffer_hit_database(self):
+        response = self.client.get(reverse('posts:index') + '?page=2')
+        self.assertEqual(list(response.context['page_obj']),
+                         list(Post.objects.all()[10:]))
+
+    def test_signals_keep_buffer_current(self):
+        post = Post.objects.create(author=self.user, text='Новый')
+        Post.objects.filter(text='Пост 19').delete()
+        records, total = hot_list.snapshot()
+        self.assertEqual(records[0], post)
+        self.assertNotIn('Пост 19', [record.text for record in records])
+        self.assertEqual(total, 20)
+
+    def test_only_shown_fields_reset_buffer(self):
+        self.user.set_password('secret-password')
+        self.user.save()
+        version = cache.get(hot_list.VERSION_KEY)
+        self.client.login(username='author', password='secret-password')
+        group = Group.objects.get(slug='hot')
+        group.description = 'Новое описание'
+        group.save()
+        self.assertEqual(cache.get(hot_list.VERSION_KEY), version)
+        group.title = 'Новое название'
+        group.save()
+        self.assertEqual(cache.get(hot_list.VERSION_KEY), version + 1)
+        self.user.first_name = 'Имя'
+        self.user.save(update_fields=['first_name'])
+        self.assertEqual(cache.get(hot_list.VERSION_KEY), version + 2)
+
+    def test_other_process_change_reloads_buffer(self):
+        Post.objects.filter(text='Пост 19').update(text='Чужая правка')
+        hot_list.invalidate()
+        with self.assertNumQueries(2):
+            records, _ = hot_list.snapshot()
+        self.assertEqual(records[0].text, 'Чужая правка')
+
+
+class UsernameResolverTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='author')
+
+    def test_missing_username_is_cached(self):
+        url = reverse('posts:profile', args=['nobody'])
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(url).status_code, 404)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(url).status_code, 404)
+        User.objects.create_user(username='nobody')
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_rename_and_delete_reset_cache(self):
+        self.assertEqual(usernames.resolve('author'), self.user.pk)
+        self.user.username = 'renamed'
+        self.user.save()
+        self.assertIsNone(usernames.resolve('author'))
+        self.assertEqual(usernames.resolve('renamed'), self.user.pk)
+        self.user.delete()
+        self.assertIsNone(usernames.resolve('renamed'))
+
+    def test_rename_resets_cache_after_commit(self):
+        """Логин, перечитанный до коммита переименования, не остаётся в
+        кэше."""
+        with transaction.atomic():
+            self.user.username = 'renamed'
+            self.user.save()
+            # Так кэш заполнил бы запрос из другого соединения.
+            cache.set(usernames._key('author'), self.user.pk)
+        self.assertIsNone(usernames.resolve('author'))
+
+    def test_follow_uses_resolved_id(self):
+        follower = User.objects.create_user(username='follower')
+        self.client.force_login(follower)
+        usernames.resolve('author')
+        self.client.get(reverse('posts:profile_follow', args=['author']))
+        self.assertTrue(
+            Follow.objects.filter(user=follower, author=self.user).exists()
+        )
+        self.client.get(reverse('posts:profile_unfollow', args=['author']))
+        self.assertFalse(Follow.objects.exists())
+
+    def test_signup_checks_username_through_cache(self):
+        usernames.resolve('author')
+        form = CreationForm(data={
+            'username': 'author',
+            'password1': 'Strong-pass-123',
+            'password2': 'Strong-pass-123',
+        })
+        with self.assertNumQueries(0):
+            self.assertFalse(form.is_valid())
+        self.assertIn('username', form.errors)
+
+    def test_signup_checks_database_behind_stale_cache(self):
+        """Логин, который кэш помнит свободным, проверяется по базе."""
+        usernames.resolve('ghost')
+        # Как generate_dataset: вставка без сигналов, кэш не сброшен.
+        User.objects.bulk_create([User(username='ghost')])
+        form = CreationForm(data={
+            'username': 'ghost',
+            'password1': 'Strong-pass-123',
+            'password2': 'Strong-pass-123',
+        })
+        self.assertFalse(form.is_valid())
+        self.assertIn('username', form.errors)
+
+
+class NotificationsTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(
+            username='author', email='author@yatube.ru'
+        )
+        self.post = Post.objects.create(author=self.author, text='Пост')
+        self.readers = [
+            User.objects.create_user(username=f'reader{i}') for i in range(2)
+        ]
+        self.clients = []
+        for reader in self.readers:
+            client = Client()
+            client.force_login(reader)
+            self.clients.append(client)
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def comment(self, client):
+        client.post(
+            reverse('posts:add_comment', args=[self.post.pk]),
+            {'text': 'Комментарий'},
+        )
+
+    @override_settings(NOTIFICATIONS_FLUSH_SECONDS=60)
+    def test_burst_is_coalesced_on_flush(self):
+        for client in (*self.clients, self.clients[0]):
+            self.comment(client)
+        self.assertFalse(Notification.objects.exists())
+        self.assertEqual(notifications.flush(), 3)
+        notification = Notification.objects.get()
+        self.assertEqual(notification.recipient, self.author)
+        self.assertEqual(notification.count, 3)
+        self.assertEqual(notification.actor, self.readers[0])
+        self.comment(self.clients[1])
+        notifications.flush()
+        self.assertEqual(Notification.objects.get().count, 4)
+
+    def test_follow_and_own_comment(self):
+        self.clients[0].get(
+            reverse('posts:profile_follow', args=[self.author.username])
+        )
+        self.clients[0].get(
+            reverse('posts:profile_follow', args=[self.author.username])
+        )
+        self.comment(self.author_client)
+        notification = Notification.objects.get()
+        self.assertEqual(notification.kind, Notification.FOLLOW)
+        self.assertEqual(notification.count, 1)
+
+    @override_settings(NOTIFICATIONS_FLUSH_SECONDS=60)
+    def test_flush_adds_to_row_written_by_other_process(self):
+        """Буфер дописывается в непрочитанную строку другого процесса,
+        второй такой строки база не примет."""
+        Notification.objects.create(
+            recipient=self.author, kind=Notification.FOLLOW, count=2,
+            updated=timezone.now(),
+        )
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Notification.objects.create(
+                recipient=self.author, kind=Notification.FOLLOW,
+                updated=timezone.now(),
+            )
+        for client in self.clients:
+            client.get(
+                reverse('posts:profile_follow', args=[self.author.username])
+            )
+        notifications.flush()
+        notification = Notification.objects.get()
+        self.assertEqual(notification.count, 4)
+        self.assertEqual(notification.actor, self.readers[1])
+
+    def test_inbox_marks_read_and_resets_count(self):
+        self.comment(self.clients[0])
+        self.assertEqual(notifications.unread_count(self.author), 1)
+        with self.assertNumQueries(0):
+            notifications.unread_count(self.author)
+        response = self.author_client.get(reverse('posts:notifications'))
+        self.assertContains(response, 'Новых комментариев к посту')
+        self.assertEqual(notifications.unread_count(self.author), 0)
+        # Прочитанное уведомление не растёт, новое событие - новая строка.
+        self.comment(self.clients[1])
+        self.assertEqual(Notification.objects.count(), 2)
+        self.assertEqual(notifications.unread_count(self.author), 1)
+
+    def test_digest_sends_only_new_events(self):
+        self.comment(self.clients[0])
+        self.comment(self.clients[1])
+        out = StringIO()
+        call_command('send_notification_digests', stdout=out)
+        self.assertIn('Отправлено писем: 1', out.getvalue())
+        self.assertEqual(mail.outbox[0].to, ['author@yatube.ru'])
+        self.assertIn('новых комментариев к посту «Пост»: 2',
+                      mail.outbox[0].body)
+        self.assertEqual(notifications.send_digests(), 0)
+        self.comment(self.clients[0])
+        self.assertEqual(notifications.send_digests(), 1)
+        self.assertIn('«Пост»: 1', mail.outbox[1].body)
+
+
+class PostAdminTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        cls.group = Group.objects.create(title='Группа', slug='admin')
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def add_posts(self, count, prefix='author'):
+        for i in range(count):
+            author = User.objects.create_user(username=f'{prefix}-{i}')
+            Post.objects.create(author=author, text='Пост', group=self.group)
+
+    def changelist_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(
+                reverse('admin:posts_post_changelist')
+            )
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_changelist_queries_do_not_grow_with_rows(self):
+        """Список постов не делает запросов на каждую строку."""
+        self.add_posts(2)
+        queries = self.changelist_queries()
+        self.add_posts(10, prefix='more')
+        self.assertEqual(self.changelist_queries(), queries)
+
+    def test_search_by_author_login(self):
+        self.add_posts(2)
+        response = self.client.get(
+            reverse('admin:posts_post_changelist'), {'q': '@author-1'}
+        )
+        authors = [
+            post.author.username
+            for post in response.context['cl'].result_list
+        ]
+        self.assertEqual(authors, ['author-1'])
+
+    def test_move_action_runs_in_background(self):
+        self.add_posts(3)
+        target = Group.objects.create(title='Другая', slug='other')
+        pks = list(Post.objects.values_list('pk', flat=True)[:2])
+        self.client.post(reverse('admin:posts_post_changelist'), {
+            'action': 'move_to_group',
+            'group': target.pk,
+            '_selected_action': pks,
+        })
+        self.assertEqual(target.posts.count(), 0)
+        call_command('run_jobs', '--once', '--batch-size=1',
+                     stdout=StringIO())
+        self.assertEqual(set(target.posts.values_list('pk', flat=True)),
+                         set(pks))
+        target.stats.refresh_from_db()
+        self.group.stats.refresh_from_db()
+        self.assertEqual(target.stats.posts_count, 2)
+        self.assertEqual(self.group.stats.posts_count, 1)
+
+    def test_group_delete_action_removes_posts_and_comments(self):
+        self.add_posts(3)
+        post = Post.objects.first()
+        Comment.objects.create(post=post, author=self.admin, text='Спам')
+        self.client.post(reverse('admin:posts_group_changelist'), {
+            'action': 'delete_posts',
+            '_selected_action': [self.group.pk],
+        })
+        call_command('run_jobs', '--once', stdout=StringIO())
+        self.assertFalse(Post.objects.exists())
+        self.assertFalse(Comment.objects.exists())
+        self.group.stats.refresh_from_db()
+        self.assertEqual(self.group.stats.posts_count, 0)
+
+
+class PurgeUserTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.spammer = User.objects.create_user(username='spammer')
+        self.reader = User.objects.create_user(username='reader')
+        self.group = Group.objects.create(title='Группа', slug='spam')
+        self.own_post = Post.objects.create(author=self.reader, text='Свой')
+        for i in range(5):
+            post = Post.objects.create(
+                author=self.spammer, text=f'Спам {i}', group=self.group
+            )
+            Comment.objects.create(post=post, author=self.reader, text='Фу')
+            Comment.objects.create(
+                post=self.own_post, author=self.spammer, text='Купи'
+            )
+        Follow.objects.create(user=self.reader, author=self.spammer)
+        Follow.objects.create(user=self.spammer, author=self.reader)
+
+    def test_command_removes_everything_in_batches(self):
+        post = self.spammer.posts.first()
+        post.image = SimpleUploadedFile(
+            'spam.gif',
+            b'\x47\x49\x46\x38\x39\x61\x01\x00\x01\x00\x00\x00\x00\x21'
+            b'\xf9\x04\x01\x0a\x00\x01\x00\x2c\x00\x00\x00\x00\x01\x00'
+            b'\x01\x00\x00\x02\x02\x4c\x01\x00\x3b',
+            content_type='image/gif',
+        )
+        post.save()
+        name = post.image.name
+        self.assertTrue(follow_cache.is_following(self.reader, self.spammer))
+        out = StringIO()
+        call_command('purge_user', 'spammer', 'ghost', '--batch-size=2',
+                     '--pause=0', stdout=out)
+        self.assertFalse(User.objects.filter(username='spammer').exists())
+        self.assertFalse(Post.objects.filter(text__startswith='Спам').exists())
+        self.assertEqual(Comment.objects.count(), 0)
+        self.assertEqual(Follow.objects.count(), 0)
+        self.assertTrue(Post.objects.filter(pk=self.own_post.pk).exists())
+        self.assertFalse(default_storage.exists(name))
+        self.group.stats.refresh_from_db()
+        self.assertEqual(self.group.stats.posts_count, 0)
+        self.assertEqual(follow_cache.following_ids(self.reader), frozenset())
+        self.assertIn('посты - 5 строк', out.getvalue())
+        self.assertIn('ghost: не найден', out.getvalue())
+
+    def test_interrupted_purge_can_be_resumed(self):
+        with mock.patch('posts.purge.delete_posts',
+                        side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                purge.purge_user(self.spammer.pk, batch_size=2, pause=0)
+        self.assertEqual(Comment.objects.filter(author=self.spammer).count(),
+                         0)
+        self.assertEqual(self.spammer.posts.count(), 5)
+        purge.purge_user(self.spammer.pk, batch_size=2, pause=0)
+        self.assertFalse(User.objects.filter(pk=self.spammer.pk).exists())
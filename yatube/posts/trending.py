@@ -0,0 +1,120 @@
+"""Рейтинг «Популярное» для постов и групп.
+
+Каждое событие (комментарий к посту, новый подписчик у автора) весит
+тем меньше, чем оно старше, с периодом полураспада
+TRENDING_HALF_LIFE_HOURS. Чтобы не пересчитывать старые строки при
+каждом запуске, вес считается не от «сейчас», а от фиксированной эпохи:
+событие в момент t весит 2 ** ((t - EPOCH) / half_life). Тогда у всех
+постов затухание общее, порядок от времени не зависит, и новые события
+просто прибавляются к рейтингу. Числа растут экспоненциально, поэтому
+хранится их логарифм.
+"""
+import math
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .models import Comment, Follow, GroupRanking, Post, PostRanking
+
+EPOCH = datetime(2020, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def log_weight(moment, weight=1.0):
+    half_life = settings.TRENDING_HALF_LIFE_HOURS * 3600
+    age = (moment - EPOCH).total_seconds()
+    return math.log(weight) + math.log(2) * age / half_life
+
+
+def log_add(first, second):
+    """log(e ** first + e ** second) без переполнения."""
+    if first is None:
+        return second
+    high, low = max(first, second), min(first, second)
+    return high + math.log1p(math.exp(low - high))
+
+
+def collect_events(since, until):
+    """Логарифмические веса новых событий по постам и группам."""
+    posts, groups = {}, {}
+
+    def add(post_id, group_id, value):
+        posts[post_id] = log_add(posts.get(post_id), value)
+        if group_id is not None:
+            groups[group_id] = log_add(groups.get(group_id), value)
+
+    for post_id, group_id, created in Comment.objects.filter(
+        created__gt=since, created__lte=until
+    ).values_list('post_id', 'post__group_id', 'created'):
+        add(post_id, group_id, log_weight(created))
+
+    # Новый подписчик поднимает свежие посты автора.
+    follows = {}
+    for author_id, created in Follow.objects.filter(
+        created__gt=since, created__lte=until, author__isnull=False
+    ).values_list('author_id', 'created'):
+        follows.setdefault(author_id, []).append(created)
+    window = timedelta(hours=settings.TRENDING_WINDOW_HOURS)
+    for post_id, author_id, group_id in Post.objects.filter(
+        author_id__in=follows, pub_date__gte=until - window
+    ).values_list('pk', 'author_id', 'group_id'):
+        for created in follows[author_id]:
+            add(post_id, group_id, log_weight(
+                created, settings.TRENDING_FOLLOW_WEIGHT
+            ))
+    return posts, groups
+
+
+def _merge(model, key, scores, now):
+    existing = model.objects.in_bulk(list(scores))
+    created, updated = [], []
+    for pk, value in scores.items():
+        row = existing.get(pk)
+        if row is None:
+            created.append(model(**{key: pk}, score=value, updated=now))
+        else:
+            row.score = log_add(row.score, value)
+            row.updated = now
+            updated.append(row)
+    model.objects.bulk_create(created, batch_size=500)
+    model.objects.bulk_update(updated, ['score', 'updated'], batch_size=500)
+
+
+def update(now=None):
+    """Добавляет в рейтинг события с прошлого запуска.
+
+    Граница прошлого запуска - самая поздняя дата пересчёта в таблице;
+    при первом запуске берётся окно TRENDING_WINDOW_HOURS. Старые
+    строки, чей рейтинг затух ниже порога, удаляются.
+    """
+    now = now or timezone.now()
+    window = timedelta(hours=settings.TRENDING_WINDOW_HOURS)
+    since = (
+        PostRanking.objects.aggregate(last=Max('updated'))['last']
+        or now - window
+    )
+    posts, groups = collect_events(since, now)
+    with transaction.atomic():
+        _merge(PostRanking, 'post_id', posts, now)
+        _merge(GroupRanking, 'group_id', groups, now)
+        threshold = log_weight(now - window)
+        PostRanking.objects.filter(score__lt=threshold).delete()
+        GroupRanking.objects.filter(score__lt=threshold).delete()
+    return len(posts), len(groups)
+
+
+def trending_posts():
+    return (
+        Post.objects.filter(ranking__isnull=False)
+        .select_related('author', 'group')
+        .order_by('-ranking__score')
+    )
+
+
+def trending_groups(limit=5):
+    return (
+        GroupRanking.objects.select_related('group')
+        .order_by('-score')[:limit]
+    )
@@ -1,12 +1,17 @@
-from django.urls import path
+from django.urls import path, register_converter
 
 from . import views
+from .usernames import UsernameConverter
 
 app_name = 'posts'
 
+register_converter(UsernameConverter, 'username')
+
 urlpatterns = [
     path('', views.index, name='index'),
     path('page=<int:page>/', views.index, name='index'),
+    path('trending/', views.trending_index, name='trending'),
+    path('group/', views.group_index, name='group_index'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
     path(
         'group/<slug:slug>/page=<int:page>/',
@@ -14,21 +19,31 @@ urlpatterns = [
         name='group_list'
     ),
     path(
-        'profile/<str:username>/page=<int:page>/',
+        'profile/<username:username>/page=<int:page>/',
         views.profile,
         name='profile'
     ),
     path(
-        'profile/<str:username>/follow/',
+        'profile/<username:username>/follow/',
         views.profile_follow,
         name='profile_follow'
     ),
     path(
-        'profile/<str:username>/unfollow/',
+        'profile/<username:username>/unfollow/',
         views.profile_unfollow,
         name='profile_unfollow'
     ),
-    path('profile/<str:username>/', views.profile, name='profile'),
+    path(
+        'profile/<username:username>/followers/',
+        views.author_followers,
+        name='followers'
+    ),
+    path(
+        'profile/<username:username>/following/',
+        views.author_following,
+        name='following'
+    ),
+    path('profile/<username:username>/', views.profile, name='profile'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
     path(
         'posts/<int:post_id>/comment/',
@@ -43,4 +58,12 @@ urlpatterns = [
         name='follow_index'
     ),
     path('follow/', views.follow_index, name='follow_index'),
+    path('follow/batch/', views.follow_batch, name='follow_batch'),
+    path('follow/poll/', views.follow_poll, name='follow_poll'),
+    path('follow/new/', views.follow_new, name='follow_new'),
+    path(
+        'notifications/',
+        views.notification_index,
+        name='notifications'
+    ),
 ]
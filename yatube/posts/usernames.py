@@ -0,0 +1,59 @@
+"""Кэш логин -> id пользователя для адресов profile/<username>/....
+
+Профиль, подписка, отписка и списки подписчиков находят автора по
+логину в каждом запросе. Конвертер username в posts.urls берёт id из
+кэша, а несуществующий логин запоминает нулём на короткое
+USERNAME_MISSING_TIMEOUT: перебор адресов профилей получает 404 ещё при
+разборе URL, не доходя до базы. Сигналы пользователя после коммита
+сбрасывают ключ при регистрации, смене логина и удалении.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import User
+
+
+def _key(username):
+    # Логин может содержать символы, недопустимые в ключах memcached.
+    return f'username:{hashlib.md5(username.encode()).hexdigest()}'
+
+
+def resolve(username):
+    """id пользователя с таким логином или None."""
+    key = _key(username)
+    user_id = cache.get(key)
+    if user_id is None:
+        user_id = User.objects.filter(username=username).values_list(
+            'pk', flat=True
+        ).first() or 0
+        cache.set(key, user_id, (
+            settings.USERNAME_CACHE_TIMEOUT if user_id
+            else settings.USERNAME_MISSING_TIMEOUT
+        ))
+    return user_id or None
+
+
+def invalidate(*usernames):
+    cache.delete_many([_key(username) for username in usernames])
+
+
+class Username(str):
+    """Логин из URL вместе с id пользователя."""
+    user_id = None
+
+
+class UsernameConverter:
+    regex = '[^/]+'
+
+    def to_python(self, value):
+        user_id = resolve(value)
+        if user_id is None:
+            raise ValueError(value)
+        username = Username(value)
+        username.user_id = user_id
+        return username
+
+    def to_url(self, value):
+        return str(value)
@@ -1,58 +1,154 @@
+from django.conf import settings
 from django.core.paginator import Paginator
 from django.contrib.auth.decorators import login_required
+from django.db.models import Count, OuterRef, Subquery
+from django.http import JsonResponse
 from django.shortcuts import (
     render, get_object_or_404, redirect
 )
-from .models import Post, Group, Follow, User
+from django.views.decorators.http import require_POST
+
+from core.concurrency import gather
+from core.ratelimit import ratelimit
+from . import (
+    follow_cache, follow_graph, hot_list, loaders, notifications, trending,
+)
+from .models import Comment, Post, Group, Follow, User
 from .forms import PostForm, CommentForm
 
 
+POSTS_PER_PAGE = 10
+
+
 def paginator(request, post_list):
-    paginator = Paginator(post_list, 10)
+    paginator = Paginator(post_list, POSTS_PER_PAGE)
     page_number = request.GET.get('page')
     return paginator.get_page(page_number)
 
 
+def fetch_page(post_list, page_number):
+    """Страница, уже выбранная из базы: для выборок через gather."""
+    page_obj = Paginator(post_list, POSTS_PER_PAGE).get_page(page_number)
+    page_obj.object_list = list(page_obj.object_list)
+    return page_obj
+
+
 def index(request):
-    post_list = Post.objects.all()
-    context = {'page_obj': paginator(request, post_list)}
+    page_obj = hot_list.get_page(request.GET.get('page'), POSTS_PER_PAGE)
+    if page_obj is None:
+        page_obj = paginator(request, Post.objects.all())
+    context = {'page_obj': page_obj}
     return render(request, 'posts/index.html', context)
 
 
 def group_posts(request, slug):
-    group = get_object_or_404(Group, slug=slug)
-    post_list = group.posts.all()
+    page_number = request.GET.get('page')
+    group, page_obj = gather(
+        lambda: get_object_or_404(Group, slug=slug),
+        lambda: fetch_page(
+            Post.objects.filter(group__slug=slug)
+            .select_related('author', 'group'),
+            page_number,
+        ),
+    )
     context = {
         'group': group,
-        'page_obj': paginator(request, post_list),
+        'page_obj': page_obj,
     }
     return render(request, 'posts/group_list.html', context)
 
 
+def group_index(request):
+    groups = Group.objects.select_related('stats').order_by('title')
+    context = {'page_obj': paginator(request, groups)}
+    return render(request, 'posts/group_index.html', context)
+
+
+def trending_index(request):
+    context = {
+        'page_obj': paginator(request, trending.trending_posts()),
+        'top_groups': trending.trending_groups(),
+    }
+    return render(request, 'posts/trending.html', context)
+
+
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    post_list = author.posts.all()
+    author = get_object_or_404(User, pk=username.user_id)
     if author.get_full_name():
         author_name = author.get_full_name()
     else:
         author_name = author.username
-    following = request.user.is_authenticated and Follow.objects.filter(
-        user=request.user,
-        author=author,
-    ).exists()
+    page_number = request.GET.get('page')
+    user = request.user
+    page_obj, following, followers_count, following_ids = gather(
+        lambda: fetch_page(author.posts.all(), page_number),
+        lambda: follow_cache.is_following(user, author),
+        lambda: follow_graph.followers_count(author.pk),
+        lambda: follow_cache.following_ids(author),
+    )
     context = {
-        'page_obj': paginator(request, post_list),
-        'posts_count': post_list.count(),
+        'page_obj': page_obj,
+        'posts_count': page_obj.paginator.count,
         'author_name': author_name,
         'author': author,
         'following': following,
+        'followers_count': followers_count,
+        'following_count': len(following_ids),
     }
+    data = loaders.for_request(request)
+    data.users.prime(author.pk, author)
+    data.attach(page_obj, 'author', 'group')
+    data.resolve()
     return render(request, 'posts/profile.html', context)
 
 
+def follow_list(request, username, title, get_ids):
+    author = get_object_or_404(User, pk=username.user_id)
+    page_obj = paginator(request, get_ids(author))
+    users = User.objects.in_bulk(page_obj.object_list)
+    page_obj.object_list = [
+        users[user_id] for user_id in page_obj.object_list
+        if user_id in users
+    ]
+    context = {
+        'author': author,
+        'title': title,
+        'page_obj': page_obj,
+    }
+    return render(request, 'posts/follow_list.html', context)
+
+
+def author_followers(request, username):
+    return follow_list(
+        request, username, 'Подписчики',
+        lambda author: follow_graph.followers(author.pk),
+    )
+
+
+def author_following(request, username):
+    return follow_list(
+        request, username, 'Подписки', follow_graph.following,
+    )
+
+
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
-    comments = post.comments.all()
+    # Число постов автора приходит подзапросом вместе с постом, а авторы
+    # комментариев - джойном: два запроса при любом числе комментариев.
+    post, comments = gather(
+        lambda: get_object_or_404(
+            Post.objects.select_related('author', 'group').annotate(
+                author_posts=Subquery(
+                    Post.objects.filter(author=OuterRef('author'))
+                    .order_by().values('author')
+                    .annotate(count=Count('pk')).values('count')
+                )
+            ),
+            pk=post_id,
+        ),
+        lambda: list(
+            Comment.objects.filter(post_id=post_id).select_related('author')
+        ),
+    )
     if request.method == 'POST':
         author = Post(author=request.user)
         form = CommentForm(request.POST, instance=author)
@@ -62,7 +158,7 @@ def post_detail(request, post_id):
     form = CommentForm()
     context = {
         'post': post,
-        'posts_count': post.author.posts.count(),
+        'posts_count': post.author_posts,
         'form': form,
         'comments': comments,
     }
@@ -129,29 +225,172 @@ def add_comment(request, post_id):
         comment.author = request.user
         comment.post = post
         comment.save()
+        notifications.comment_added(comment, post)
     return redirect('posts:post_detail', post_id=post_id)
 
 
 @login_required
 def follow_index(request):
-    posts_list = Post.objects.filter(author__following__user=request.user)
+    page_number = request.GET.get('page')
+    user_id = request.user.pk
+    page_obj, suggested_ids = gather(
+        lambda: fetch_page(
+            Post.objects.filter(author__following__user=user_id),
+            page_number,
+        ),
+        lambda: follow_graph.suggestions(request.user),
+    )
+    # Авторы постов и рекомендованные авторы - одна выборка пользователей.
+    data = loaders.for_request(request)
+    data.attach(page_obj, 'author', 'group')
+    suggested = data.users.load_many(suggested_ids)
+    data.resolve()
     context = {
-        'page_obj': paginator(request, posts_list),
+        'page_obj': page_obj,
+        'suggested_authors': [
+            user.value for user in suggested if user.value is not None
+        ],
+        # С него страница спрашивает о новых постах follow/poll/.
+        'last_post_id': max((post.pk for post in page_obj), default=0),
+        'poll_seconds': settings.FOLLOW_POLL_SECONDS,
     }
     return render(request, 'posts/follow.html', context)
 
 
+def _post_id(value):
+    try:
+        return max(int(value), 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+@login_required
+def follow_poll(request):
+    """Сколько в подписках постов новее after.
+
+    Страница подписок спрашивает раз в FOLLOW_POLL_SECONDS: короткий
+    запрос с одной выборкой по индексу вместо открытого соединения,
+    которое держало бы поток сервера.
+    """
+    after = _post_id(request.GET.get('after'))
+    newer = list(
+        Post.objects.filter(author__following__user=request.user, pk__gt=after)
+        .order_by('-pk').values_list('pk', flat=True)[:POSTS_PER_PAGE]
+    )
+    return JsonResponse({
+        'count': len(newer),
+        'last_id': newer[0] if newer else after,
+    })
+
+
+@login_required
+def follow_new(request):
+    """Посты из подписок новее after: лента вставляет их без
+    перезагрузки."""
+    after = _post_id(request.GET.get('after'))
+    posts = list(
+        Post.objects.filter(author__following__user=request.user, pk__gt=after)
+        .order_by('-pk')[:POSTS_PER_PAGE]
+    )
+    data = loaders.for_request(request)
+    data.attach(posts, 'author', 'group')
+    data.resolve()
+    response = render(
+        request, 'posts/includes/follow_new.html', {'posts': posts}
+    )
+    response['X-Last-Post-Id'] = str(posts[0].pk if posts else after)
+    return response
+
+
+@login_required
+def notification_index(request):
+    """Уведомления пользователя; показанные отмечаются прочитанными."""
+    page_obj = paginator(
+        request,
+        request.user.notifications.select_related('post', 'actor'),
+    )
+    notifications.mark_read(request.user, page_obj)
+    return render(
+        request, 'posts/notifications.html', {'page_obj': page_obj}
+    )
+
+
 @login_required
 def profile_follow(request, username):
-    author = get_object_or_404(User, username=username)
-    if author == request.user:
+    # Автор уже найден по логину при разборе URL, см. posts.usernames.
+    if username.user_id == request.user.pk:
         return redirect('posts:profile', username=username)
-    Follow.objects.get_or_create(user=request.user, author=author)
+    follow, created = Follow.objects.get_or_create(
+        user=request.user, author_id=username.user_id
+    )
+    if created:
+        notifications.follower_added(follow)
     return redirect('posts:follow_index')
 
 
 @login_required
 def profile_unfollow(request, username):
-    author = get_object_or_404(User, username=username)
-    Follow.objects.filter(user=request.user, author=author).delete()
+    Follow.objects.filter(
+        user=request.user, author_id=username.user_id
+    ).delete()
     return redirect('posts:follow_index')
+
+
+def follow_authors(user, author_ids):
+    """Подписывает на авторов одним INSERT. bulk_create сигналов не шлёт,
+    поэтому кэши, граф и уведомления обновляются здесь, по разу на
+    пачку."""
+    # Уже отслеживаемых берём из кэша подписок, без отдельной выборки.
+    followed = follow_cache.following_ids(user)
+    follows = [
+        Follow(user=user, author_id=author_id)
+        for author_id in author_ids if author_id not in followed
+    ]
+    # Параллельный запрос мог успеть подписать на тех же авторов.
+    Follow.objects.bulk_create(follows, ignore_conflicts=True)
+    follow_cache.invalidate(user.pk)
+    follow_graph.followers_changed(*(follow.author_id for follow in follows))
+    for follow in follows:
+        notifications.follower_added(follow)
+
+
+def unfollow_authors(user, author_ids):
+    """Отписывает от авторов одним DELETE, без выборки и сигналов на
+    каждую строку; кэши обновляются по разу на пачку."""
+    Follow.objects.filter(
+        user=user, author_id__in=author_ids
+    )._raw_delete(Follow.objects.db)
+    follow_cache.invalidate(user.pk)
+    follow_graph.followers_changed(*author_ids)
+
+
+@login_required
+@require_POST
+@ratelimit()
+def follow_batch(request):
+    """Подписка или отписка сразу от списка авторов.
+
+    Принимает POST с повторяющимся полем usernames и полем action
+    (follow или unfollow). Повторный запрос ничего не меняет.
+    """
+    action = request.POST.get('action', 'follow')
+    if action not in ('follow', 'unfollow'):
+        return JsonResponse({'error': 'Неизвестное действие'}, status=400)
+    usernames = set(
+        request.POST.getlist('usernames')[:settings.FOLLOW_BATCH_LIMIT]
+    )
+    authors = dict(
+        User.objects.filter(username__in=usernames)
+        .values_list('username', 'pk')
+    )
+    missing = usernames - authors.keys()
+    authors.pop(request.user.username, None)
+    if action == 'follow':
+        follow_authors(request.user, list(authors.values()))
+    else:
+        unfollow_authors(request.user, list(authors.values()))
+    return JsonResponse({
+        'action': action,
+        'usernames': sorted(authors),
+        'missing': sorted(missing),
+    })
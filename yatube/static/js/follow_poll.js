@@ -0,0 +1,51 @@
+// Лента подписок: раз в data-poll-seconds спрашивает follow/poll/, есть
+// ли новые посты, и по кнопке подгружает только их из follow/new/, без
+// перезагрузки страницы. Пока вкладка скрыта, опросов нет.
+(function () {
+  var feed = document.getElementById('follow-feed');
+  var button = document.getElementById('follow-new');
+  if (!feed || !button || !feed.dataset.poll || !window.fetch) {
+    return;
+  }
+  var lastId = Number(feed.dataset.lastId) || 0;
+  var interval = (Number(feed.dataset.pollSeconds) || 30) * 1000;
+
+  function poll() {
+    if (document.hidden) {
+      setTimeout(poll, interval);
+      return;
+    }
+    fetch(feed.dataset.poll + '?after=' + lastId, {credentials: 'same-origin'})
+      .then(function (response) {
+        return response.ok ? response.json() : {count: 0};
+      })
+      .then(function (data) {
+        if (data.count > 0) {
+          button.textContent = 'Показать новые посты: ' + data.count;
+          button.classList.remove('d-none');
+        }
+      })
+      .catch(function () {})
+      .finally(function () {
+        setTimeout(poll, interval);
+      });
+  }
+
+  button.addEventListener('click', function () {
+    button.disabled = true;
+    fetch(feed.dataset.new + '?after=' + lastId, {credentials: 'same-origin'})
+      .then(function (response) {
+        lastId = Number(response.headers.get('X-Last-Post-Id')) || lastId;
+        return response.text();
+      })
+      .then(function (html) {
+        feed.insertAdjacentHTML('afterbegin', html);
+        button.classList.add('d-none');
+      })
+      .finally(function () {
+        button.disabled = false;
+      });
+  });
+
+  setTimeout(poll, interval);
+})();
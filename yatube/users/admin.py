@@ -0,0 +1,31 @@
+from django.contrib import admin, messages
+from django.contrib.auth import get_user_model
+from django.contrib.auth.admin import UserAdmin
+
+from core.admin import JobActionsMixin
+from posts.purge import PURGE_USERS
+
+User = get_user_model()
+
+
+class SpamAwareUserAdmin(JobActionsMixin, UserAdmin):
+    actions = ('purge_in_background',)
+
+    def purge_in_background(self, request, queryset):
+        if queryset.filter(is_staff=True).exists():
+            self.message_user(
+                request, 'Сотрудников так удалять нельзя.', messages.ERROR
+            )
+            return
+        self.enqueue_job(
+            request, PURGE_USERS, queryset.values_list('pk', flat=True),
+            'Удаление аккаунтов со всем содержимым: '
+            + ', '.join(user.username for user in queryset[:5]),
+        )
+    purge_in_background.short_description = (
+        'Удалить со всеми постами и комментариями (в фоне)'
+    )
+
+
+admin.site.unregister(User)
+admin.site.register(User, SpamAwareUserAdmin)
@@ -1,5 +1,12 @@
-from django.contrib.auth.forms import UserCreationForm
+import hashlib
+
+from django.conf import settings
+from django.contrib.auth.forms import AuthenticationForm, UserCreationForm
 from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+
+from core import ratelimit
+from posts import usernames
 
 User = get_user_model()
 
@@ -8,3 +15,47 @@ class CreationForm(UserCreationForm):
     class Meta(UserCreationForm.Meta):
         model = User
         fields = ('first_name', 'last_name', 'username', 'email')
+
+    def clean_username(self):
+        # Занятый логин обычно уже в кэше, и форма отвечает без запроса к
+        # базе. Кэш может не знать о свежем пользователе, поэтому
+        # свободный логин ещё проверяет validate_unique по базе.
+        username = self.cleaned_data['username']
+        if usernames.resolve(username) is not None:
+            raise self.instance.unique_error_message(User, ['username'])
+        return username
+
+
+class ThrottledAuthenticationForm(AuthenticationForm):
+    """Вход с лимитами попыток на аккаунт.
+
+    LOGIN_ACCOUNT_IP_RATE считает попытки в аккаунт с одного адреса,
+    более свободный LOGIN_ACCOUNT_RATE - со всех адресов. Лимиты
+    проверяются до пароля: сверх них хеш не считается. Перебор аккаунтов
+    с одного адреса ограничивает лимит users:login из RATELIMITS.
+    """
+
+    def clean(self):
+        username = self.cleaned_data.get('username')
+        if username and settings.RATELIMIT_ENABLED:
+            account = hashlib.md5(username.lower().encode()).hexdigest()
+            ip = ratelimit.client_ip(self.request) if self.request else ''
+            waits = [
+                ratelimit.check_key(
+                    f'login:{account}:{ip}', settings.LOGIN_ACCOUNT_IP_RATE
+                ),
+                ratelimit.check_key(
+                    f'login:{account}', settings.LOGIN_ACCOUNT_RATE
+                ),
+            ]
+            retry_after = max(
+                (wait for wait in waits if wait is not None), default=None
+            )
+            if retry_after is not None:
+                raise ValidationError(
+                    'Слишком много попыток входа. Повторите через '
+                    '%(seconds)s с.',
+                    code='throttled',
+                    params={'seconds': retry_after},
+                )
+        return super().clean()
@@ -1,8 +1,16 @@
+from io import StringIO
+from unittest import mock
+
 from django.contrib.auth import get_user_model
 from django.contrib.auth.forms import UserCreationForm
-from django.test import TestCase, Client
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, Client, override_settings
 from django.urls import reverse
 
+from core.management.commands import tune_password_hasher
+from core.models import Job
+
 User = get_user_model()
 
 
@@ -44,3 +52,109 @@ class UserPagesTests(TestCase):
         response = self.guest_client.get(reverse('users:signup'))
         form = response.context['form']
         self.assertIsInstance(form, UserCreationForm)
+
+
+class UserAdminTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass'
+        )
+        self.client.force_login(self.admin)
+
+    def purge(self, *users):
+        return self.client.post(reverse('admin:auth_user_changelist'), {
+            'action': 'purge_in_background',
+            '_selected_action': [user.pk for user in users],
+        })
+
+    def test_purge_action_runs_in_background(self):
+        spammer = User.objects.create_user(username='spammer')
+        self.purge(spammer)
+        self.assertTrue(User.objects.filter(pk=spammer.pk).exists())
+        call_command('run_jobs', '--once', stdout=StringIO())
+        self.assertFalse(User.objects.filter(pk=spammer.pk).exists())
+        self.assertEqual(Job.objects.get().status, Job.DONE)
+
+    def test_staff_cannot_be_purged(self):
+        self.purge(self.admin)
+        self.assertFalse(Job.objects.exists())
+
+
+class PasswordHashingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='user', password='secret-password'
+        )
+
+    def login(self, password='secret-password', username='user', **extra):
+        return self.client.post(
+            reverse('users:login'),
+            {'username': username, 'password': password},
+            **extra,
+        )
+
+    @override_settings(
+        PASSWORD_HASHERS=[
+            'core.hashers.PBKDF2PasswordHasher',
+            'django.contrib.auth.hashers.MD5PasswordHasher',
+        ],
+        PASSWORD_PBKDF2_ITERATIONS=1000,
+    )
+    def test_password_is_rehashed_on_login(self):
+        self.login()
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$1000$'))
+        with self.settings(PASSWORD_PBKDF2_ITERATIONS=2000):
+            self.login()
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.password.startswith('pbkdf2_sha256$2000$'))
+
+    @override_settings(RATELIMIT_ENABLED=True, LOGIN_ACCOUNT_IP_RATE='2/m')
+    def test_login_attempts_are_limited_per_account_and_ip(self):
+        self.login('wrong')
+        self.login('wrong')
+        with mock.patch.object(User, 'check_password') as check_password:
+            response = self.login()
+        check_password.assert_not_called()
+        self.assertContains(response, 'Слишком много попыток входа')
+        self.assertNotIn('_auth_user_id', self.client.session)
+        User.objects.create_user(username='other', password='other-pass')
+        self.login('other-pass', username='other')
+        self.assertIn('_auth_user_id', self.client.session)
+        # Перебор с одного адреса не запирает аккаунт для других адресов.
+        self.client.logout()
+        self.login(REMOTE_ADDR='10.0.0.2')
+        self.assertIn('_auth_user_id', self.client.session)
+
+    @override_settings(RATELIMIT_ENABLED=True, LOGIN_ACCOUNT_RATE='3/m')
+    def test_login_attempts_are_limited_per_account_from_any_ip(self):
+        for number in range(3):
+            self.login('wrong', REMOTE_ADDR=f'10.0.0.{number}')
+        with mock.patch.object(User, 'check_password') as check_password:
+            response = self.login(REMOTE_ADDR='10.0.1.1')
+        check_password.assert_not_called()
+        self.assertContains(response, 'Слишком много попыток входа')
+
+    @override_settings(
+        RATELIMIT_ENABLED=True, RATELIMITS={'users:login': '2/m'}
+    )
+    def test_login_attempts_are_limited_per_ip(self):
+        self.login('wrong')
+        self.login('wrong', username='other')
+        with mock.patch.object(User, 'check_password') as check_password:
+            response = self.login(username='third')
+        check_password.assert_not_called()
+        self.assertEqual(response.status_code, 429)
+
+    def test_tuning_picks_largest_cost_under_target(self):
+        out = StringIO()
+        with mock.patch.object(
+            tune_password_hasher.Command, 'measure',
+            lambda command, hasher, runs: hasher.cost / 1000,
+        ):
+            call_command(
+                'tune_password_hasher', '--hasher', 'pbkdf2',
+                '--target-ms', '20', stdout=out,
+            )
+        self.assertIn('PASSWORD_PBKDF2_ITERATIONS=19000', out.getvalue())
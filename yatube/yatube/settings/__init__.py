@@ -0,0 +1,24 @@
+"""Настройки выбираются переменной окружения DJANGO_ENV (dev, prod или
+test), её можно задать в файле .env. manage.py test и pytest берут test
+сами."""
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DJANGO_ENV = os.getenv('DJANGO_ENV', 'dev')
+
+if DJANGO_ENV == 'prod':
+    from .prod import *  # noqa: F401, F403
+elif DJANGO_ENV == 'dev':
+    from .dev import *  # noqa: F401, F403
+elif DJANGO_ENV == 'test':
+    from .test import *  # noqa: F401, F403
+else:
+    from django.core.exceptions import ImproperlyConfigured
+
+    raise ImproperlyConfigured(
+        f'Неизвестное окружение DJANGO_ENV={DJANGO_ENV!r}: ожидается '
+        f'dev, prod или test.'
+    )
@@ -0,0 +1,327 @@
+"""
+Django settings for yatube project.
+
+Общие настройки для всех окружений; dev.py и prod.py их дополняют.
+
+Generated by 'django-admin startproject' using Django 2.2.19.
+
+For more information on this file, see
+https://docs.djangoproject.com/en/2.2/topics/settings/
+
+For the full list of settings and their values, see
+https://docs.djangoproject.com/en/2.2/ref/settings/
+"""
+
+import importlib.util
+import os
+
+# Build paths inside the project like this: os.path.join(BASE_DIR, ...)
+BASE_DIR = os.path.dirname(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+)
+
+
+# Quick-start development settings - unsuitable for production
+# See https://docs.djangoproject.com/en/2.2/howto/deployment/checklist/
+
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = os.getenv('SECRET_KEY')
+
+# SECURITY WARNING: don't run with debug turned on in production!
+DEBUG = False
+
+ALLOWED_HOSTS = [
+    'localhost',
+    '127.0.0.1',
+    '[::1]',
+    'testserver',
+]
+
+# Application definition
+
+INSTALLED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    'posts.apps.PostsConfig',
+    'users.apps.UsersConfig',
+    'core.apps.CoreConfig',
+    'about.apps.AboutConfig',
+    'sorl.thumbnail',
+]
+
+MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.middleware.RateLimitMiddleware',
+    'core.middleware.TemplateProfilingMiddleware',
+]
+
+ROOT_URLCONF = 'yatube.urls'
+
+TEMPLATES_DIR = os.path.join(BASE_DIR, 'templates')
+TEMPLATES_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [TEMPLATES_DIR],
+        'OPTIONS': {
+            'loaders': TEMPLATES_LOADERS,
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+                'core.context_processors.year.year',
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = 'yatube.wsgi.application'
+ASGI_APPLICATION = 'yatube.asgi.application'
+
+
+# Database
+# https://docs.djangoproject.com/en/2.2/ref/settings/#databases
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
+    }
+}
+
+
+# Password validation
+# https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
+
+LOGIN_URL = 'users:login'
+
+LOGIN_REDIRECT_URL = 'posts:index'
+
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+# Хеширование паролей, см. core.hashers. PASSWORD_HASHER - argon2, bcrypt
+# или pbkdf2; по умолчанию argon2 или bcrypt, если установлена их
+# библиотека, иначе pbkdf2. Остальные хешеры списка нужны для проверки
+# старых хешей, при входе они перехешируются выбранным. Стоимость
+# подбирает команда tune_password_hasher.
+PASSWORD_HASHER = os.getenv('PASSWORD_HASHER') or next(
+    (name for name in ('argon2', 'bcrypt') if importlib.util.find_spec(name)),
+    'pbkdf2',
+)
+PASSWORD_HASHER_CLASSES = {
+    'argon2': 'core.hashers.Argon2PasswordHasher',
+    'bcrypt': 'core.hashers.BCryptSHA256PasswordHasher',
+    'pbkdf2': 'core.hashers.PBKDF2PasswordHasher',
+}
+PASSWORD_HASHERS = [PASSWORD_HASHER_CLASSES[PASSWORD_HASHER]] + [
+    path for name, path in PASSWORD_HASHER_CLASSES.items()
+    if name != PASSWORD_HASHER
+]
+PASSWORD_PBKDF2_ITERATIONS = int(
+    os.getenv('PASSWORD_PBKDF2_ITERATIONS', 150000)
+)
+PASSWORD_BCRYPT_ROUNDS = int(os.getenv('PASSWORD_BCRYPT_ROUNDS', 12))
+PASSWORD_ARGON2_TIME_COST = int(os.getenv('PASSWORD_ARGON2_TIME_COST', 2))
+
+
+# Internationalization
+# https://docs.djangoproject.com/en/2.2/topics/i18n/
+
+LANGUAGE_CODE = 'ru'
+
+TIME_ZONE = 'UTC'
+
+USE_I18N = True
+
+USE_L10N = True
+
+USE_TZ = True
+
+
+# Static files (CSS, JavaScript, Images)
+# https://docs.djangoproject.com/en/2.2/howto/static-files/
+
+STATIC_URL = '/static/'
+STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
+STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
+
+# При сборке статики из этих файлов вырезаются классы, которых нет в
+# шаблонах (см. core.storage).
+STATIC_PRUNE_CSS = ('css/bootstrap.min.css',)
+# Классы, которые бутстрап навешивает сам, в шаблонах их не видно.
+STATIC_PRUNE_SAFELIST = (
+    'active', 'show', 'fade', 'collapsing', 'disabled',
+    'is-valid', 'is-invalid', 'was-validated',
+)
+
+# Раздавать собранную статику самим Django, если перед ним нет веб-сервера.
+SERVE_STATIC = os.getenv('SERVE_STATIC', 'False') == 'True'
+
+MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+MEDIA_URL = '/media/'
+
+# Адаптивные картинки постов: ширины вариантов для srcset, пропорции кадра
+# и атрибут sizes по умолчанию.
+POST_IMAGE_WIDTHS = (480, 768, 960)
+POST_IMAGE_RATIO = (960, 339)
+POST_IMAGE_SIZES = '(max-width: 992px) 100vw, 960px'
+
+# Сколько авторов рекомендовать в блоке «Возможно, вы знакомы».
+FOLLOW_SUGGESTIONS_COUNT = 10
+# Сколько авторов можно передать в одном запросе follow/batch/.
+FOLLOW_BATCH_LIMIT = 100
+
+# Сколько свежих постов каждый процесс держит в памяти для первых страниц
+# главной, см. posts.hot_list. 0 - буфер выключен.
+POSTS_HOT_LIST_SIZE = int(os.getenv('POSTS_HOT_LIST_SIZE', 0))
+
+# Рейтинг «Популярное»: период полураспада веса события, окно, за которое
+# учитываются события и посты, и вес нового подписчика против комментария.
+TRENDING_HALF_LIFE_HOURS = 24
+TRENDING_WINDOW_HOURS = 24 * 7
+TRENDING_FOLLOW_WEIGHT = 3
+
+# До скольких строк админка считает отфильтрованный список, см. core.admin.
+ADMIN_COUNT_LIMIT = 10000
+
+# Кэш логин -> id для адресов профилей, см. posts.usernames: сколько
+# секунд помнить найденный логин и несуществующий.
+USERNAME_CACHE_TIMEOUT = 60 * 60 * 24
+USERNAME_MISSING_TIMEOUT = 60
+
+# Фоновые задачи админки, см. core.jobs: строк в одной транзакции, пауза
+# между опросами очереди и через сколько секунд без прогресса задачу
+# считать брошенной.
+JOBS_BATCH_SIZE = 500
+JOBS_POLL_INTERVAL = 5
+JOBS_STALE_SECONDS = 600
+
+# Удаление спам-аккаунтов, см. posts.purge: строк в одной транзакции и
+# пауза между пачками в секундах, чтобы не держать блокировку базы.
+PURGE_BATCH_SIZE = 200
+PURGE_PAUSE = 0.05
+
+# Потоки на независимые выборки одной страницы, см. core.concurrency.
+# 0 - выборки идут по очереди в потоке запроса.
+VIEW_FETCH_THREADS = int(os.getenv('VIEW_FETCH_THREADS', 0))
+# Сколько запросов одновременно обрабатывает ASGI-вход, см. core.asgi.
+ASGI_THREADS = int(os.getenv('ASGI_THREADS', 8))
+
+# Как часто страница подписок спрашивает о новых постах, в секундах.
+FOLLOW_POLL_SECONDS = 30
+
+# Уведомления, см. posts.notifications: сколько секунд копить события в
+# памяти процесса перед записью в базу (0 - писать сразу после коммита),
+# при скольких уведомлениях в буфере писать досрочно, на сколько секунд
+# кэшировать число непрочитанных и по сколько получателей собирать в одну
+# отправку писем.
+NOTIFICATIONS_FLUSH_SECONDS = 5
+NOTIFICATIONS_BUFFER_SIZE = 500
+NOTIFICATIONS_UNREAD_TIMEOUT = 300
+NOTIFICATIONS_EMAIL_BATCH = 100
+
+# Ограничение частоты запросов на запись, см. core.ratelimit. Лимиты щедрые:
+# они против скриптов, а не людей.
+RATELIMIT_ENABLED = os.getenv('RATELIMIT_ENABLED', 'True') == 'True'
+RATELIMIT_CACHE = 'default'
+# Откуда брать IP анонима; за обратным прокси - его заголовок.
+RATELIMIT_IP_HEADER = os.getenv('RATELIMIT_IP_HEADER', 'REMOTE_ADDR')
+RATELIMIT_METHODS = ('POST',)
+RATELIMITS = {
+    'posts:post_create': '10/m',
+    'posts:add_comment': '20/m',
+    'posts:profile_follow': ('60/m', ('GET', 'POST')),
+    'posts:profile_unfollow': ('60/m', ('GET', 'POST')),
+    'posts:follow_batch': '10/m',
+    'users:signup': '20/h',
+    # Вход с одного адреса в любые аккаунты.
+    'users:login': '30/m',
+}
+# Попыток входа в один аккаунт: с одного адреса и со всех адресов вместе.
+# Сверх лимита пароль не проверяется вовсе, и перебор не тратит процессор
+# на хеши. Общий лимит свободнее, чтобы перебор с чужих адресов не запирал
+# владельца надолго.
+LOGIN_ACCOUNT_IP_RATE = '10/m'
+LOGIN_ACCOUNT_RATE = '50/m'
+
+# Sending email
+
+# Вью только кладут письма в outbox, отправляет их команда send_outbox
+# через OUTBOX_EMAIL_BACKEND, см. core.outbox.
+EMAIL_BACKEND = 'core.outbox.EmailBackend'
+OUTBOX_EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+
+EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
+
+# Писем на одно соединение с почтовым сервером, сколько попыток отправить
+# письмо и пауза перед второй в секундах (дальше она удваивается), пауза
+# между опросами очереди и через сколько секунд взятую пачку считать
+# брошенной.
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_DELAY = 60
+OUTBOX_POLL_INTERVAL = 5
+OUTBOX_STALE_SECONDS = 600
+
+
+CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
+
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Сессии читаются из кэша и пишутся в базу, только если изменились.
+# Для подписанных cookie без базы вовсе:
+# SESSION_ENGINE=django.contrib.sessions.backends.signed_cookies
+SESSION_ENGINE = os.getenv('SESSION_ENGINE', 'core.sessions')
+
+
+# Профилирование шаблонов: время рендеринга каждого шаблона и include
+# пишется в лог core.template_profiling и в заголовок Server-Timing.
+TEMPLATE_PROFILING = os.getenv('TEMPLATE_PROFILING', 'False') == 'True'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+        },
+    },
+    'loggers': {
+        'core.template_profiling': {
+            'handlers': ['console'],
+            'level': 'INFO',
+        },
+    },
+}
@@ -0,0 +1,9 @@
+"""Настройки для локальной разработки."""
+import os
+
+from .base import *  # noqa: F401, F403
+
+DEBUG = True
+
+# Локально лимиты только мешают; включить можно переменной окружения.
+RATELIMIT_ENABLED = os.getenv('RATELIMIT_ENABLED', 'False') == 'True'
@@ -0,0 +1,57 @@
+"""Боевые настройки: всё, что влияет на производительность, берётся из
+окружения."""
+import os
+
+from .base import *  # noqa: F401, F403
+from .base import BASE_DIR, TEMPLATES, TEMPLATES_LOADERS
+
+DEBUG = False
+
+ALLOWED_HOSTS = os.getenv(
+    'ALLOWED_HOSTS', 'localhost,127.0.0.1,[::1]'
+).split(',')
+
+# Шаблоны читаются и компилируются один раз на процесс.
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', TEMPLATES_LOADERS),
+]
+
+# Статика с хешами в именах и сжатыми копиями, см. core.storage.
+STATICFILES_STORAGE = 'core.storage.CompressedManifestStaticFilesStorage'
+
+DATABASES = {
+    'default': {
+        'ENGINE': os.getenv('DB_ENGINE', 'django.db.backends.sqlite3'),
+        'NAME': os.getenv('DB_NAME', os.path.join(BASE_DIR, 'db.sqlite3')),
+        'USER': os.getenv('DB_USER', ''),
+        'PASSWORD': os.getenv('DB_PASSWORD', ''),
+        'HOST': os.getenv('DB_HOST', ''),
+        'PORT': os.getenv('DB_PORT', ''),
+        # Соединение живёт между запросами, а не открывается на каждый.
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', 60)),
+    }
+}
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3':
+    # Сколько секунд ждать блокировку записи, прежде чем упасть.
+    DATABASES['default']['OPTIONS'] = {
+        'timeout': int(os.getenv('DB_SQLITE_TIMEOUT', 20)),
+    }
+
+# Кэш по умолчанию - файловый: в отличие от LocMemCache он общий для всех
+# процессов веб-сервера.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.filebased.FileBasedCache',
+        ),
+        'LOCATION': os.getenv(
+            'CACHE_LOCATION', os.path.join(BASE_DIR, '.cache')
+        ),
+        'TIMEOUT': int(os.getenv('CACHE_TIMEOUT', 300)),
+        'KEY_PREFIX': os.getenv('CACHE_KEY_PREFIX', 'yatube'),
+    }
+}
+
+# Первые страницы главной отдаются из памяти процесса, см. posts.hot_list.
+POSTS_HOT_LIST_SIZE = int(os.getenv('POSTS_HOT_LIST_SIZE', 50))
@@ -0,0 +1,23 @@
+"""Настройки для тестов: быстрые хеши паролей, медиа в памяти и
+параллельный запуск."""
+import os
+
+from .base import *  # noqa: F401, F403
+from .base import BASE_DIR
+
+# Стойкость хеша в тестах не нужна, а PBKDF2 - самая медленная часть
+# создания пользователя.
+PASSWORD_HASHERS = ['django.contrib.auth.hashers.MD5PasswordHasher']
+
+DEFAULT_FILE_STORAGE = 'core.storage.InMemoryStorage'
+THUMBNAIL_STORAGE = DEFAULT_FILE_STORAGE
+
+RATELIMIT_ENABLED = False
+NOTIFICATIONS_FLUSH_SECONDS = 0
+
+TEST_RUNNER = 'core.test_runner.TestRunner'
+# Сколько самых медленных тестов показать после прогона.
+TEST_SLOWEST_COUNT = 10
+
+# Бюджеты страниц для pytest-плагина core.pytest_budgets.
+PERF_BUDGETS_FILE = os.path.join(BASE_DIR, 'perf_budgets.json')